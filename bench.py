@@ -0,0 +1,454 @@
+# ==================== بنچمارک آفلاین ====================
+# یک Cloudflare API ساختگی (aiohttp) و یک session ساختگی تلگرام؛ سناریوها هندلرهای واقعی flaredns را
+# از مسیر dp.feed_update اجرا می‌کنند و p50/p99، تعداد درخواست‌ها و مصرف حافظه را گزارش می‌دهند.
+#
+#   python bench.py --accounts 3 --zones 200 --records 500 --latency 40 --error-rate 0.02
+#   python bench.py --json base.json                 # ذخیره نتیجه
+#   python bench.py --compare base.json              # مقایسه؛ اگر p99 بیش از tolerance بدتر شود exit 1
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+import uuid
+from collections import Counter
+
+from aiohttp import web
+
+import config
+
+SCENARIOS = (
+    "stats", "zones_cold", "zones_warm", "zones_page",
+    "records_cold", "records_warm", "edit_content", "edit_proxy",
+)
+
+
+# --- Cloudflare ساختگی ---
+class MockCloudflare:
+    def __init__(self, accounts: int, zones: int, records: int, latency: float, jitter: float,
+                 error_rate: float, rate_limit: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.throttled = 0
+        self._windows: dict[str, tuple[float, int]] = {}
+        # token ➜ {"zones": [...], "records": {zone_id: [...]}}
+        self.accounts: dict[str, dict] = {}
+        for a in range(accounts):
+            zl = []
+            recs = {}
+            for z in range(zones):
+                zid = uuid.UUID(int=self.rng.getrandbits(128)).hex
+                name = f"zone{z}-acc{a}.example"
+                zl.append({"id": zid, "name": name, "status": "active" if z % 4 else "pending"})
+                recs[zid] = [self._record(name, r) for r in range(records)]
+            self.accounts[f"bench-token-{a}"] = {"zones": zl, "records": recs}
+
+    def _record(self, zone: str, i: int) -> dict:
+        kind = ("A", "A", "AAAA", "CNAME", "TXT")[i % 5]
+        content = {
+            "A": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "AAAA": f"2001:db8::{i:x}",
+            "CNAME": f"target{i}.{zone}",
+            "TXT": f"v=bench{i}",
+        }[kind]
+        return {
+            "id": uuid.UUID(int=self.rng.getrandbits(128)).hex,
+            "type": kind,
+            "name": f"host{i}.{zone}",
+            "content": content,
+            "ttl": 1,
+            "proxied": kind in ("A", "AAAA", "CNAME") and i % 2 == 0,
+        }
+
+    @staticmethod
+    def _ok(result, info=None) -> web.Response:
+        body = {"success": True, "errors": [], "messages": [], "result": result}
+        if info:
+            body["result_info"] = info
+        return web.json_response(body)
+
+    @staticmethod
+    def _fail(status: int, message: str) -> web.Response:
+        return web.json_response({"success": False, "errors": [{"message": message}], "result": None}, status=status)
+
+    def _page(self, items: list, req: web.Request) -> web.Response:
+        page = int(req.query.get("page", 1))
+        per_page = int(req.query.get("per_page", 20))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        return self._ok(chunk, {
+            "page": page, "per_page": per_page, "count": len(chunk),
+            "total_count": len(items), "total_pages": max(1, -(-len(items) // per_page)),
+        })
+
+    @web.middleware
+    async def middleware(self, req: web.Request, handler):
+        route = req.match_info.route.resource.canonical if req.match_info.route.resource else req.path
+        self.calls[f"{req.method} {route}"] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+        token = req.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token not in self.accounts:
+            return self._fail(403, "Invalid API Token")
+        if self.rate_limit:
+            # پنجره یک‌ثانیه‌ای ساده برای هر توکن
+            now = time.monotonic()
+            start, count = self._windows.get(token, (now, 0))
+            if now - start >= 1:
+                start, count = now, 0
+            self._windows[token] = (start, count + 1)
+            if count + 1 > self.rate_limit:
+                self.throttled += 1
+                return web.json_response({"success": False, "errors": [{"message": "rate limited"}]},
+                                         status=429, headers={"Retry-After": "1"})
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.throttled += 1
+            return web.json_response({"success": False, "errors": [{"message": "rate limited"}]},
+                                     status=429, headers={"Retry-After": "0"})
+        req["account"] = self.accounts[token]
+        return await handler(req)
+
+    async def zones(self, req: web.Request) -> web.Response:
+        items = req["account"]["zones"]
+        status = req.query.get("status")
+        if status:
+            items = [z for z in items if z["status"] == status]
+        return self._page(items, req)
+
+    async def records(self, req: web.Request) -> web.Response:
+        recs = req["account"]["records"].get(req.match_info["zone"])
+        if recs is None:
+            return self._fail(404, "zone not found")
+        return self._page(recs, req)
+
+    async def create(self, req: web.Request) -> web.Response:
+        rec = {**await req.json(), "id": uuid.uuid4().hex}
+        req["account"]["records"][req.match_info["zone"]].append(rec)
+        return self._ok(rec)
+
+    async def update(self, req: web.Request) -> web.Response:
+        recs = req["account"]["records"][req.match_info["zone"]]
+        body = await req.json()
+        for i, r in enumerate(recs):
+            if r["id"] == req.match_info["rid"]:
+                recs[i] = {**r, **body} if req.method == "PATCH" else {**body, "id": r["id"]}
+                return self._ok(recs[i])
+        return self._fail(404, "record not found")
+
+    async def delete(self, req: web.Request) -> web.Response:
+        recs = req["account"]["records"][req.match_info["zone"]]
+        recs[:] = [r for r in recs if r["id"] != req.match_info["rid"]]
+        return self._ok({"id": req.match_info["rid"]})
+
+    async def batch(self, req: web.Request) -> web.Response:
+        recs = req["account"]["records"][req.match_info["zone"]]
+        body = await req.json()
+        out = {"deletes": [], "patches": [], "puts": [], "posts": []}
+        gone = {d["id"] for d in body.get("deletes", [])}
+        out["deletes"] = [r for r in recs if r["id"] in gone]
+        recs[:] = [r for r in recs if r["id"] not in gone]
+        by_id = {r["id"]: i for i, r in enumerate(recs)}
+        for key in ("patches", "puts"):
+            for p in body.get(key, []):
+                i = by_id[p["id"]]
+                recs[i] = {**recs[i], **p} if key == "patches" else p
+                out[key].append(recs[i])
+        for p in body.get("posts", []):
+            rec = {**p, "id": uuid.uuid4().hex}
+            recs.append(rec)
+            out["posts"].append(rec)
+        return self._ok(out)
+
+    async def verify(self, req: web.Request) -> web.Response:
+        return self._ok({"id": "bench", "status": "active"})
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/zones", self.zones)
+        app.router.add_get("/zones/{zone}/dns_records", self.records)
+        app.router.add_post("/zones/{zone}/dns_records", self.create)
+        app.router.add_post("/zones/{zone}/dns_records/batch", self.batch)
+        app.router.add_put("/zones/{zone}/dns_records/{rid}", self.update)
+        app.router.add_patch("/zones/{zone}/dns_records/{rid}", self.update)
+        app.router.add_delete("/zones/{zone}/dns_records/{rid}", self.delete)
+        app.router.add_get("/user/tokens/verify", self.verify)
+        return app
+
+
+# --- تلگرام ساختگی ---
+def make_fake_session(latency: float):
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Message
+
+    class FakeTelegramSession(BaseSession):
+        # درخواست‌ها ثبت می‌شوند و پاسخ از همان مسیر check_response خود aiogram ساخته می‌شود
+        def __init__(self):
+            super().__init__()
+            self.calls: Counter = Counter()
+            self.sent: list[tuple[str, dict]] = []
+            self._message_id = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            name = type(method).__name__
+            self.calls[name] += 1
+            if latency:
+                await asyncio.sleep(latency)
+            returning = method.__returning__
+            if returning is Message or Message in typing.get_args(returning):
+                self._message_id += 1
+                result = {
+                    "message_id": getattr(method, "message_id", None) or self._message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": getattr(method, "chat_id", None) or config.ADMIN_ID, "type": "private"},
+                    "text": getattr(method, "text", None) or "",
+                }
+            else:
+                result = True
+            self.sent.append((name, {"text": getattr(method, "text", None)}))
+            content = json.dumps({"ok": True, "result": result})
+            return self.check_response(bot, method, 200, content).result
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return FakeTelegramSession()
+
+
+# --- آپدیت‌های ساختگی ---
+class Driver:
+    def __init__(self, bot_module, tg_bot):
+        from aiogram.types import Update
+
+        self.m = bot_module
+        self.bot = tg_bot
+        self.Update = Update
+        self.uid = config.ADMIN_ID
+        self._update_id = 0
+
+    def _base(self) -> tuple[dict, dict]:
+        user = {"id": self.uid, "is_bot": False, "first_name": "bench"}
+        chat = {"id": self.uid, "type": "private"}
+        return user, chat
+
+    async def _feed(self, payload: dict):
+        self._update_id += 1
+        payload["update_id"] = self._update_id
+        update = self.Update.model_validate(payload, context={"bot": self.bot})
+        await self.m.dp.feed_update(self.bot, update)
+
+    async def callback(self, data: str):
+        user, chat = self._base()
+        await self._feed({"callback_query": {
+            "id": str(self._update_id), "from": user, "chat_instance": "bench", "data": data,
+            "message": {"message_id": 1, "date": int(time.time()), "chat": chat, "from": user, "text": "…"},
+        }})
+
+    async def message(self, text: str):
+        user, chat = self._base()
+        await self._feed({"message": {
+            "message_id": self._update_id + 1, "date": int(time.time()), "chat": chat, "from": user, "text": text,
+        }})
+
+
+# --- سناریوها ---
+async def run_scenario(name: str, m, drv: Driver, cf: MockCloudflare, session, rng: random.Random) -> dict:
+    # یک بار اجرای سناریو؛ فقط بخش زمان‌سنجی‌شده در زمان و شمارش درخواست‌ها حساب می‌شود
+    token = next(iter(cf.accounts))
+    acc = cf.accounts[token]
+
+    async def open_zone(cold: bool) -> tuple[str, list]:
+        zone = rng.choice(acc["zones"])
+        if cold:
+            m.cf_cache.pop(("records", token, zone["id"]))
+        await drv.callback(m.zone_cb(drv.uid, zone["id"]))
+        return zone["id"], acc["records"][zone["id"]]
+
+    # آماده‌سازی بیرون از زمان‌سنجی
+    if name in ("zones_warm", "zones_page"):
+        await drv.callback("zones_list")
+    elif name in ("records_warm", "edit_content", "edit_proxy"):
+        await drv.callback("zones_list")
+        zid, recs = await open_zone(cold=False)
+    elif name == "zones_cold":
+        m.cf_cache.pop(("zones", token))
+
+    cf_before, tg_before, throttled = cf.calls.copy(), session.calls.copy(), cf.throttled
+    started = time.perf_counter()
+    if name == "stats":
+        await drv.callback("global_stats")
+    elif name in ("zones_cold", "zones_warm"):
+        await drv.callback("zones_list")
+    elif name == "zones_page":
+        await drv.callback(m.pack("zpage", rng.randrange(max(1, len(acc["zones"]) // 10))))
+    elif name == "records_cold":
+        await open_zone(cold=True)
+    elif name == "records_warm":
+        await drv.callback(m.pack("rpage", rng.randrange(max(1, len(recs) // 10))))
+    elif name == "edit_content":
+        rec = rng.choice(recs)
+        h = m.handle_for(drv.uid, rec["id"])
+        await drv.callback(m.pack("rec", h))
+        await drv.callback(m.pack("editf", "content", h))
+        await drv.message(rec["content"] if rec["type"] != "A" else f"10.99.{rng.randrange(256)}.{rng.randrange(256)}")
+    elif name == "edit_proxy":
+        rec = rng.choice([r for r in recs if r["type"] in ("A", "AAAA", "CNAME")] or recs)
+        h = m.handle_for(drv.uid, rec["id"])
+        await drv.callback(m.pack("rec", h))
+        await drv.callback(m.pack("editproxy", h))
+        await drv.callback(m.pack("setproxyrec", "false" if rec.get("proxied") else "true", h))
+    return {
+        "elapsed": time.perf_counter() - started,
+        "cf": cf.calls - cf_before,
+        "tg": session.calls - tg_before,
+        "429": cf.throttled - throttled,
+    }
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def bench(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="flaredns-bench-")
+    # flaredns تنظیمات را هنگام import می‌خواند؛ همه چیز به پوشه موقت و حافظه هدایت می‌شود
+    config.ACCOUNTS_FILE = os.path.join(workdir, "accounts.json")
+    config.STORAGE_BACKEND = "memory"
+    config.SNAPSHOT_PATH = os.path.join(workdir, "snapshots.db")
+    config.HISTORY_PATH = os.path.join(workdir, "history.db")
+    config.SYNC_ENABLED = False
+    config.METRICS_PORT = 0
+    config.BOT_TOKEN = "123456:bench"
+    config.STATS_EDIT_INTERVAL = 0.5
+    if args.client_rate:
+        # token bucket خود ربات (پیش‌فرض 4 درخواست در ثانیه برای هر توکن) معمولاً گلوگاه سناریوهای سرد است
+        config.CF_RATE_LIMIT = args.client_rate
+    if args.memory:
+        tracemalloc.start()
+
+    from flaredns import app, core as m
+
+    app.setup_routers()
+
+    cf = MockCloudflare(args.accounts, args.zones, args.records, args.latency / 1000, args.jitter / 1000,
+                        args.error_rate, args.rate_limit, args.seed)
+    runner = web.AppRunner(cf.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    m.cf_client.base_url = f"http://127.0.0.1:{port}"
+    await m.cf_client.start()
+
+    session = make_fake_session(args.tg_latency / 1000)
+    tg_bot = app.create_bot(session=session)
+    drv = Driver(m, tg_bot)
+    for i, token in enumerate(cf.accounts):
+        await m.save_account(f"bench{i}", token)
+    m.user_cache.setdefault(config.ADMIN_ID, {})["active_acc"] = "bench0"
+
+    rng = random.Random(args.seed)
+    results: dict[str, dict] = {}
+    for name in args.scenarios:
+        if args.memory:
+            tracemalloc.reset_peak()
+        runs = [await run_scenario(name, m, drv, cf, session, rng) for _ in range(args.iterations)]
+        timings = [r["elapsed"] for r in runs]
+        results[name] = {
+            "n": len(timings),
+            "p50_ms": _pct(timings, 0.5) * 1000,
+            "p99_ms": _pct(timings, 0.99) * 1000,
+            "max_ms": max(timings) * 1000,
+            "cf_calls": dict(sum((r["cf"] for r in runs), Counter())),
+            "cf_429": sum(r["429"] for r in runs),
+            "tg_calls": dict(sum((r["tg"] for r in runs), Counter())),
+        }
+        if args.memory:
+            results[name]["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+
+    await m.cf_client.close()
+    await runner.cleanup()
+    await m.persistent_store.close()
+    m.close_snapshot_store()
+    m.close_history_store()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "params": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "scenarios": results,
+    }
+
+
+def print_report(report: dict, baseline: dict | None, tolerance: float) -> bool:
+    regressed = False
+    print(f"{'scenario':<14}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'CF':>6}{'429':>6}{'TG':>5}"
+          + (f"{'peak KB':>10}" if any("peak_kb" in s for s in report["scenarios"].values()) else ""))
+    for name, s in report["scenarios"].items():
+        line = (f"{name:<14}{s['n']:>5}{s['p50_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+                f"{sum(s['cf_calls'].values()):>6}{s['cf_429']:>6}{sum(s['tg_calls'].values()):>5}")
+        if "peak_kb" in s:
+            line += f"{s['peak_kb']:>10.0f}"
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base and base["p99_ms"] > 0:
+            change = s["p99_ms"] / base["p99_ms"] - 1
+            line += f"   p99 {change:+.0%}"
+            if change > tolerance:
+                line += " ⚠️"
+                regressed = True
+        print(line)
+    print(f"\nmax RSS: {report['maxrss_kb'] / 1024:.1f} MB")
+    for name, s in report["scenarios"].items():
+        calls = ", ".join(f"{k}×{v}" for k, v in sorted(s["cf_calls"].items()))
+        tg = ", ".join(f"{k}×{v}" for k, v in sorted(s["tg_calls"].items()))
+        print(f"  {name}: CF[{calls}] TG[{tg}]")
+    return regressed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Offline FlareDNS benchmark against a mock Cloudflare API")
+    p.add_argument("--accounts", type=int, default=3)
+    p.add_argument("--zones", type=int, default=120, help="zones per account")
+    p.add_argument("--records", type=int, default=300, help="records per zone")
+    p.add_argument("--latency", type=float, default=30, help="mock Cloudflare latency (ms)")
+    p.add_argument("--jitter", type=float, default=10, help="± latency jitter (ms)")
+    p.add_argument("--tg-latency", type=float, default=0, help="fake Telegram latency (ms)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    p.add_argument("--rate-limit", type=float, default=0, help="requests/s per token before 429 (0 = off)")
+    p.add_argument("--client-rate", type=float, default=0, help="override the bot's CF_RATE_LIMIT (req/s per token)")
+    p.add_argument("--iterations", type=int, default=20)
+    p.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--memory", action="store_true", help="track peak allocations (tracemalloc; slower)")
+    p.add_argument("--json", help="write the report to this file")
+    p.add_argument("--compare", help="baseline report to compare p99 against")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed p99 regression (0.2 = +20%%)")
+    args = p.parse_args()
+
+    report = asyncio.run(bench(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressed = print_report(report, baseline, args.tolerance)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -55,3 +55,119 @@ ICONS = {
     "KEY": "🔑",
     "SPINNER": "⏳",
 }
+
+# Cloudflare HTTP client (connection pool / keep-alive)
+CF_POOL_LIMIT = 100            # max open connections in total
+CF_POOL_LIMIT_PER_HOST = 20    # max open connections to api.cloudflare.com
+CF_DNS_CACHE_TTL = 300         # seconds to cache DNS lookups
+CF_KEEPALIVE_TIMEOUT = 60      # seconds to keep idle connections open
+CF_REQUEST_TIMEOUT = 25        # total timeout per API call (seconds)
+
+# Global stats report
+STATS_CONCURRENCY = 8          # accounts queried at the same time
+STATS_ACCOUNT_TIMEOUT = 15     # seconds before an account is reported as timed out
+STATS_EDIT_INTERVAL = 1.5      # min seconds between progress edits of the report
+
+# Pagination of Cloudflare list endpoints
+CF_PAGE_CONCURRENCY = 4        # pages fetched at the same time after the first one
+CF_ZONES_PER_PAGE = 50         # Cloudflare allows at most 50 zones per page
+CF_RECORDS_PER_PAGE = 500      # DNS records per page
+
+# Cache of zone lists and DNS record sets
+CACHE_TTL = 120                # seconds before a cached list is fetched again
+CACHE_MAX_ENTRIES = 256        # least recently used lists are evicted beyond this
+
+# Cloudflare request scheduling (per API token)
+CF_RATE_LIMIT = 4.0            # requests per second per token (Cloudflare allows 1200 / 5 min)
+CF_RATE_BURST = 20             # short bursts allowed above the steady rate
+CF_MAX_INFLIGHT = 32           # requests on the wire at the same time; the rest wait in line
+CF_MAX_RETRIES = 4             # retries for 429 / 5xx / dropped connections
+CF_BACKOFF_BASE = 0.5          # first retry delay (seconds), doubled on each retry
+CF_BACKOFF_MAX = 30            # upper bound for a single retry delay (seconds)
+
+# Bulk import / export
+BULK_CONCURRENCY = 8           # record changes sent at the same time during an import
+PROGRESS_EDIT_INTERVAL = 1.5   # min seconds between progress message edits
+CF_BATCH_SIZE = 200            # record changes per dns_records/batch request
+
+# Persistent storage for FSM state and user sessions: "sqlite", "file" or "memory"
+STORAGE_BACKEND = "sqlite"
+STORAGE_PATH = "flaredns.db"   # database file (sqlite) or directory (file)
+STORAGE_FLUSH_INTERVAL = 5     # seconds between batched writes
+
+# How updates are received: "polling" or "webhook"
+BOT_MODE = "polling"
+TELEGRAM_API_URL = None        # custom Bot API server, e.g. "http://127.0.0.1:8081" (None = api.telegram.org)
+WEBHOOK_URL = ""               # public https base URL Telegram should call, e.g. "https://bot.example.com"
+WEBHOOK_PATH = "/telegram/webhook"
+WEBHOOK_SECRET = ""            # checked against X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080            # also serves GET /healthz
+WEBHOOK_WORKERS = 8            # updates processed at the same time
+WEBHOOK_QUEUE_SIZE = 1000      # received updates waiting for a worker
+
+# Background sync of zones / records into a local snapshot (snapshots.db)
+SYNC_ENABLED = True
+SYNC_INTERVAL = 600            # seconds between sync rounds
+SYNC_CONCURRENCY = 4           # zones fetched at the same time
+SYNC_MAX_ZONES_PER_CYCLE = 200 # per account; least recently synced zones go first
+SYNC_NOTIFY = True             # message the admin when records change outside the bot
+SNAPSHOT_PATH = "snapshots.db"
+SNAPSHOT_MAX_AGE = 1200        # handlers read from the snapshot while it is younger than this
+
+# Zone history (history.db): every change to a zone's records becomes a version that can be diffed and restored.
+# Versions are stored as compressed deltas with a full copy every HISTORY_FULL_EVERY versions.
+HISTORY_ENABLED = True
+HISTORY_PATH = "history.db"
+HISTORY_FULL_EVERY = 32
+HISTORY_MAX_VERSIONS = 500     # per zone; older versions are pruned
+HISTORY_GROUP_WINDOW = 2.0     # seconds; edits made together (bulk actions) are stored as one version
+
+# /find: maximum results shown per query (searches the local snapshot index)
+FIND_LIMIT = 25
+
+# Propagation check on the record details view: resolvers are queried over UDP, "host" or "host:port"
+# ("[::1]:5353" for IPv6), so a local test DNS server can be used instead of the public ones
+DNS_RESOLVERS = {"Cloudflare": "1.1.1.1", "Google": "8.8.8.8", "Quad9": "9.9.9.9", "OpenDNS": "208.67.222.222"}
+DNS_QUERY_TIMEOUT = 2.0        # seconds per query
+PROPAGATION_INTERVAL = 5       # seconds between rounds for resolvers that still return the old answer
+PROPAGATION_TIMEOUT = 180      # give up after this many seconds
+
+# Dynamic DNS: dyndns2-compatible endpoint, GET http://DDNS_HOST:DDNS_PORT/nic/update?hostname=X&myip=IP
+# Clients authenticate with their key as the Basic auth password, a Bearer token or ?key=.
+# Each key is bound to one account from accounts.json and the host names (fnmatch patterns) it may update;
+# only existing A/AAAA records are updated.
+DDNS_HOST = "0.0.0.0"
+DDNS_PORT = 0                  # 0 disables the endpoint
+DDNS_CLIENTS = {}              # {"long-random-key": {"account": "name", "names": ["home.example.com", "*.dyn.example.com"]}}
+DDNS_COALESCE = 2.0            # seconds; a burst of updates for one name becomes a single Cloudflare write
+DDNS_INDEX_TTL = 300           # seconds a zone's name -> record index is trusted before records are re-read
+DDNS_TRUST_FORWARDED = False   # take the caller IP from X-Forwarded-For (only behind a reverse proxy)
+
+# Token health: every token in accounts.json is verified in the background; a token that is dead
+# (revoked/expired/disabled) trips a per-token circuit breaker, so requests with it fail instantly
+TOKEN_CHECK_INTERVAL = 900     # seconds between health checks, 0 disables the background checker
+TOKEN_CHECK_CONCURRENCY = 8    # tokens verified at the same time
+TOKEN_CHECK_TIMEOUT = 10       # seconds per verify call
+TOKEN_CHECK_NOTIFY = True      # message the account's users when its token stops working
+TOKEN_EXPIRY_WARNING = 7 * 86400  # seconds before expires_on when the accounts menu warns
+TOKEN_BREAKER_THRESHOLD = 3    # consecutive authentication failures that open the breaker
+TOKEN_BREAKER_COOLDOWN = 300   # seconds requests are rejected before one trial request is let through
+
+# Metrics: Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics and the /perf command
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108            # 0 keeps /perf but skips the HTTP endpoint
+
+# Telegram flood-wait: wait and resend when Telegram asks for at most this many seconds
+FLOOD_WAIT_MAX = 60
+
+# Extra Telegram users allowed to use the bot (ADMIN_ID is always "admin").
+#   "admin":    sees every account, /perf, sync notifications for all accounts
+#   "operator": sees only accounts they added and those listed in ACCOUNT_ACCESS
+USERS = {}            # {telegram_user_id: "admin" | "operator"}
+ACCOUNT_ACCESS = {}   # {telegram_user_id: ["account name", ...]}
+
+# Startup: updates sent while the bot was down are processed unless this is True
+DROP_PENDING_UPDATES = False
+COLD_START_TARGET = 5.0        # seconds; a warning is printed at boot when startup takes longer
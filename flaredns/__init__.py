@@ -0,0 +1,3 @@
+# ==================== FlareDNS ====================
+# bot.py نقطه شروع است و فقط flaredns.app را import می‌کند؛ زیرسیستم‌های اختیاری
+# (sync، اسنپ‌شات، ورود/خروج فایل، webhook و سرور متریک) با اولین استفاده بارگذاری می‌شوند.
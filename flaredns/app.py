@@ -0,0 +1,173 @@
+# ==================== راه‌اندازی ====================
+# bot.py فقط این ماژول را import می‌کند؛ روترها، sync و سرور متریک در main() و به ترتیب نیاز بارگذاری می‌شوند.
+import time
+import asyncio
+from aiogram import Bot
+from aiogram.types import CallbackQuery
+from aiogram.enums import ParseMode
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from . import metrics
+from .handlers import include_routers
+from .settings import (
+    BOT_TOKEN, BOT_MODE, COLD_START_TARGET, DDNS_CLIENTS, DDNS_HOST, DDNS_PORT, DROP_PENDING_UPDATES, METRICS_HOST,
+    METRICS_PORT, SYNC_ENABLED, TELEGRAM_API_URL, TOKEN_CHECK_INTERVAL, WEBHOOK_HOST, WEBHOOK_PATH, WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE, WEBHOOK_SECRET, WEBHOOK_URL, WEBHOOK_WORKERS,
+)
+from .core import (
+    cf_client, close_history_store, close_resolver_pool, close_snapshot_store, dp, perf, persistent_store, renderer,
+)
+
+# مدت هر مرحله بالا آمدن ربات (ثانیه)؛ در /metrics و گزارش شروع نمایش داده می‌شود
+cold_start: dict[str, float] = {}
+perf.gauge("flaredns_cold_start_seconds", "Time spent in each startup phase before updates were accepted", ("phase",),
+           lambda: {(phase,): seconds for phase, seconds in cold_start.items()})
+
+
+# ==================== اندازه‌گیری زمان (/perf) ====================
+async def handler_timing_middleware(handler, event, data):
+    started = time.perf_counter()
+    try:
+        return await handler(event, data)
+    finally:
+        if isinstance(event, CallbackQuery):
+            labels = ("callback", metrics.callback_prefix(event.data))
+        elif event.text and event.text.startswith("/"):
+            labels = ("command", event.text.split()[0].split("@")[0])
+        else:
+            labels = ("message", data.get("raw_state") or "-")
+        perf.observe("flaredns_handler_seconds", labels, time.perf_counter() - started)
+
+
+async def telegram_timing_middleware(make_request, bot, method):
+    started = time.perf_counter()
+    try:
+        return await make_request(bot, method)
+    finally:
+        perf.observe("flaredns_telegram_request_seconds", (type(method).__name__,), time.perf_counter() - started)
+
+
+if perf.enabled:
+    dp.callback_query.outer_middleware(handler_timing_middleware)
+    dp.message.outer_middleware(handler_timing_middleware)
+
+
+# ==================== Main ====================
+def create_bot(session=None) -> Bot:
+    # TELEGRAM_API_URL برای Bot API سرور محلی یا یک شبیه‌ساز تلگرام در تست‌هاست؛ bench.py یک session ساختگی می‌دهد
+    if session is None and TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(renderer.middleware)
+    if perf.enabled:
+        bot.session.middleware(telegram_timing_middleware)
+    return bot
+
+
+def setup_routers():
+    # روترها یک بار و پیش از اولین آپدیت ثبت می‌شوند؛ زمان import آن‌ها جزو cold start است
+    started = time.perf_counter()
+    include_routers(dp)
+    cold_start["routers"] = time.perf_counter() - started
+
+
+def report_cold_start(where: str):
+    total = sum(cold_start.values())
+    phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in cold_start.items())
+    pending = "dropped" if DROP_PENDING_UPDATES else "processed"
+    print(f"🟢 Bot is running{where}... (cold start {total:.2f}s: {phases}; pending updates {pending})")
+    if COLD_START_TARGET and total > COLD_START_TARGET:
+        print(f"⚠️ cold start {total:.2f}s is above COLD_START_TARGET ({COLD_START_TARGET:g}s)")
+
+
+async def run_webhook(bot: Bot, started: float):
+    from . import webhook
+
+    server = webhook.WebhookServer(dp, bot, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE)
+    await dp.emit_startup(bot=bot)
+    await server.start(WEBHOOK_HOST, WEBHOOK_PORT)
+    try:
+        if WEBHOOK_URL:
+            await bot.set_webhook(
+                WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET or None,
+                allowed_updates=dp.resolve_used_update_types(),
+                drop_pending_updates=DROP_PENDING_UPDATES,
+            )
+        cold_start["startup"] = time.perf_counter() - started
+        report_cold_start(f" (webhook on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH})")
+        await start_background(bot)
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+
+async def start_background(bot: Bot):
+    # چیزهایی که برای پاسخ به آپدیت‌ها لازم نیستند بعد از گزارش cold start بالا می‌آیند
+    if perf.enabled and METRICS_PORT:
+        try:
+            metrics_runner = await perf.serve(METRICS_HOST, METRICS_PORT)
+            dp.shutdown.register(metrics_runner.cleanup)
+        except OSError as e:
+            print(f"⚠️ metrics endpoint disabled: {e}")
+
+    if DDNS_PORT and DDNS_CLIENTS:
+        from . import ddns
+
+        try:
+            ddns_runner = await ddns.DDNSServer(DDNS_CLIENTS).start(DDNS_HOST, DDNS_PORT)
+            dp.shutdown.register(ddns_runner.cleanup)
+        except OSError as e:
+            print(f"⚠️ DDNS endpoint disabled: {e}")
+
+    sync_task = None
+    if SYNC_ENABLED:
+        from . import sync
+
+        sync_task = asyncio.create_task(sync.sync_worker(bot))
+
+    health_task = None
+    if TOKEN_CHECK_INTERVAL:
+        from . import health
+
+        health_task = asyncio.create_task(health.health_worker(bot))
+
+    async def stop_background():
+        for task in (sync_task, health_task):
+            if task is not None:
+                task.cancel()
+        # اسنپ‌شات ممکن است با /find هم باز شده باشد
+        await asyncio.to_thread(close_snapshot_store)
+        await asyncio.to_thread(close_history_store)
+        close_resolver_pool()
+
+    dp.shutdown.register(stop_background)
+
+
+async def main(boot_started: float | None = None):
+    # boot_started: لحظه شروع bot.py پیش از import ها، برای اندازه‌گیری زمان import
+    started = time.perf_counter()
+    if boot_started is not None:
+        cold_start["imports"] = started - boot_started
+    setup_routers()
+
+    started = time.perf_counter()
+    bot = create_bot()
+    await cf_client.start()
+    dp.shutdown.register(cf_client.close)
+    await persistent_store.start()
+    dp.shutdown.register(persistent_store.close)
+
+    if BOT_MODE == "webhook":
+        return await run_webhook(bot, started)
+
+    # بدون DROP_PENDING_UPDATES آپدیت‌هایی که هنگام خاموش بودن ربات رسیده‌اند پردازش می‌شوند
+    await bot.delete_webhook(drop_pending_updates=DROP_PENDING_UPDATES)
+    cold_start["startup"] = time.perf_counter() - started
+    report_cold_start("")
+    await start_background(bot)
+    await dp.start_polling(bot)
@@ -0,0 +1,79 @@
+# ==================== callback_data فشرده ====================
+# callback_data به شکل «prefix:arg:arg» ساخته می‌شود. هر روتر یک CallbackTable دارد که با یک فیلتر و یک
+# جستجوی دیکشنری آپدیت را به هندلر همان prefix می‌رساند، به‌جای زنجیره‌ای از فیلترهای startswith.
+# شناسه‌های بلند (زون/رکورد) در آرگومان‌ها با handle کوتاه سشن جایگزین می‌شوند (core.handle_for).
+import inspect
+
+from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+
+from .render import callback_state
+
+SEP = ":"
+MAX_BYTES = 64  # سقف تلگرام برای callback_data
+
+
+def pack(prefix: str, *args) -> str:
+    data = SEP.join((prefix, *map(str, args)))
+    if len(data.encode("utf-8")) > MAX_BYTES:
+        raise ValueError(f"callback_data longer than {MAX_BYTES} bytes: {data!r}")
+    return data
+
+
+def unpack(data: str | None) -> tuple[str, list[str]]:
+    prefix, _, rest = (data or "").partition(SEP)
+    return prefix, rest.split(SEP) if rest else []
+
+
+class CallbackTable:
+    # prefix ➜ (هندلر، تعداد آرگومان، state می‌خواهد یا نه)؛ prefix ها بین همه جدول‌ها یکتا هستند
+    _prefixes: dict[str, str] = {}
+
+    def __init__(self, router: Router):
+        self.name = router.name
+        self.handlers: dict[str, tuple] = {}
+        router.callback_query.register(self._dispatch, self._match)
+
+    def on(self, *prefixes: str):
+        def decorator(handler):
+            params = list(inspect.signature(handler).parameters.values())[1:]
+            wants_state = any(p.name == "state" for p in params)
+            arity = sum(1 for p in params if p.name != "state")
+            for prefix in prefixes:
+                owner = self._prefixes.setdefault(prefix, self.name)
+                if owner != self.name or prefix in self.handlers:
+                    raise ValueError(f"callback prefix {prefix!r} is already registered by {owner}")
+                self.handlers[prefix] = (handler, arity, wants_state)
+            return handler
+
+        return decorator
+
+    def _match(self, cb: CallbackQuery) -> dict | bool:
+        prefix, args = unpack(cb.data)
+        entry = self.handlers.get(prefix)
+        # دکمه‌ای با تعداد آرگومان اشتباه (مثلاً از نسخه قبلی ربات) به هندلر نمی‌رسد
+        if entry is None or len(args) != entry[1]:
+            return False
+        return {"cb_entry": entry, "cb_args": args}
+
+    async def _dispatch(self, cb: CallbackQuery, state: FSMContext, cb_entry: tuple, cb_args: list[str]):
+        handler, _, wants_state = cb_entry
+        message = (cb.message.chat.id, cb.message.message_id) if cb.message else None
+        pending = {"message": message, "answered": False, "edited": False}
+        token = callback_state.set(pending)
+        try:
+            if wants_state:
+                result = await handler(cb, *cb_args, state=state)
+            else:
+                result = await handler(cb, *cb_args)
+        finally:
+            callback_state.reset(token)
+        # ویرایش تکراری (یا هندلری که چیزی نفرستاده) چرخش دکمه را متوقف نمی‌کند
+        if not (pending["answered"] or pending["edited"]):
+            try:
+                await cb.answer()
+            except TelegramBadRequest:
+                pass
+        return result
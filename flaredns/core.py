@@ -0,0 +1,1200 @@
+# ==================== هسته مشترک ربات ====================
+# Dispatcher، سشن‌ها، اکانت‌ها و دسترسی، کلاینت Cloudflare و کش‌ها؛ روترهای handlers همه از این ماژول استفاده می‌کنند.
+import os
+import json
+import asyncio
+import functools
+import tempfile
+import time
+import random
+from datetime import datetime
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from aiohttp import ClientConnectionError, ClientConnectorError, ClientSession, ClientTimeout, TCPConnector
+from aiogram import Dispatcher
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from . import storage, metrics, render
+from .callbacks import pack
+from .settings import (
+    ACCOUNTS_FILE, ADMIN_ID, API_URL, ICONS, ACCOUNT_ACCESS, USERS,
+    CACHE_MAX_ENTRIES, CACHE_TTL, CF_BACKOFF_BASE, CF_BACKOFF_MAX, CF_DNS_CACHE_TTL, CF_KEEPALIVE_TIMEOUT,
+    CF_MAX_INFLIGHT, CF_MAX_RETRIES, CF_PAGE_CONCURRENCY, CF_POOL_LIMIT, CF_POOL_LIMIT_PER_HOST, CF_RATE_BURST,
+    CF_RATE_LIMIT, CF_RECORDS_PER_PAGE, CF_REQUEST_TIMEOUT, DNS_QUERY_TIMEOUT, FLOOD_WAIT_MAX, HISTORY_ENABLED,
+    HISTORY_FULL_EVERY, HISTORY_GROUP_WINDOW, HISTORY_MAX_VERSIONS, HISTORY_PATH, METRICS_ENABLED,
+    PROGRESS_EDIT_INTERVAL, SNAPSHOT_MAX_AGE, SNAPSHOT_PATH, STORAGE_BACKEND, STORAGE_FLUSH_INTERVAL, STORAGE_PATH,
+    SYNC_ENABLED, TOKEN_BREAKER_COOLDOWN, TOKEN_BREAKER_THRESHOLD, TOKEN_CHECK_TIMEOUT,
+)
+
+
+# ==================== متریک‌ها ====================
+perf = metrics.Registry(METRICS_ENABLED)
+perf.histogram("flaredns_cf_request_seconds", "Cloudflare API latency including retries", ("method", "endpoint"))
+perf.counter("flaredns_cf_errors_total", "Cloudflare API calls that failed", ("method", "endpoint", "kind"))
+perf.counter("flaredns_cf_retries_total", "Cloudflare API calls that were retried", ("method", "endpoint", "reason"))
+perf.histogram("flaredns_handler_seconds", "Telegram handler latency", ("kind", "prefix"))
+perf.histogram("flaredns_telegram_request_seconds", "Telegram Bot API latency", ("method",))
+perf.counter("flaredns_nav_cancelled_total", "Navigation handlers cancelled by a newer tap", ())
+perf.counter("flaredns_cf_deduplicated_total", "GET requests that joined an identical in-flight request", ("endpoint",))
+perf.counter("flaredns_snapshot_reads_total", "Zone/record lists served from the local snapshot", ("result",))
+
+# همه درخواست‌های تلگرام از این لایه عبور می‌کنند (create_bot آن را روی session ثبت می‌کند)
+renderer = render.MessageRenderer(PROGRESS_EDIT_INTERVAL, FLOOD_WAIT_MAX)
+perf.gauge("flaredns_telegram_edits", "Telegram edits avoided by the render layer", ("result",),
+           lambda: {("skipped",): renderer.skipped, ("coalesced",): renderer.coalesced,
+                    ("flood_wait",): renderer.flood_waits})
+
+
+# ==================== ذخیره‌سازی سشن و FSM ====================
+# کلیدهایی که مشتق‌شده یا موقتی‌اند و بعد از ری‌استارت دوباره ساخته می‌شوند
+_TRANSIENT_SESSION_KEYS = ("rec_index", "rec_view", "rec_markups", "import_plan", "restore_plan", "cb_rhandles")
+# لیست‌های کش‌شده که SessionStore جدا و فقط با تغییر version ذخیره می‌کند
+_LIST_SESSION_KEYS = ("zones", "records")
+
+
+def encode_session(session: dict) -> dict:
+    out = {
+        k: v for k, v in session.items() if k not in _TRANSIENT_SESSION_KEYS and k not in _LIST_SESSION_KEYS
+    }
+    if "rec_selected" in out:
+        out["rec_selected"] = list(out["rec_selected"])
+    return out
+
+
+def decode_session(user_id: int, data: dict) -> dict:
+    # سشن‌های قدیمی لیست‌ها را داخل خود سشن و با یک saved_at مشترک داشتند
+    legacy_saved_at = data.pop("saved_at", 0)
+    saved_at = {}
+    for key in _LIST_SESSION_KEYS:
+        stored = data.get(key)
+        if stored is None:
+            continue
+        if isinstance(stored, dict):
+            saved_at[key] = stored.get("saved_at", 0)
+            stored = stored.get("items") or []
+        else:
+            saved_at[key] = legacy_saved_at
+        data[key] = IndexedList(stored)
+    if "rec_selected" in data:
+        data["rec_selected"] = set(data["rec_selected"])
+
+    # اگر لیست‌ها هنوز تازه‌اند، کش زون‌ها/رکوردها را هم از آن‌ها پر می‌کنیم تا اولین کلیک بعد از ری‌استارت درخواست نزند
+    token = visible_accounts(user_id).get(data.get("active_acc") or "")
+    if token:
+        remaining = CACHE_TTL - (time.time() - saved_at.get("zones", 0))
+        if data.get("zones") is not None and remaining > 0:
+            cf_cache.set(("zones", token), data["zones"], ttl=remaining)
+        remaining = CACHE_TTL - (time.time() - saved_at.get("records", 0))
+        if data.get("records") is not None and data.get("curr_zone_id") and remaining > 0:
+            cf_cache.set(("records", token, data["curr_zone_id"]), data["records"], ttl=remaining)
+    return data
+
+
+persistent_store = storage.PersistentStore(
+    storage.make_backend(STORAGE_BACKEND, STORAGE_PATH), STORAGE_FLUSH_INTERVAL
+)
+dp = Dispatcher(storage=storage.PersistentFSMStorage(persistent_store))
+user_cache: dict[int, dict] = storage.SessionStore(
+    persistent_store, encode_session, decode_session, lists=_LIST_SESSION_KEYS
+)  # {user_id: {...}}
+
+
+# --- handle های کوتاه برای callback_data ---
+# شناسه 32 کاراکتری زون/رکورد به‌جای callback_data با یک شماره base36 کوتاه در دکمه می‌رود؛
+# جدول handle ها مثل acc_index_map در سشن کاربر ذخیره می‌شود و بعد از ری‌استارت هم معتبر می‌ماند.
+HANDLE_LIMIT = 2048
+_B36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def handle_for(user_id: int, value: str) -> str:
+    cache = user_cache.setdefault(user_id, {})
+    handles = cache.setdefault("cb_handles", {})
+    reverse = cache.get("cb_rhandles")
+    if reverse is None:
+        reverse = cache["cb_rhandles"] = {v: h for h, v in handles.items()}
+    h = reverse.get(value)
+    if h is not None:
+        return h
+
+    seq = cache.get("cb_seq", 0)
+    cache["cb_seq"] = seq + 1
+    h = ""
+    while True:
+        seq, rem = divmod(seq, 36)
+        h = _B36[rem] + h
+        if not seq:
+            break
+    handles[h] = value
+    reverse[value] = h
+    if len(handles) > HANDLE_LIMIT:
+        # قدیمی‌ترین handle کنار گذاشته می‌شود؛ کیبوردهای کش‌شده ممکن است به آن اشاره کنند
+        reverse.pop(handles.pop(next(iter(handles))), None)
+        cache.pop("rec_markups", None)
+    return h
+
+
+def resolve_handle(user_id: int, h: str) -> str | None:
+    return user_cache.get(user_id, {}).get("cb_handles", {}).get(h)
+
+
+def zone_cb(user_id: int, zone_id: str) -> str:
+    return pack("zone", handle_for(user_id, zone_id))
+
+
+# ==================== آیکون پروکسی ====================
+def get_proxy_icon(proxied: bool) -> str:
+    return ICONS["PROXIED"] if proxied else ICONS["DNS_ONLY"]
+
+
+# ==================== مدیریت فایل اکانت‌ها ====================
+class AccountStore:
+    # اکانت‌ها یک بار خوانده و در حافظه نگه داشته می‌شوند؛ فقط وقتی mtime فایل عوض شود
+    # (مثلاً ویرایش از طریق install.sh) دوباره خوانده می‌شود.
+    # نوشتن اتمیک است (فایل موقت + rename) و پشت یک قفل async انجام می‌شود.
+    def __init__(self, path: str):
+        self.path = path
+        self._data: dict[str, str] = {}
+        self._mtime: int | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _parse(data) -> dict:
+        if isinstance(data, dict):
+            return data
+        if isinstance(data, list):
+            return {
+                item["name"]: item["token"]
+                for item in data
+                if isinstance(item, dict) and "name" in item and "token" in item
+            }
+        return {}
+
+    def _write(self, data: dict) -> int:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".accounts-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return os.stat(self.path).st_mtime_ns
+
+    def get(self) -> dict:
+        # دیکشنری داخلی را برمی‌گرداند؛ فقط‌خواندنی است و نباید مستقیماً تغییر داده شود
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._data = {}
+            self._mtime = self._write({})
+            return self._data
+
+        if mtime != self._mtime:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = self._parse(json.load(f))
+            except Exception:
+                self._data = {}
+            self._mtime = mtime
+        return self._data
+
+    async def _update(self, mutate):
+        async with self._lock:
+            data = dict(self.get())
+            if not mutate(data):
+                return
+            mtime = await asyncio.to_thread(self._write, data)
+            self._data = data
+            self._mtime = mtime
+
+    async def set(self, name: str, token: str):
+        def mutate(data: dict) -> bool:
+            data[name] = token
+            return True
+
+        await self._update(mutate)
+
+    async def delete(self, name: str):
+        def mutate(data: dict) -> bool:
+            return data.pop(name, None) is not None
+
+        await self._update(mutate)
+
+
+accounts_store = AccountStore(ACCOUNTS_FILE)
+
+
+def load_accounts() -> dict:
+    return accounts_store.get()
+
+
+async def save_account(name: str, token: str):
+    await accounts_store.set(name, token)
+
+
+async def delete_account_from_file(name: str):
+    token = load_accounts().get(name)
+    await accounts_store.delete(name)
+    account_owners.drop(name)
+    if token:
+        forget_unused_token(token)
+
+
+def forget_unused_token(token: str):
+    # token_health فقط توکن‌های accounts.json را نگه می‌دارد؛ توکن رد شده در افزودن اکانت یا اکانت حذف‌شده پاک می‌شود
+    if token not in load_accounts().values():
+        token_health.forget(token)
+
+
+# --- کاربران و دسترسی به اکانت‌ها ---
+# ADMIN_ID همیشه admin است و بقیه از USERS می‌آیند. admin همه اکانت‌ها را می‌بیند؛
+# operator فقط اکانت‌هایی که خودش اضافه کرده یا در ACCOUNT_ACCESS برایش آمده‌اند.
+# کش‌ها و cf_client بر اساس توکن‌اند، پس کاربرانی که یک اکانت را می‌بینند درخواست‌ها را با هم شریک‌اند.
+ROLES: dict[int, str] = {int(uid): role for uid, role in USERS.items()}
+ROLES[ADMIN_ID] = "admin"
+
+
+def user_role(user_id: int) -> str | None:
+    return ROLES.get(user_id)
+
+
+def is_admin(user_id: int) -> bool:
+    return ROLES.get(user_id) == "admin"
+
+
+class AccountOwners:
+    # کاربرانی که هر اکانت را از داخل ربات اضافه کرده‌اند؛ در persistent_store نگه داشته می‌شود
+    KEY = "account_owners"
+
+    def __init__(self, store: storage.PersistentStore):
+        self.store = store
+        self._data: dict[str, list[int]] | None = None
+
+    def _get(self) -> dict[str, list[int]]:
+        if self._data is None:
+            self._data = self.store.get(self.KEY) or {}
+        return self._data
+
+    def owners(self, name: str) -> list[int]:
+        return self._get().get(name, [])
+
+    def add(self, name: str, user_id: int):
+        data = self._get()
+        if user_id not in data.setdefault(name, []):
+            data[name].append(user_id)
+            self.store.put(self.KEY, data)
+
+    def drop(self, name: str):
+        if self._get().pop(name, None) is not None:
+            self.store.put(self.KEY, self._data)
+
+
+account_owners = AccountOwners(persistent_store)
+
+
+def visible_accounts(user_id: int) -> dict:
+    accounts = load_accounts()
+    if is_admin(user_id):
+        return accounts
+    granted = ACCOUNT_ACCESS.get(user_id, ())
+    return {
+        name: token for name, token in accounts.items()
+        if name in granted or user_id in account_owners.owners(name)
+    }
+
+
+def can_manage_account(user_id: int, name: str) -> bool:
+    return is_admin(user_id) or user_id in account_owners.owners(name)
+
+
+def account_audience(name: str) -> list[int]:
+    # کاربرانی که این اکانت را می‌بینند (برای اعلان‌های sync)
+    return [uid for uid in ROLES if name in visible_accounts(uid)]
+
+
+async def access_middleware(handler, event, data):
+    # آپدیت کاربرانی که در ROLES نیستند بی‌صدا نادیده گرفته می‌شوند
+    if event.from_user is None or user_role(event.from_user.id) is None:
+        return None
+    return await handler(event, data)
+
+
+dp.message.outer_middleware(access_middleware)
+dp.callback_query.outer_middleware(access_middleware)
+
+
+def get_active_token(user_id: int) -> str | None:
+    cache = user_cache.setdefault(user_id, {})
+    active_name = cache.get("active_acc")
+    accounts = visible_accounts(user_id)
+
+    if active_name and active_name in accounts:
+        return accounts[active_name]
+
+    if active_name and active_name not in accounts:
+        cache["active_acc"] = None
+
+    if len(accounts) == 1:
+        only = next(iter(accounts.keys()))
+        cache["active_acc"] = only
+        return accounts[only]
+
+    return None
+
+
+# ==================== FSM ====================
+class AccountForm(StatesGroup):
+    name = State()
+    token = State()
+
+
+class RecordForm(StatesGroup):
+    type = State()
+    name = State()
+    content = State()
+    ttl = State()
+    proxied = State()
+
+
+class EditField(StatesGroup):
+    value = State()   # ویرایش تک‌فیلدی رکورد (نام/مقدار/TTL)
+
+
+class RecordSearch(StatesGroup):
+    query = State()   # فیلتر لیست رکوردها بر اساس نام/مقدار/نوع
+
+
+class BulkImport(StatesGroup):
+    file = State()    # انتظار برای فایل BIND یا CSV
+
+
+class HistoryQuery(StatesGroup):
+    value = State()   # دو شماره نسخه برای مقایسه یا زمان برای بازگردانی
+
+
+# ==================== UI کمکی ====================
+def header(title: str, user_id: int | None = None) -> str:
+    if user_id is not None:
+        acc_name = user_cache.get(user_id, {}).get("active_acc") or "انتخاب نشده"
+    else:
+        acc_name = "..."
+    return (
+        f"<b>☁️ Cloudflare Manager | {title}</b>\n"
+        f"👤 اکانت فعال: <code>{acc_name}</code>\n"
+        f"━━━━━━━━━━━━━━━━\n"
+    )
+
+
+# کیبوردهای ثابت یک بار ساخته و بین همه پیام‌ها و کاربران مشترک استفاده می‌شوند
+@functools.lru_cache(maxsize=512)
+def back_btn(target: str = "home", refresh: str | None = None):
+    kb = InlineKeyboardBuilder()
+    if refresh:
+        kb.button(text=f"{ICONS['REFRESH']} بروزرسانی", callback_data=refresh)
+    kb.button(text=f"{ICONS['BACK']} بازگشت", callback_data=target)
+    return kb.as_markup()
+
+
+# آخرین هندلر ناوبری هر کاربر؛ با کلیک تازه، دریافت قبلی که دیگر به کار نمی‌آید لغو می‌شود
+nav_tasks: dict[int, asyncio.Task] = {}
+
+
+def latest_only(handler):
+    # بدنه هندلر در یک task جدا اجرا می‌شود تا لغو آن به task پردازش آپدیت (یا worker وب‌هوک) نرسد.
+    # درخواست‌های GET مشترک (single-flight) با لغو یک کاربر قطع نمی‌شوند.
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        uid = args[0].from_user.id
+        prev = nav_tasks.get(uid)
+        if prev is not None and not prev.done() and prev is not asyncio.current_task():
+            prev.cancel()
+        task = nav_tasks[uid] = asyncio.create_task(handler(*args, **kwargs))
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if nav_tasks.get(uid) is task:
+                del nav_tasks[uid]
+        if task.cancelled():
+            perf.inc("flaredns_nav_cancelled_total", ())
+            return None
+        return task.result()
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def get_main_menu():
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['ZONES']} دامنه‌های من", callback_data="zones_list")
+    kb.button(text=f"{ICONS['ACCOUNTS']} مدیریت اکانت‌ها", callback_data="acc_manage")
+    kb.button(text=f"{ICONS['STATS']} آمار پیشرفته", callback_data="global_stats")
+    kb.button(text=f"{ICONS['HELP']} راهنما", callback_data="help")
+    kb.button(text=f"{ICONS['LOGOUT']} خروج / تغییر اکانت", callback_data="logout_action")
+    kb.adjust(2, 2, 1)
+    return kb.as_markup()
+
+
+# ==================== Cloudflare API ====================
+class TokenBucket:
+    # محدودکننده نرخ برای یک توکن API؛ Cloudflare برای هر توکن حدود 1200 درخواست در 5 دقیقه اجازه می‌دهد
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        # بعد از 429، همه درخواست‌های این توکن تا پایان Retry-After صبر می‌کنند
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self):
+        # قفل FIFO است؛ درخواست‌ها به ترتیب رسیدن نوبت می‌گیرند
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    delay = min(CF_BACKOFF_MAX, CF_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+# --- سلامت توکن‌ها و circuit breaker ---
+# آخرین نتیجه /user/tokens/verify هر توکن (وضعیت، انقضا و دسترسی‌ها) اینجا نگه داشته می‌شود؛ health.py آن را
+# هر TOKEN_CHECK_INTERVAL ثانیه برای همه توکن‌ها تازه می‌کند. breaker هر توکن با verify غیرفعال یا
+# TOKEN_BREAKER_THRESHOLD خطای احراز هویت پشت‌سرهم باز می‌شود و تا TOKEN_BREAKER_COOLDOWN ثانیه درخواست‌های
+# آن توکن بدون تماس با Cloudflare رد می‌شوند. بعد از آن یک درخواست آزمایشی عبور می‌کند (half-open):
+# موفقیتش breaker را می‌بندد و شکستش آن را یک cooldown دیگر باز نگه می‌دارد.
+VERIFY_ENDPOINT = "/user/tokens/verify"
+DEAD_TOKEN_STATUSES = ("invalid", "expired", "disabled")
+# کدهای خطای Cloudflare برای توکن نامعتبر/باطل‌شده (بعضی endpoint ها به جای 401، 400 یا 403 می‌دهند).
+# 9109/10000 عمداً اینجا نیستند: برای توکن سالمی که به یک زون یا endpoint دسترسی ندارد هم برمی‌گردند.
+_AUTH_ERROR_CODES = {1000, 6003, 6111, 9103, 9106}
+_SCOPES_TTL = 6 * 3600
+
+
+class TokenUnavailable(Exception):
+    pass
+
+
+class TokenHealth:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # توکن ➜ {"status", "checked_at", "expires_on", "scopes", "scopes_at", "error", "failures", "open_until"}
+        self._tokens: dict[str, dict] = {}
+        self.rejected = 0
+
+    @staticmethod
+    def _new_entry() -> dict:
+        return {
+            "status": "unknown", "checked_at": None, "expires_on": None, "scopes": None, "scopes_at": 0.0,
+            "error": None, "failures": 0, "open_until": None,
+        }
+
+    def get(self, token: str) -> dict:
+        # توکنی که هنوز بررسی نشده یک وضعیت unknown می‌گیرد، بدون اضافه شدن به جدول
+        return self._tokens.get(token) or self._new_entry()
+
+    def _entry(self, token: str) -> dict:
+        entry = self._tokens.get(token)
+        if entry is None:
+            entry = self._tokens[token] = self._new_entry()
+        return entry
+
+    def is_open(self, token: str) -> bool:
+        entry = self._tokens.get(token)
+        return entry is not None and entry["open_until"] is not None
+
+    def guard(self, token: str):
+        entry = self._tokens.get(token)
+        if entry is None or entry["open_until"] is None:
+            return
+        now = time.monotonic()
+        if now < entry["open_until"]:
+            self.rejected += 1
+            raise TokenUnavailable(describe_token_status(entry["status"]))
+        # half-open: همین درخواست آزمایشی است و بقیه تا نتیجه آن (حداکثر یک cooldown) رد می‌شوند
+        entry["open_until"] = now + self.cooldown
+
+    def _open(self, entry: dict, status: str):
+        entry["status"] = status
+        entry["open_until"] = time.monotonic() + self.cooldown
+
+    def observe(self, token: str, http_status: int, j: dict):
+        # نتیجه هر درخواست واقعی به Cloudflare
+        if _is_auth_error(http_status, j):
+            entry = self._entry(token)
+            entry["failures"] += 1
+            if entry["failures"] >= self.threshold or entry["open_until"] is not None:
+                self._open(entry, "invalid")
+            return
+        entry = self._tokens.get(token)
+        if entry is not None and (entry["failures"] or entry["open_until"] is not None):
+            # هر پاسخی جز خطای احراز هویت یعنی توکن هنوز پذیرفته می‌شود
+            entry["failures"] = 0
+            entry["open_until"] = None
+            if entry["status"] in DEAD_TOKEN_STATUSES:
+                entry["status"] = "active"
+
+    def record_verify(self, token: str, status: str, expires_on: float | None = None, error: str | None = None):
+        entry = self._entry(token)
+        entry["checked_at"] = time.time()
+        entry["error"] = error
+        if error is not None:
+            # Cloudflare در دسترس نبود؛ وضعیت قبلی توکن معتبر می‌ماند
+            return
+        entry["expires_on"] = expires_on
+        if status in DEAD_TOKEN_STATUSES:
+            entry["failures"] = max(entry["failures"], self.threshold)
+            self._open(entry, status)
+        else:
+            entry["status"] = status
+            entry["failures"] = 0
+            entry["open_until"] = None
+
+    def record_scopes(self, token: str, scopes: list[str] | None):
+        entry = self._entry(token)
+        entry["scopes"] = scopes
+        entry["scopes_at"] = time.time()
+
+    def forget(self, token: str):
+        self._tokens.pop(token, None)
+
+
+def _is_auth_error(http_status: int, j: dict) -> bool:
+    if http_status == 401:
+        return True
+    if http_status not in (400, 403):
+        return False
+    return any(e.get("code") in _AUTH_ERROR_CODES for e in j.get("errors") or () if isinstance(e, dict))
+
+
+def describe_token_status(status: str) -> str:
+    reason = {"expired": "منقضی شده", "disabled": "غیرفعال شده"}.get(status, "نامعتبر یا باطل شده")
+    return f"توکن این اکانت {reason} است؛ از «مدیریت اکانت‌ها» توکن تازه اضافه کنید."
+
+
+token_health = TokenHealth(TOKEN_BREAKER_THRESHOLD, TOKEN_BREAKER_COOLDOWN)
+perf.gauge("flaredns_token_status", "Accounts by the status of their token's last health check", ("status",),
+           lambda: Counter((token_health.get(t)["status"],) for t in load_accounts().values()))
+perf.gauge("flaredns_token_breaker_rejections", "Requests rejected instantly by an open token breaker", (),
+           lambda: {(): token_health.rejected})
+
+
+# یک ClientSession مشترک (connection pool + keep-alive) برای کل ربات؛ main() آن را باز و بسته می‌کند.
+# هر درخواست از token bucket همان توکن نوبت می‌گیرد، تعداد درخواست‌های هم‌زمان محدود است
+# و پاسخ‌های 429/5xx با backoff نمایی (به همراه jitter و احترام به Retry-After) دوباره ارسال می‌شوند.
+class CloudflareClient:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._session: ClientSession | None = None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._inflight = asyncio.Semaphore(CF_MAX_INFLIGHT)
+        self._flights: dict[tuple[str, str], asyncio.Task] = {}
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+        connector = TCPConnector(
+            limit=CF_POOL_LIMIT,
+            limit_per_host=CF_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=CF_DNS_CACHE_TTL,
+            keepalive_timeout=CF_KEEPALIVE_TIMEOUT,
+        )
+        self._session = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=CF_REQUEST_TIMEOUT),
+        )
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _bucket(self, token: str) -> TokenBucket:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = self._buckets[token] = TokenBucket(CF_RATE_LIMIT, CF_RATE_BURST)
+        return bucket
+
+    async def request(self, token: str, method: str, endpoint: str, data: dict | None = None) -> dict:
+        return (await self.request_with_status(token, method, endpoint, data))[1]
+
+    async def request_with_status(self, token: str, method: str, endpoint: str,
+                                  data: dict | None = None) -> tuple[int, dict]:
+        # خروجی: (کد HTTP پاسخ نهایی، JSON آن)
+        # GETهای هم‌زمان یکسان (همان توکن و endpoint) یک درخواست مشترک دارند (single-flight).
+        # shield باعث می‌شود لغو یکی از منتظرها درخواست را برای بقیه قطع نکند.
+        # توکنی که breaker آن باز است بلافاصله TokenUnavailable می‌دهد؛ verify خودش آزمون توکن است و رد نمی‌شود.
+        if endpoint != VERIFY_ENDPOINT:
+            token_health.guard(token)
+        if method != "GET":
+            return await self._request(token, method, endpoint, data)
+        key = (token, endpoint)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = asyncio.create_task(self._request(token, method, endpoint))
+            flight.add_done_callback(functools.partial(self._land, key))
+        elif perf.enabled:
+            perf.inc("flaredns_cf_deduplicated_total", (metrics.endpoint_template(endpoint),))
+        return await asyncio.shield(flight)
+
+    def _land(self, key: tuple[str, str], flight: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # اگر همه منتظرها لغو شده باشند، خطا بی‌صدا کنار گذاشته می‌شود
+
+    async def _request(self, token: str, method: str, endpoint: str, data: dict | None = None) -> tuple[int, dict]:
+        # اگر main() هنوز start نکرده باشد (مثلاً در اسکریپت‌ها) سشن را همین‌جا می‌سازیم
+        if self._session is None or self._session.closed:
+            await self.start()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        bucket = self._bucket(token)
+        labels = (method, metrics.endpoint_template(endpoint)) if perf.enabled else ()
+        started = time.perf_counter()
+        # POST (ساخت رکورد، batch) بعد از 5xx یا قطع اتصال وسط درخواست تکرار نمی‌شود، چون ممکن است
+        # Cloudflare آن را اعمال کرده باشد؛ 429 و اتصالی که اصلاً برقرار نشده همیشه امن‌اند.
+        idempotent = method != "POST"
+
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            retry_after = None
+            try:
+                async with self._inflight:
+                    async with self._session.request(
+                        method, self.base_url + endpoint, headers=headers, json=data
+                    ) as r:
+                        if (r.status == 429 or (r.status >= 500 and idempotent)) and attempt < CF_MAX_RETRIES:
+                            retry_after = r.headers.get("Retry-After")
+                            if r.status == 429:
+                                bucket.pause(_retry_delay(attempt, retry_after))
+                            perf.inc("flaredns_cf_retries_total", (*labels, str(r.status)))
+                        else:
+                            try:
+                                j = await r.json(content_type=None)
+                            except ValueError:
+                                j = {
+                                    "success": False,
+                                    "errors": [{"message": f"HTTP {r.status}"}],
+                                    "result": None,
+                                }
+                            token_health.observe(token, r.status, j)
+                            if perf.enabled:
+                                perf.observe("flaredns_cf_request_seconds", labels, time.perf_counter() - started)
+                                if r.status >= 400 or not j.get("success", True):
+                                    perf.inc("flaredns_cf_errors_total", (*labels, str(r.status)))
+                            return r.status, j
+            except ClientConnectionError as e:
+                if attempt >= CF_MAX_RETRIES or not (idempotent or isinstance(e, ClientConnectorError)):
+                    perf.inc("flaredns_cf_errors_total", (*labels, "connection"))
+                    raise
+                perf.inc("flaredns_cf_retries_total", (*labels, "connection"))
+
+            await asyncio.sleep(_retry_delay(attempt, retry_after))
+            attempt += 1
+
+
+cf_client = CloudflareClient(API_URL)
+
+
+class CloudflareError(Exception):
+    # Cloudflare پاسخ داد ولی success = false بود؛ status کد HTTP همان پاسخ است
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+async def cf_call(token: str, method: str, endpoint: str, data: dict | None = None) -> dict:
+    # پاسخ کامل (شامل result_info) را برمی‌گرداند و در صورت خطا Exception می‌دهد
+    status, j = await cf_client.request_with_status(token, method, endpoint, data)
+    if not j.get("success"):
+        msgs = [e.get("message") for e in j.get("errors", [])]
+        raise CloudflareError("\n".join(msgs) or "Cloudflare error", status)
+    return j
+
+
+async def cf_request(user_id: int, method: str, endpoint: str, data: dict | None = None):
+    token = get_active_token(user_id)
+    if not token:
+        raise Exception("NO_ACCOUNT_SELECTED")
+
+    j = await cf_call(token, method, endpoint, data)
+    return j["result"]
+
+
+async def verify_token(token: str) -> dict:
+    # وضعیت توکن را از /user/tokens/verify می‌خواند، در token_health ثبت می‌کند و همان را برمی‌گرداند.
+    # دسترسی‌ها از /user/tokens/{id} می‌آیند که خودش مجوز «API Tokens Read» می‌خواهد؛ بدون آن scopes = None می‌ماند.
+    try:
+        j = await asyncio.wait_for(cf_client.request(token, "GET", VERIFY_ENDPOINT), TOKEN_CHECK_TIMEOUT)
+    except Exception as e:
+        token_health.record_verify(token, "", error=str(e) or type(e).__name__)
+        return token_health.get(token)
+
+    result = j.get("result") or {}
+    if not j.get("success") or not result:
+        if not any(e.get("code") in _AUTH_ERROR_CODES for e in j.get("errors") or () if isinstance(e, dict)):
+            msgs = [e.get("message") for e in j.get("errors") or () if isinstance(e, dict)]
+            token_health.record_verify(token, "", error="\n".join(filter(None, msgs)) or "Cloudflare error")
+            return token_health.get(token)
+        token_health.record_verify(token, "invalid")
+        return token_health.get(token)
+
+    expires_on = None
+    if result.get("expires_on"):
+        try:
+            expires_on = datetime.fromisoformat(result["expires_on"].replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    token_health.record_verify(token, result.get("status") or "invalid", expires_on)
+
+    entry = token_health.get(token)
+    if entry["status"] == "active" and result.get("id") and time.time() - entry["scopes_at"] > _SCOPES_TTL:
+        scopes = None
+        try:
+            j = await asyncio.wait_for(cf_client.request(token, "GET", f"/user/tokens/{result['id']}"), TOKEN_CHECK_TIMEOUT)
+            if j.get("success"):
+                scopes = sorted({
+                    group["name"]
+                    for policy in (j.get("result") or {}).get("policies") or ()
+                    if policy.get("effect", "allow") == "allow"
+                    for group in policy.get("permission_groups") or ()
+                    if group.get("name")
+                })
+        except Exception:
+            pass
+        token_health.record_scopes(token, scopes)
+    return entry
+
+
+# --- صفحه‌بندی API ---
+class CFPages:
+    # async iterator روی صفحات یک endpoint لیستی:
+    # صفحه اول را می‌گیرد، از result_info تعداد صفحات را می‌خواند و بقیه را هم‌زمان درخواست می‌دهد.
+    # صفحات به ترتیب yield می‌شوند تا بتوان نتیجه را همان لحظه نمایش داد.
+    def __init__(self, token: str, endpoint: str, per_page: int):
+        self.token = token
+        self.endpoint = endpoint
+        self.per_page = per_page
+        self.total_pages: int | None = None
+        self.total_count: int | None = None
+
+    def _page_url(self, page: int) -> str:
+        sep = "&" if "?" in self.endpoint else "?"
+        return f"{self.endpoint}{sep}per_page={self.per_page}&page={page}"
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        first = await cf_call(self.token, "GET", self._page_url(1))
+        info = first.get("result_info") or {}
+        self.total_pages = info.get("total_pages") or 1
+        self.total_count = info.get("total_count", len(first["result"]))
+        yield first["result"]
+
+        if self.total_pages <= 1:
+            return
+
+        sem = asyncio.Semaphore(CF_PAGE_CONCURRENCY)
+
+        async def fetch(page: int) -> list:
+            async with sem:
+                j = await cf_call(self.token, "GET", self._page_url(page))
+                return j["result"]
+
+        tasks = [asyncio.create_task(fetch(p)) for p in range(2, self.total_pages + 1)]
+        try:
+            for t in tasks:
+                yield await t
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+async def cf_fetch_all(token: str, endpoint: str, per_page: int) -> list:
+    items = []
+    async for chunk in CFPages(token, endpoint, per_page):
+        items.extend(chunk)
+    return items
+
+
+# ==================== کش دامنه‌ها و رکوردها ====================
+class IndexedList(list):
+    # لیست زون‌ها/رکوردها به همراه ایندکس id → موقعیت، برای lookup و به‌روزرسانی O(1)
+    def __init__(self, items=()):
+        super().__init__(items)
+        self._pos = {item["id"]: i for i, item in enumerate(self)}
+        # با هر تغییر زیاد می‌شود تا کیبوردهای کش‌شده این لیست باطل شوند
+        self.version = 0
+
+    def extend(self, items):
+        self.version += 1
+        for item in items:
+            self._pos[item["id"]] = len(self)
+            super().append(item)
+
+    def get_by_id(self, item_id: str) -> dict | None:
+        i = self._pos.get(item_id)
+        return None if i is None else self[i]
+
+    def upsert(self, item: dict):
+        self.version += 1
+        i = self._pos.get(item["id"])
+        if i is None:
+            self._pos[item["id"]] = len(self)
+            super().append(item)
+        else:
+            self[i] = item
+
+    def remove_id(self, item_id: str):
+        i = self._pos.pop(item_id, None)
+        if i is None:
+            return
+        self.version += 1
+        del self[i]
+        for j in range(i, len(self)):
+            self._pos[self[j]["id"]] = j
+
+
+class TTLCache:
+    # کش LRU با زمان انقضا؛ کلیدها: ("zones", token) و ("records", token, zone_id)
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __contains__(self, key) -> bool:
+        # بررسی وجود بدون شمردن در hit/miss و بدون جابه‌جایی در LRU
+        item = self._data.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def set(self, key, value, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+
+cf_cache = TTLCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+perf.gauge("flaredns_cache_lookups", "cf_cache lookups since start", ("result",),
+           lambda: {("hit",): cf_cache.hits, ("miss",): cf_cache.misses})
+perf.gauge("flaredns_cache_hit_ratio", "cf_cache hit ratio since start", (), lambda: {(): cf_cache.hit_ratio()})
+perf.gauge("flaredns_cache_entries", "Entries currently in cf_cache", (), lambda: {(): len(cf_cache._data)})
+zone_generation: dict[str, int] = {}
+_snapshot_store = None
+
+
+def get_snapshot_store():
+    # پایگاه اسنپ‌شات (و ماژول snapshots) در اولین استفاده باز می‌شود، نه هنگام بالا آمدن ربات
+    global _snapshot_store
+    if _snapshot_store is None:
+        from . import snapshots
+
+        _snapshot_store = snapshots.SnapshotStore(SNAPSHOT_PATH)
+    return _snapshot_store
+
+
+def close_snapshot_store():
+    global _snapshot_store
+    if _snapshot_store is not None:
+        _snapshot_store.close()
+        _snapshot_store = None
+
+
+def snapshots_active() -> bool:
+    # بدون sync (و تا وقتی /find اسنپ‌شات را باز نکرده) اسنپ‌شاتی نیست که خوانده یا به‌روز شود
+    return SYNC_ENABLED or _snapshot_store is not None
+
+
+# تغییرات خود ربات روی هر زون که هنوز در اسنپ‌شات نوشته نشده‌اند؛ تغییرات یک عملیات (که بدون await پشت هم
+# می‌آیند) با یک تراکنش و در thread نوشته می‌شوند. sync تا خالی شدن این صف زون را بررسی نمی‌کند.
+snapshot_pending: dict[str, dict] = {}
+
+
+def snapshot_note(zone_id: str, rec: dict | None = None, deleted: str | None = None):
+    if not snapshots_active():
+        return
+    pending = snapshot_pending.get(zone_id)
+    if pending is None:
+        pending = snapshot_pending[zone_id] = {"upserts": {}, "deletes": set()}
+        asyncio.create_task(_flush_snapshot(zone_id))
+    if rec is not None:
+        pending["upserts"][rec["id"]] = rec
+        pending["deletes"].discard(rec["id"])
+    if deleted is not None:
+        pending["upserts"].pop(deleted, None)
+        pending["deletes"].add(deleted)
+
+
+async def _flush_snapshot(zone_id: str):
+    await asyncio.sleep(0)
+    pending = snapshot_pending[zone_id]
+    try:
+        await asyncio.to_thread(
+            get_snapshot_store().apply_changes, zone_id, list(pending["upserts"].values()), sorted(pending["deletes"])
+        )
+    except Exception as e:
+        print(f"⚠️ snapshot for zone {zone_id} failed: {e}")
+    finally:
+        del snapshot_pending[zone_id]
+
+
+_history_store = None
+
+
+def get_history_store():
+    global _history_store
+    if _history_store is None:
+        from . import history
+
+        _history_store = history.HistoryStore(HISTORY_PATH, HISTORY_FULL_EVERY, HISTORY_MAX_VERSIONS)
+    return _history_store
+
+
+def close_history_store():
+    global _history_store
+    if _history_store is not None:
+        _history_store.close()
+        _history_store = None
+
+
+_resolver_pool = None
+
+
+def get_resolver_pool():
+    # سوکت‌های resolver ها بین بررسی‌های انتشار مشترک‌اند؛ dnscheck هم فقط با اولین بررسی import می‌شود
+    global _resolver_pool
+    if _resolver_pool is None:
+        from . import dnscheck
+
+        _resolver_pool = dnscheck.ResolverPool(DNS_QUERY_TIMEOUT)
+    return _resolver_pool
+
+
+def close_resolver_pool():
+    global _resolver_pool
+    if _resolver_pool is not None:
+        _resolver_pool.close()
+        _resolver_pool = None
+
+
+def invalidate_record_views(user_id: int):
+    cache = user_cache.get(user_id, {})
+    cache.pop("rec_index", None)
+    cache.pop("rec_view", None)
+    cache.pop("rec_markups", None)
+
+
+def _cached_record_lists(user_id: int, zone_id: str) -> list[list]:
+    # لیست رکوردهای کش‌شده این زون و لیست داخل سشن کاربر (اگر شیء جداگانه‌ای باشد)
+    lists = []
+    token = get_active_token(user_id)
+    if token:
+        cached = cf_cache.get(("records", token, zone_id))
+        if cached is not None:
+            lists.append(cached)
+    cache = user_cache.get(user_id, {})
+    own = cache.get("records")
+    if own is not None and cache.get("curr_zone_id") == zone_id and all(own is not l for l in lists):
+        lists.append(own)
+    return lists
+
+
+def _bump_zone_generation(zone_id: str):
+    # sync پس‌زمینه با این شمارنده می‌فهمد ربات در حین دریافت رکوردها، زون را تغییر داده است
+    zone_generation[zone_id] = zone_generation.get(zone_id, 0) + 1
+
+
+# --- تاریخچه ---
+# تغییرات ربات روی هر زون HISTORY_GROUP_WINDOW ثانیه جمع و بعد یک‌جا به عنوان یک نسخه ثبت می‌شوند
+# (یک عملیات گروهی = یک نسخه). history_source برچسب نسخه را برای عملیات‌هایی مثل بازگردانی عوض می‌کند.
+history_source: ContextVar[str | None] = ContextVar("history_source", default=None)
+_history_pending: dict[str, dict] = {}
+
+
+def history_note(zone_id: str, token: str, source: str, rec: dict | None = None, deleted: str | None = None):
+    if not HISTORY_ENABLED:
+        return
+    source = history_source.get() or source
+    pending = _history_pending.get(zone_id)
+    if pending is None:
+        pending = _history_pending[zone_id] = {"token": token, "upserts": {}, "deletes": set(), "sources": []}
+        asyncio.create_task(_flush_history(zone_id))
+    if rec is not None:
+        pending["upserts"][rec["id"]] = rec
+        pending["deletes"].discard(rec["id"])
+    if deleted is not None:
+        pending["upserts"].pop(deleted, None)
+        pending["deletes"].add(deleted)
+    if source not in pending["sources"]:
+        pending["sources"].append(source)
+
+
+async def _flush_history(zone_id: str):
+    await asyncio.sleep(HISTORY_GROUP_WINDOW)
+    pending = _history_pending.pop(zone_id)
+    # اگر زون هنوز نسخه‌ای ندارد، لیست کش‌شده (که این تغییرات را دارد) نسخه اول می‌شود
+    cached = cf_cache.get(("records", pending["token"], zone_id))
+    try:
+        await asyncio.to_thread(
+            get_history_store().record_changes, zone_id, list(pending["upserts"].values()),
+            sorted(pending["deletes"]), ", ".join(pending["sources"]), list(cached) if cached is not None else None,
+        )
+    except Exception as e:
+        print(f"⚠️ history for zone {zone_id} failed: {e}")
+
+
+async def history_record(zone_id: str, records: list, source: str):
+    # وضعیت کامل زون (خوانده‌شده از API)؛ اگر با آخرین نسخه فرق کند، تغییرات بیرون از ربات نسخه می‌شوند
+    if not HISTORY_ENABLED or zone_id in _history_pending:
+        # تغییرات ثبت‌نشده خود ربات روی این زون با همان برچسب خودشان نسخه می‌شوند
+        return
+    try:
+        await asyncio.to_thread(get_history_store().record, zone_id, list(records), source)
+    except Exception as e:
+        print(f"⚠️ history for zone {zone_id} failed: {e}")
+
+
+def cache_record_upsert(user_id: int, zone_id: str, rec: dict):
+    invalidate_record_views(user_id)
+    for records in _cached_record_lists(user_id, zone_id):
+        records.upsert(rec)
+    _bump_zone_generation(zone_id)
+    snapshot_note(zone_id, rec=rec)
+    history_note(zone_id, get_active_token(user_id), f"user:{user_id}", rec=rec)
+
+
+def cache_token_record_upsert(token: str, zone_id: str, rec: dict, source: str = "ddns"):
+    # برای تغییری که بیرون از چت اعمال شده (DDNS)؛ کاربری نیست که نماهای سشنش باطل شود
+    cached = cf_cache.get(("records", token, zone_id))
+    if cached is not None:
+        cached.upsert(rec)
+    _bump_zone_generation(zone_id)
+    snapshot_note(zone_id, rec=rec)
+    history_note(zone_id, token, source, rec=rec)
+
+
+def cache_record_remove(user_id: int, zone_id: str, rid: str):
+    invalidate_record_views(user_id)
+    for records in _cached_record_lists(user_id, zone_id):
+        records.remove_id(rid)
+    _bump_zone_generation(zone_id)
+    snapshot_note(zone_id, deleted=rid)
+    history_note(zone_id, get_active_token(user_id), f"user:{user_id}", deleted=rid)
+
+
+async def snapshot_zones(account: str | None, token: str) -> IndexedList | None:
+    # اگر sync پس‌زمینه به‌تازگی این اکانت را گرفته باشد، بدون درخواست به API از اسنپ‌شات می‌خوانیم
+    if not account or not snapshots_active():
+        return None
+    zones, synced_at = await asyncio.to_thread(get_snapshot_store().zones_for, account)
+    if synced_at is None or time.time() - synced_at > SNAPSHOT_MAX_AGE:
+        perf.inc("flaredns_snapshot_reads_total", ("miss",))
+        return None
+    perf.inc("flaredns_snapshot_reads_total", ("hit",))
+    zones = IndexedList(zones)
+    cf_cache.set(("zones", token), zones)
+    return zones
+
+
+async def snapshot_zone_records(token: str, zone_id: str) -> IndexedList | None:
+    if not snapshots_active():
+        return None
+    records, synced_at = await asyncio.to_thread(get_snapshot_store().records_for, zone_id)
+    if synced_at is None or time.time() - synced_at > SNAPSHOT_MAX_AGE:
+        perf.inc("flaredns_snapshot_reads_total", ("miss",))
+        return None
+    perf.inc("flaredns_snapshot_reads_total", ("hit",))
+    records = IndexedList(records)
+    cf_cache.set(("records", token, zone_id), records)
+    return records
+
+
+async def load_zone_records(token: str, zone_id: str, force: bool = False) -> IndexedList:
+    records = None
+    if not force:
+        records = cf_cache.get(("records", token, zone_id))
+        if records is not None:
+            return records
+        records = await snapshot_zone_records(token, zone_id)
+    if records is None:
+        records = IndexedList(await cf_fetch_all(token, f"/zones/{zone_id}/dns_records", CF_RECORDS_PER_PAGE))
+        cf_cache.set(("records", token, zone_id), records)
+    # نسخه پایه قبل از اولین ویرایش؛ اگر چیزی عوض نشده باشد نسخه‌ای ثبت نمی‌شود
+    await history_record(zone_id, records, "load")
+    return records
+
+
+def get_cached_record(user_id: int, rid: str) -> dict | None:
+    records = user_cache.get(user_id, {}).get("records")
+    return records.get_by_id(rid) if records is not None else None
+
+
+# کاربر ➜ (دامنه‌های رسیده تا این لحظه، تعداد کل) وقتی لیست دامنه‌ها هنوز صفحه‌به‌صفحه در حال دریافت است؛
+# لیست نیمه‌کاره عمداً در سشن و cf_cache نمی‌نشیند
+zones_loading: dict[int, tuple["IndexedList", int]] = {}
+
+
+def get_cached_zone(user_id: int, zone_id: str) -> dict | None:
+    loading = zones_loading.get(user_id)
+    if loading is not None:
+        zone = loading[0].get_by_id(zone_id)
+        if zone is not None:
+            return zone
+    zones = user_cache.get(user_id, {}).get("zones")
+    return zones.get_by_id(zone_id) if zones is not None else None
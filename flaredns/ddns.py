@@ -0,0 +1,235 @@
+# ==================== DDNS ====================
+# سرور HTTP سبک کنار ربات برای به‌روزرسانی A/AAAA با پروتکل dyndns2 (ddclient، inadyn، اکثر روترها):
+#   GET /nic/update?hostname=home.example.com[,vpn.example.com]&myip=1.2.3.4
+# کلید کلاینت با Basic auth (رمز)، هدر «Authorization: Bearer» یا پارامتر key فرستاده می‌شود.
+# هر کلید به یک اکانت از accounts.json و الگوهای نام مجاز (DDNS_CLIENTS) بسته است.
+# نام ➜ رکورد از یک ایندکس کش‌شده برای هر زون خوانده می‌شود؛ اگر IP تغییری نکرده باشد هیچ درخواستی به
+# Cloudflare نمی‌رود و به‌روزرسانی‌های پشت‌سرهم یک نام در DDNS_COALESCE ثانیه به یک PATCH تبدیل می‌شوند.
+import time
+import asyncio
+import base64
+import hashlib
+import ipaddress
+from fnmatch import fnmatch
+
+from aiohttp import web
+
+from .settings import CF_ZONES_PER_PAGE, DDNS_COALESCE, DDNS_INDEX_TTL, DDNS_TRUST_FORWARDED
+from .core import (
+    IndexedList, cache_token_record_upsert, cf_cache, cf_call, cf_fetch_all, load_accounts, load_zone_records, perf,
+    snapshot_zones, zone_generation,
+)
+
+perf.counter("flaredns_ddns_requests_total", "DDNS hostname updates by dyndns2 result", ("result",))
+perf.counter("flaredns_ddns_writes_total", "Cloudflare writes issued by DDNS updates", ("result",))
+
+
+def _key_digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode()).digest()
+
+
+class DDNSServer:
+    def __init__(self, clients: dict, coalesce: float = DDNS_COALESCE, index_ttl: float = DDNS_INDEX_TTL,
+                 trust_forwarded: bool = DDNS_TRUST_FORWARDED):
+        # کلیدها فقط به شکل hash نگه داشته می‌شوند و جستجو هم با hash است، نه مقایسه رشته‌ای کلید
+        self.clients = {
+            _key_digest(key): {"account": c["account"], "names": [n.lower().rstrip(".") for n in c["names"]]}
+            for key, c in clients.items()
+        }
+        self.coalesce = coalesce
+        self.index_ttl = index_ttl
+        self.trust_forwarded = trust_forwarded
+        # (توکن، zone_id) ➜ {"expires", "generation", "names": {(نام، نوع): [رکورد، ...]}}
+        self._zones: dict[tuple[str, str], dict] = {}
+        self._building: dict[tuple[str, str], asyncio.Task] = {}
+        # (توکن، نام، نوع) ➜ {"content", "future"}: آخرین IP یک burst که هنوز نوشته نشده
+        self._pending: dict[tuple[str, str, str], dict] = {}
+        self._writing: dict[tuple[str, str, str], dict] = {}
+        self.coalesced = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("GET", "/nic/update", self.handle_update)
+        app.router.add_route("POST", "/nic/update", self.handle_update)
+        return app
+
+    async def start(self, host: str, port: int) -> web.AppRunner:
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    # --- درخواست HTTP ---
+    def _client(self, request: web.Request) -> dict | None:
+        key = request.query.get("key", "")
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            key = auth[7:].strip()
+        elif auth.startswith("Basic "):
+            try:
+                key = base64.b64decode(auth[6:]).decode().partition(":")[2]
+            except ValueError:
+                return None
+        return self.clients.get(_key_digest(key)) if key else None
+
+    def _caller_ip(self, request: web.Request) -> str:
+        forwarded = request.headers.get("X-Forwarded-For") if self.trust_forwarded else None
+        return forwarded.split(",")[0].strip() if forwarded else (request.remote or "")
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        client = self._client(request)
+        if client is None:
+            perf.inc("flaredns_ddns_requests_total", ("badauth",))
+            return web.Response(text="badauth", status=401, headers={"WWW-Authenticate": 'Basic realm="flaredns"'})
+
+        names = [n.strip().lower().rstrip(".") for n in request.query.get("hostname", "").split(",") if n.strip()]
+        if not names:
+            perf.inc("flaredns_ddns_requests_total", ("notfqdn",))
+            return web.Response(text="notfqdn")
+        try:
+            ip = ipaddress.ip_address(request.query.get("myip") or self._caller_ip(request))
+        except ValueError:
+            perf.inc("flaredns_ddns_requests_total", ("badip",))
+            return web.Response(text="badip", status=400)
+
+        rtype = "A" if ip.version == 4 else "AAAA"
+        results = await asyncio.gather(*(self.update(client, name, rtype, str(ip)) for name in names))
+        return web.Response(text="\n".join(results))
+
+    # --- به‌روزرسانی ---
+    async def update(self, client: dict, name: str, rtype: str, content: str) -> str:
+        code = await self._update(client, name, rtype, content)
+        perf.inc("flaredns_ddns_requests_total", (code.split(" ")[0],))
+        return code
+
+    async def _update(self, client: dict, name: str, rtype: str, content: str) -> str:
+        if not any(fnmatch(name, pattern) for pattern in client["names"]):
+            return "nohost"
+        token = load_accounts().get(client["account"])
+        if not token:
+            return "badauth"
+
+        try:
+            zone_id, matches = await self.lookup(client["account"], token, name, rtype)
+        except Exception as e:
+            print(f"⚠️ ddns lookup {name} failed: {e}")
+            return "911"
+        if not matches:
+            return "nohost"
+        if len(matches) > 1:
+            return "numhost"
+        rec = matches[0]
+
+        key = (token, name, rtype)
+        pending = self._pending.get(key)
+        if pending is None:
+            # IP ای که همین حالا در حال نوشتن است هم «مقدار فعلی» حساب می‌شود
+            writing = self._writing.get(key)
+            if _same_ip(writing["content"] if writing else rec["content"], content):
+                if writing is None:
+                    return f"nochg {content}"
+                pending = writing
+            else:
+                loop = asyncio.get_running_loop()
+                pending = self._pending[key] = {"content": content, "future": loop.create_future()}
+                pending["future"].add_done_callback(lambda f: f.cancelled() or f.exception())
+                pending["task"] = asyncio.create_task(self._write(key, zone_id, rec["id"], pending))
+        else:
+            # فقط آخرین IP این burst نوشته می‌شود
+            pending["content"] = content
+            self.coalesced += 1
+
+        try:
+            written = await asyncio.shield(pending["future"])
+        except Exception:
+            return "911"
+        return f"good {written}"
+
+    async def _write(self, key: tuple, zone_id: str, rid: str, pending: dict):
+        token, name, rtype = key
+        await asyncio.sleep(self.coalesce)
+        del self._pending[key]
+        # نوشتن‌های یک نام به ترتیب انجام می‌شوند
+        previous = self._writing.get(key)
+        self._writing[key] = pending
+        content = pending["content"]
+        try:
+            if previous is not None:
+                await asyncio.wait([previous["future"]])
+                if not previous["future"].exception() and _same_ip(previous["content"], content):
+                    pending["future"].set_result(content)
+                    return
+            j = await cf_call(token, "PATCH", f"/zones/{zone_id}/dns_records/{rid}", {"content": content})
+            rec = j["result"]
+            cache_token_record_upsert(token, zone_id, rec)
+            index = self._zones.get((token, zone_id))
+            if index is not None:
+                # تغییر خود ما ایندکس را باطل نمی‌کند؛ فقط همان رکورد جایگزین می‌شود
+                index["generation"] = zone_generation.get(zone_id, 0)
+                matches = index["names"].get((name, rtype), [])
+                index["names"][(name, rtype)] = [rec if r["id"] == rid else r for r in matches]
+            perf.inc("flaredns_ddns_writes_total", ("ok",))
+            pending["future"].set_result(content)
+        except Exception as e:
+            print(f"⚠️ ddns update {name} failed: {e}")
+            perf.inc("flaredns_ddns_writes_total", ("error",))
+            pending["future"].set_exception(e)
+        finally:
+            if self._writing.get(key) is pending:
+                del self._writing[key]
+
+    # --- ایندکس نام ➜ رکورد ---
+    async def _account_zones(self, account: str, token: str) -> list:
+        zones = cf_cache.get(("zones", token))
+        if zones is None:
+            zones = await snapshot_zones(account, token)
+        if zones is None:
+            zones = IndexedList(await cf_fetch_all(token, "/zones", CF_ZONES_PER_PAGE))
+            cf_cache.set(("zones", token), zones)
+        return zones
+
+    async def lookup(self, account: str, token: str, name: str, rtype: str) -> tuple[str | None, list[dict]]:
+        # طولانی‌ترین زونی که نام زیرمجموعه آن است
+        zone = max(
+            (z for z in await self._account_zones(account, token) if name == z["name"] or name.endswith("." + z["name"])),
+            key=lambda z: len(z["name"]),
+            default=None,
+        )
+        if zone is None:
+            return None, []
+        index = await self._zone_index(token, zone["id"])
+        return zone["id"], index["names"].get((name, rtype), [])
+
+    async def _zone_index(self, token: str, zone_id: str) -> dict:
+        key = (token, zone_id)
+        index = self._zones.get(key)
+        if index is not None and index["expires"] > time.monotonic() and \
+                index["generation"] == zone_generation.get(zone_id, 0):
+            return index
+        # پینگ‌های هم‌زمان یک زون فقط یک بار رکوردها را می‌خوانند
+        task = self._building.get(key)
+        if task is None:
+            # بعد از TTL مستقیم از API خوانده می‌شود تا تغییرات بیرون از ربات هم دیده شوند؛
+            # اگر فقط ربات زون را تغییر داده باشد، کش رکوردها خودش به‌روز است
+            expired = index is None or index["expires"] <= time.monotonic()
+            task = self._building[key] = asyncio.create_task(self._build_index(token, zone_id, expired))
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _build_index(self, token: str, zone_id: str, force: bool) -> dict:
+        generation = zone_generation.get(zone_id, 0)
+        records = await load_zone_records(token, zone_id, force=force)
+        names: dict[tuple[str, str], list[dict]] = {}
+        for r in records:
+            if r["type"] in ("A", "AAAA"):
+                names.setdefault((r["name"].lower(), r["type"]), []).append(r)
+        index = {"expires": time.monotonic() + self.index_ttl, "generation": generation, "names": names}
+        self._zones[(token, zone_id)] = index
+        return index
+
+
+def _same_ip(a: str, b: str) -> bool:
+    try:
+        return ipaddress.ip_address(a) == ipaddress.ip_address(b)
+    except ValueError:
+        return a == b
@@ -0,0 +1,223 @@
+# ==================== بررسی انتشار DNS ====================
+# کلاینت DNS روی UDP و کاملاً async (بدون thread و بدون وابستگی خارجی) برای پرسیدن یک رکورد از چند resolver.
+# ResolverPool برای هر resolver یک سوکت باز نگه می‌دارد و پاسخ‌ها را با شناسه پرس‌وجو به درخواست‌ها می‌رساند.
+# آدرس resolver ها «host» یا «host:port» (IPv6 به شکل «[::1]:5353») است تا بتوان یک DNS محلی آزمایشی گذاشت.
+import asyncio
+import random
+import socket
+import struct
+import time
+from typing import Callable
+
+QTYPES = {"A": 1, "NS": 2, "CNAME": 5, "MX": 15, "TXT": 16, "AAAA": 28}
+RCODES = {0: "ok", 2: "SERVFAIL", 3: "NXDOMAIN", 5: "REFUSED"}
+_EDNS_PAYLOAD = 1232
+
+
+def parse_addr(addr: str) -> tuple[str, int]:
+    if addr.startswith("["):
+        host, _, port = addr[1:].partition("]")
+        return host, int(port.lstrip(":") or 53)
+    if addr.count(":") == 1:
+        host, port = addr.split(":")
+        return host, int(port)
+    return addr, 53
+
+
+def build_query(qid: int, name: str, qtype: str) -> bytes:
+    # RD=1 و یک رکورد OPT (EDNS0) تا پاسخ‌های TXT بزرگ کمتر truncate شوند
+    packet = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 1)
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("idna")
+        packet += bytes((len(raw),)) + raw
+    packet += b"\x00" + struct.pack("!HH", QTYPES[qtype], 1)
+    return packet + b"\x00" + struct.pack("!HHIH", 41, _EDNS_PAYLOAD, 0, 0)
+
+
+def _read_name(data: bytes, offset: int) -> tuple[str, int]:
+    labels = []
+    end = None
+    for _ in range(128):  # جلوگیری از حلقه در اشاره‌گرهای فشرده‌سازی خراب
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    return ".".join(labels).lower(), end if end is not None else offset
+
+
+def parse_response(data: bytes, qtype: str) -> tuple[str, list[str]]:
+    _, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    status = RCODES.get(flags & 0x0F, f"rcode {flags & 0x0F}")
+    offset = 12
+    for _ in range(qdcount):
+        offset = _read_name(data, offset)[1] + 4
+
+    want = QTYPES[qtype]
+    answers = []
+    for _ in range(ancount):
+        offset = _read_name(data, offset)[1]
+        rtype, _, _, rdlen = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + rdlen]
+        if rtype == want:
+            if rtype == 1:
+                answers.append(socket.inet_ntop(socket.AF_INET, rdata))
+            elif rtype == 28:
+                answers.append(socket.inet_ntop(socket.AF_INET6, rdata))
+            elif rtype in (2, 5):
+                answers.append(_read_name(data, offset)[0])
+            elif rtype == 15:
+                answers.append(f"{struct.unpack('!H', rdata[:2])[0]} {_read_name(data, offset + 2)[0]}")
+            elif rtype == 16:
+                parts, i = [], 0
+                while i < len(rdata):
+                    parts.append(rdata[i + 1:i + 1 + rdata[i]].decode("utf-8", "replace"))
+                    i += 1 + rdata[i]
+                answers.append("".join(parts))
+        offset += rdlen
+    if status == "ok" and flags & 0x0200 and not answers:
+        status = "truncated"
+    return status, answers
+
+
+class _Endpoint(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.pending: dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) < 12:
+            return
+        fut = self.pending.pop(struct.unpack("!H", data[:2])[0], None)
+        if fut is not None and not fut.done():
+            fut.set_result(data)
+
+    def error_received(self, exc):
+        # مثلاً ICMP port unreachable وقتی DNS محلی بالا نیست
+        for fut in self.pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+        self.pending.clear()
+
+    def connection_lost(self, exc):
+        self.error_received(exc or ConnectionError("resolver socket closed"))
+
+
+class ResolverPool:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._endpoints: dict[str, _Endpoint] = {}
+        self._opening: dict[str, asyncio.Future] = {}
+
+    async def _endpoint(self, addr: str) -> _Endpoint:
+        ep = self._endpoints.get(addr)
+        if ep is not None and ep.transport is not None and not ep.transport.is_closing():
+            return ep
+        # چند پرس‌وجوی هم‌زمان فقط یک سوکت برای هر resolver باز می‌کنند
+        opening = self._opening.get(addr)
+        if opening is None:
+            opening = self._opening[addr] = asyncio.ensure_future(
+                asyncio.get_running_loop().create_datagram_endpoint(_Endpoint, remote_addr=parse_addr(addr))
+            )
+        try:
+            _, ep = await asyncio.shield(opening)
+        finally:
+            if self._opening.get(addr) is opening and opening.done():
+                del self._opening[addr]
+        self._endpoints[addr] = ep
+        return ep
+
+    async def query(self, addr: str, name: str, qtype: str) -> tuple[str, list[str]]:
+        try:
+            ep = await self._endpoint(addr)
+        except OSError as e:
+            return f"error: {e.strerror or e}", []
+        qid = random.randrange(1 << 16)
+        while qid in ep.pending:
+            qid = random.randrange(1 << 16)
+        fut = ep.pending[qid] = asyncio.get_running_loop().create_future()
+        try:
+            ep.transport.sendto(build_query(qid, name, qtype))
+            data = await asyncio.wait_for(fut, self.timeout)
+        except asyncio.TimeoutError:
+            return "timeout", []
+        except OSError as e:
+            return f"error: {e.strerror or e}", []
+        finally:
+            if ep.pending.get(qid) is fut:
+                del ep.pending[qid]
+        try:
+            return parse_response(data, qtype)
+        except (struct.error, IndexError, ValueError):
+            return "malformed", []
+
+    def close(self):
+        for ep in self._endpoints.values():
+            if ep.transport is not None:
+                ep.transport.close()
+        self._endpoints.clear()
+
+
+# --- مقایسه با رکورد Cloudflare ---
+def _normalize(qtype: str, value: str) -> str:
+    value = value.strip()
+    if qtype == "TXT":
+        # Cloudflare محتوای TXT را ممکن است به شکل چند رشته داخل "" نگه دارد
+        return "".join(p for i, p in enumerate(value.split('"')) if i % 2) if '"' in value else value
+    if qtype in ("A", "AAAA"):
+        return value.lower()
+    return value.lower().rstrip(".")
+
+
+def lookup_for(record: dict) -> tuple[str, str, set[str] | None]:
+    # (نام، نوع پرس‌وجو، پاسخ‌های مورد انتظار). رکورد proxied با IP های Cloudflare پاسخ داده می‌شود،
+    # پس برای آن فقط resolve شدن نام بررسی می‌شود (expected = None).
+    rtype = record["type"]
+    if record.get("proxied"):
+        return record["name"], "AAAA" if rtype == "AAAA" else "A", None
+    content = record["content"]
+    if rtype == "MX":
+        content = f"{record.get('priority', 10)} {content}"
+    return record["name"], rtype, {_normalize(rtype, content)}
+
+
+def is_live(qtype: str, expected: set[str] | None, status: str, answers: list[str]) -> bool:
+    if status != "ok" or not answers:
+        return False
+    return expected is None or expected <= {_normalize(qtype, a) for a in answers}
+
+
+async def watch(pool: ResolverPool, resolvers: dict[str, str], record: dict, interval: float, timeout: float,
+                on_update: Callable[[dict, int], None]) -> tuple[dict, int, bool]:
+    # همه resolver ها هم‌زمان پرسیده می‌شوند؛ resolver هایی که هنوز مقدار جدید را ندارند
+    # هر interval ثانیه دوباره پرسیده می‌شوند تا همه هم‌گرا شوند یا timeout برسد.
+    # results: {نام resolver: (وضعیت، پاسخ‌ها، زنده است؟)}؛ on_update بعد از هر پاسخ صدا زده می‌شود.
+    name, qtype, expected = lookup_for(record)
+    results: dict[str, tuple[str, list[str], bool]] = {label: ("…", [], False) for label in resolvers}
+    deadline = time.monotonic() + timeout
+    rounds = 0
+
+    async def ask(label: str, addr: str):
+        status, answers = await pool.query(addr, name, qtype)
+        results[label] = (status, answers, is_live(qtype, expected, status, answers))
+        on_update(results, rounds)
+
+    while True:
+        rounds += 1
+        waiting = {label: addr for label, addr in resolvers.items() if not results[label][2]}
+        await asyncio.gather(*(ask(label, addr) for label, addr in waiting.items()))
+        if all(r[2] for r in results.values()):
+            return results, rounds, True
+        if time.monotonic() + interval > deadline:
+            return results, rounds, False
+        await asyncio.sleep(interval)
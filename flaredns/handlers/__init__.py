@@ -0,0 +1,26 @@
+# ==================== روترها ====================
+# هر بخش رابط کاربری Router خودش را دارد. import شدن این پکیج هیچ روتری را بارگذاری نمی‌کند؛
+# include_routers ماژول‌ها را به ترتیب ROUTERS وارد و روی Dispatcher ثبت می‌کند (ترتیب = اولویت فیلترها).
+import importlib
+
+from aiogram import Dispatcher, Router
+from aiogram.types import CallbackQuery
+
+ROUTERS = ("accounts", "stats", "zones", "records", "history", "find")
+
+# بعد از همه روترها: دکمه‌ای که هیچ جدولی آن را نشناسد (مثلاً کیبوردی از نسخه قبلی ربات)
+fallback = Router(name="fallback")
+
+
+@fallback.callback_query()
+async def stale_callback(cb: CallbackQuery):
+    await cb.answer("⌛ این دکمه دیگر معتبر نیست؛ منو را دوباره باز کنید.", show_alert=True)
+
+
+def include_routers(dp: Dispatcher, names: tuple[str, ...] = ROUTERS):
+    for name in names:
+        router = importlib.import_module(f"{__name__}.{name}").router
+        if router.parent_router is None:
+            dp.include_router(router)
+    if fallback.parent_router is None:
+        dp.include_router(fallback)
@@ -0,0 +1,315 @@
+# ==================== روتر اکانت‌ها ====================
+# /start، منوی اصلی، راهنما، افزودن/انتخاب/حذف اکانت و وضعیت سلامت توکن‌ها
+import html
+import time
+from aiogram import Router
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..callbacks import CallbackTable, pack
+from ..settings import ICONS, TOKEN_EXPIRY_WARNING
+from ..core import (
+    DEAD_TOKEN_STATUSES, AccountForm, account_owners, back_btn, can_manage_account, delete_account_from_file,
+    forget_unused_token, get_active_token, get_main_menu, header, latest_only, load_accounts, save_account,
+    token_health, user_cache, verify_token, visible_accounts,
+)
+
+router = Router(name="accounts")
+callbacks = CallbackTable(router)
+
+
+# ==================== /start ====================
+@router.message(Command("start"))
+async def cmd_start(m: Message, state: FSMContext):
+    await state.clear()
+    user_cache.setdefault(m.from_user.id, {})
+
+    accounts = visible_accounts(m.from_user.id)
+    if not accounts:
+        kb = InlineKeyboardBuilder()
+        kb.button(text=f"{ICONS['ADD']} افزودن اولین اکانت", callback_data="acc_add")
+        kb.button(text="🎓 آموزش دریافت توکن", callback_data="tutorial")
+        kb.adjust(1)
+        await m.answer(
+            "👋 <b>سلام مدیر!</b>\n\n"
+            "هنوز هیچ اکانت کلودفلری اضافه نشده است.\n"
+            "برای شروع، باید یک توکن اضافه کنید.",
+            reply_markup=kb.as_markup(),
+        )
+    else:
+        _ = get_active_token(m.from_user.id)
+        await m.answer(
+            header("داشبورد", m.from_user.id) + "به پنل مدیریت خوش آمدید.",
+            reply_markup=get_main_menu(),
+        )
+
+
+@callbacks.on("home")
+@latest_only
+async def go_home(cb: CallbackQuery, state: FSMContext | None = None):
+    if state:
+        await state.clear()
+    text = header("منوی اصلی", cb.from_user.id) + "یک گزینه را انتخاب کنید:"
+    await cb.message.edit_text(text, reply_markup=get_main_menu())
+
+
+# ==================== Logout ====================
+@callbacks.on("logout_action")
+async def logout_process(cb: CallbackQuery):
+    user_cache.setdefault(cb.from_user.id, {})["active_acc"] = None
+    await cb.answer("از اکانت فعلی خارج شدید.", show_alert=False)
+    await accounts_menu(cb)
+
+
+# ==================== Help ====================
+@callbacks.on("help")
+async def help_menu(cb: CallbackQuery):
+    text = (
+        "<b>ℹ️ راهنمای استفاده از ربات</b>\n"
+        "━━━━━━━━━━━━━━━━\n\n"
+        f"<b>{ICONS['ZONES']} دامنه‌های من:</b>\n"
+        "لیست دامنه‌های متصل به اکانت فعال را می‌بینید.\n\n"
+        f"<b>{ICONS['ACCOUNTS']} مدیریت اکانت‌ها:</b>\n"
+        "اکانت‌های مختلف Cloudflare را اضافه/حذف و بین آن‌ها جابه‌جا کنید.\n\n"
+        f"<b>{ICONS['STATS']} آمار پیشرفته:</b>\n"
+        "نمای کلی تعداد دامنه‌ها، فعال و در انتظار.\n\n"
+        f"<b>{ICONS['LOGOUT']} خروج / تغییر اکانت:</b>\n"
+        "برای خارج شدن از اکانت فعلی و انتخاب حساب دیگر."
+    )
+    await cb.message.edit_text(header("راهنما", cb.from_user.id) + text, reply_markup=back_btn())
+
+
+# ==================== Tutorial ====================
+@callbacks.on("tutorial")
+async def show_tutorial(cb: CallbackQuery):
+    text = (
+        "<b>🎓 آموزش دریافت توکن Cloudflare (API Token)</b>\n"
+        "━━━━━━━━━━━━━━━━\n\n"
+        "1️⃣ وارد <a href='https://dash.cloudflare.com'>Cloudflare.com</a> شوید.\n"
+        "2️⃣ My Profile → API Tokens → Create Token\n"
+        "3️⃣ قالب Edit zone DNS را Use template کنید.\n"
+        "4️⃣ Zone Resources را روی All zones بگذارید.\n"
+        "5️⃣ Continue to summary → Create Token\n"
+        "6️⃣ توکن را کپی کنید و در ربات وارد کنید."
+    )
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['ADD']} افزودن اکانت", callback_data="acc_add")
+    kb.button(text=f"{ICONS['BACK']} منوی اصلی", callback_data="home")
+    kb.adjust(1)
+    await cb.message.edit_text(text, reply_markup=kb.as_markup(), disable_web_page_preview=True)
+
+
+# ==================== مدیریت اکانت‌ها ====================
+def token_badge(token: str) -> tuple[str, str | None]:
+    # (نشان، توضیح برای توکن‌هایی که مشکل دارند)
+    entry = token_health.get(token)
+    status = entry["status"]
+    if status in DEAD_TOKEN_STATUSES:
+        return "❌", {"expired": "منقضی شده", "disabled": "غیرفعال شده"}.get(status, "نامعتبر یا باطل شده")
+    if entry.get("error"):
+        return "📡", "آخرین بررسی به Cloudflare نرسید"
+    if status == "unknown":
+        return "❔", None
+    expires_on = entry.get("expires_on")
+    if expires_on and expires_on - time.time() < TOKEN_EXPIRY_WARNING:
+        days = max(0, int((expires_on - time.time()) // 86400))
+        return "⌛", f"تا {days} روز دیگر منقضی می‌شود"
+    return "✅", None
+
+
+@callbacks.on("acc_manage")
+@latest_only
+async def accounts_menu(cb: CallbackQuery):
+    user_id = cb.from_user.id
+    _ = get_active_token(user_id)
+
+    accounts = visible_accounts(user_id)
+    active = user_cache.get(user_id, {}).get("active_acc")
+
+    kb = InlineKeyboardBuilder()
+    cache = user_cache.setdefault(user_id, {})
+
+    if not accounts:
+        msg = f"{ICONS['WARNING']} لیست اکانت‌ها خالی است."
+        cache["acc_index_map"] = {}
+    else:
+        msg = (
+            f"{ICONS['ACCOUNTS']} <b>لیست حساب‌های متصل شده:</b>\n"
+            "روی نام برای ورود، روی حذف برای پاک‌کردن کلیک کنید:\n"
+        )
+        acc_names = list(accounts.keys())
+        cache["acc_index_map"] = {str(i): name for i, name in enumerate(acc_names)}
+
+        notes = []
+        for i, name in enumerate(acc_names):
+            idx = str(i)
+            status_icon = "🔵" if name == active else "⚪️"
+            badge, note = token_badge(accounts[name])
+            if note:
+                notes.append(f"{badge} <b>{html.escape(name)}:</b> {note}")
+            kb.button(text=f"{status_icon} {badge} {name}", callback_data=pack("accsel", idx))
+            if can_manage_account(user_id, name):
+                kb.button(text=f"{ICONS['DELETE']} حذف", callback_data=pack("accdel", idx))
+            else:
+                kb.button(text="🔒 اشتراکی", callback_data=pack("accsel", idx))
+        kb.adjust(2)
+
+        if notes:
+            msg += "\n" + "\n".join(notes) + "\n"
+        scopes = token_health.get(accounts[active])["scopes"] if active in accounts else None
+        if scopes:
+            shown = ", ".join(scopes[:6]) + (f" و {len(scopes) - 6} مورد دیگر" if len(scopes) > 6 else "")
+            msg += f"\n{ICONS['KEY']} دسترسی‌های توکن فعال: <i>{html.escape(shown)}</i>\n"
+        msg += "\n✅ سالم | ⌛ نزدیک انقضا | ❌ از کار افتاده | 📡 بررسی ناموفق | ❔ بررسی نشده"
+        kb.row(InlineKeyboardButton(text="🩺 بررسی توکن‌ها", callback_data="acc_health"))
+
+    kb.row(InlineKeyboardButton(text=f"{ICONS['ADD']} افزودن اکانت جدید", callback_data="acc_add"))
+    kb.row(InlineKeyboardButton(text=f"{ICONS['BACK']} بازگشت به خانه", callback_data="home"))
+
+    text = header("مدیریت حساب‌ها", user_id) + msg
+    await cb.message.edit_text(text, reply_markup=kb.as_markup())
+
+
+# --- افزودن اکانت ---
+@callbacks.on("acc_add")
+async def acc_add_start(cb: CallbackQuery, state: FSMContext):
+    await state.set_state(AccountForm.name)
+    await cb.message.edit_text(
+        "✍️ <b>نام اکانت را وارد کنید:</b>\nمثال: شخصی، شرکت، مشتری 1",
+        reply_markup=back_btn("acc_manage"),
+    )
+
+
+@router.message(AccountForm.name)
+async def acc_add_name(m: Message, state: FSMContext):
+    await state.update_data(name=m.text.strip())
+    await state.set_state(AccountForm.token)
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text="🎓 آموزش دریافت توکن", callback_data="tutorial")
+    kb.button(text=f"{ICONS['CANCEL']} انصراف", callback_data="acc_manage")
+    kb.adjust(1, 1)
+
+    await m.answer(
+        f"{ICONS['KEY']} <b>حالا API Token را ارسال کنید:</b>\n"
+        "اگر نمی‌دانید از کجا توکن بگیرید، روی «آموزش دریافت توکن» بزنید.",
+        reply_markup=kb.as_markup()
+    )
+
+
+@router.message(AccountForm.token)
+async def acc_add_token(m: Message, state: FSMContext):
+    data = await state.get_data()
+    name = data["name"]
+    token = m.text.strip()
+    if name in load_accounts() and not can_manage_account(m.from_user.id, name):
+        await state.set_state(AccountForm.name)
+        return await m.answer(f"{ICONS['ERROR']} اکانتی با این نام وجود دارد. نام دیگری ارسال کنید:")
+    try:
+        # نتیجه همین بررسی در token_health هم ثبت می‌شود، پس اکانت جدید از ابتدا نشان سلامت دارد
+        if (await verify_token(token))["status"] != "active":
+            raise Exception("Invalid Token")
+        await save_account(name, token)
+        account_owners.add(name, m.from_user.id)
+        user_cache.setdefault(m.from_user.id, {})["active_acc"] = name
+        await state.clear()
+        await m.answer(
+            f"{ICONS['SUCCESS']} اکانت <b>{name}</b> با موفقیت اضافه و فعال شد.",
+            reply_markup=get_main_menu(),
+        )
+    except Exception:
+        forget_unused_token(token)
+        await m.answer(
+            f"{ICONS['ERROR']} <b>توکن نامعتبر است!</b>\n"
+            "مطمئن شوید توکن درست کپی شده و دوباره ارسال کنید."
+        )
+
+
+# --- بررسی فوری سلامت توکن‌ها ---
+@callbacks.on("acc_health")
+@latest_only
+async def acc_health_check(cb: CallbackQuery):
+    from .. import health
+
+    await cb.answer(f"{ICONS['SPINNER']} در حال بررسی توکن‌ها...")
+    await health.check_accounts(cb.bot)
+    await accounts_menu(cb)
+
+
+# --- انتخاب اکانت بر اساس index ---
+@callbacks.on("accsel")
+async def acc_select(cb: CallbackQuery, idx: str, state: FSMContext):
+    user_id = cb.from_user.id
+    cache = user_cache.setdefault(user_id, {})
+    name = cache.get("acc_index_map", {}).get(idx)
+
+    if not name:
+        return await cb.answer("اکانت پیدا نشد، منو را رفرش کنید.", show_alert=True)
+
+    # اگر همین اکانت الان فعال است، فقط پیام بده و صفحه را دست نزن
+    if cache.get("active_acc") == name:
+        return await cb.answer("این اکانت در حال حاضر فعال است.", show_alert=False)
+
+    cache["active_acc"] = name
+    await state.clear()
+    await cb.answer(f"اکانت «{name}» فعال شد {ICONS['SUCCESS']}", show_alert=False)
+    await accounts_menu(cb)
+
+
+# --- حذف اکانت: مرحله سؤال ---
+@callbacks.on("accdel")
+async def acc_delete_ask(cb: CallbackQuery, idx: str):
+    user_id = cb.from_user.id
+    cache = user_cache.setdefault(user_id, {})
+    name = cache.get("acc_index_map", {}).get(idx)
+
+    if not name:
+        return await cb.answer("اکانت پیدا نشد، منو را رفرش کنید.", show_alert=True)
+    if not can_manage_account(user_id, name):
+        return await cb.answer("فقط کسی که این اکانت را اضافه کرده می‌تواند آن را حذف کند.", show_alert=True)
+
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text=f"{ICONS['CONFIRM']} بله، حذف کن",
+        callback_data=pack("accdelc", idx),
+    )
+    kb.button(
+        text=f"{ICONS['CANCEL']} انصراف",
+        callback_data="acc_manage",
+    )
+    kb.adjust(2)
+
+    await cb.message.edit_text(
+        header("حذف اکانت", user_id)
+        + f"⚠️ آیا از حذف اکانت «<b>{name}</b>» مطمئن هستید؟",
+        reply_markup=kb.as_markup(),
+    )
+
+
+# --- حذف اکانت: مرحله تأیید ---
+@callbacks.on("accdelc")
+async def acc_delete_confirm(cb: CallbackQuery, idx: str):
+    user_id = cb.from_user.id
+    cache = user_cache.setdefault(user_id, {})
+    name = cache.get("acc_index_map", {}).get(idx)
+
+    if not name:
+        return await cb.answer("اکانت پیدا نشد، منو را رفرش کنید.", show_alert=True)
+    if not can_manage_account(user_id, name):
+        return await cb.answer("فقط کسی که این اکانت را اضافه کرده می‌تواند آن را حذف کند.", show_alert=True)
+
+    await delete_account_from_file(name)
+
+    if cache.get("active_acc") == name:
+        accounts = visible_accounts(user_id)
+        if len(accounts) == 1:
+            cache["active_acc"] = next(iter(accounts.keys()))
+        elif accounts:
+            cache["active_acc"] = None
+        else:
+            cache["active_acc"] = None
+
+    await cb.answer(f"اکانت «{name}» حذف شد.", show_alert=False)
+    await accounts_menu(cb)
@@ -0,0 +1,75 @@
+# ==================== روتر جستجو ====================
+# /find: جستجوی نام یا محتوای رکوردها در اسنپ‌شات همه زون‌های اکانت‌های قابل دسترس، بدون درخواست به API
+import html
+import time
+import asyncio
+from aiogram import Router
+from aiogram.types import Message
+from aiogram.filters import Command
+
+from ..settings import FIND_LIMIT, SYNC_ENABLED
+from ..core import get_snapshot_store, is_admin, visible_accounts
+
+router = Router(name="find")
+
+
+# ==================== /find (جستجو در همه اکانت‌ها) ====================
+find_sync_task: asyncio.Task | None = None
+
+
+def _age_text(ts: float | None) -> str:
+    if not ts:
+        return "—"
+    minutes = int((time.time() - ts) // 60)
+    return "کمتر از یک دقیقه پیش" if minutes < 1 else f"{minutes} دقیقه پیش"
+
+
+@router.message(Command("find"))
+async def cmd_find(m: Message):
+    global find_sync_task
+    # sync و parser پرس‌وجو فقط با اولین /find بارگذاری می‌شوند
+    from .. import snapshots, sync
+
+    zones, records, oldest = await asyncio.to_thread(get_snapshot_store().summary)
+    if not zones:
+        # ایندکس هنوز ساخته نشده؛ اگر sync پس‌زمینه خاموش باشد یک‌بار دستی اجرا می‌شود
+        if not SYNC_ENABLED and (find_sync_task is None or find_sync_task.done()):
+            find_sync_task = asyncio.create_task(sync.sync_all(m.bot))
+        await m.answer("⏳ ایندکس زون‌ها در حال ساخته شدن است. چند لحظه دیگر دوباره امتحان کنید.")
+        return
+
+    text = (m.text or "").partition(" ")[2].strip()
+    if not text:
+        await m.answer(
+            "🔎 <b>جستجو در همه زون‌ها و اکانت‌ها</b>\n"
+            "━━━━━━━━━━━━━━━━\n"
+            "<code>/find 1.2.3.4</code> — رکوردهایی که به این IP اشاره می‌کنند\n"
+            "<code>/find *.example.com</code> — نام‌هایی که با این پسوند تمام می‌شوند\n"
+            "<code>/find api*</code> — نام یا مقدارهایی که با این عبارت شروع می‌شوند\n"
+            "<code>/find type:CNAME proxied:no zone:example.com</code>\n"
+            "کلیدها: <code>name content type proxied zone account</code>\n\n"
+            f"📦 {zones} زون | {records} رکورد | قدیمی‌ترین sync: {_age_text(oldest)}"
+        )
+        return
+
+    started = time.perf_counter()
+    query = snapshots.parse_query(text)
+    if not is_admin(m.from_user.id):
+        query["accounts"] = list(visible_accounts(m.from_user.id))
+    results, total = await asyncio.to_thread(get_snapshot_store().search, query, FIND_LIMIT)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    out = f"🔎 <b>نتایج:</b> <code>{html.escape(text)}</code>\n━━━━━━━━━━━━━━━━\n"
+    if not results:
+        out += "موردی پیدا نشد."
+    shown = 0
+    for account, zone, r in results:
+        line = f"{sync.record_line(r)}\n     🌐 {html.escape(zone)} | 👤 {html.escape(account)}\n"
+        if len(out) + len(line) > 3800:
+            break
+        out += line
+        shown += 1
+    if total > shown:
+        out += f"\n… {total} نتیجه، {shown} مورد اول نمایش داده شد."
+    out += f"\n⏱ {elapsed:.0f}ms | قدیمی‌ترین sync: {_age_text(oldest)}"
+    await m.answer(out)
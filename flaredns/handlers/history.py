@@ -0,0 +1,312 @@
+# ==================== روتر تاریخچه زون ====================
+# لیست نسخه‌های زون فعلی، مقایسه دو نسخه و بازگردانی زون به یک نسخه یا یک لحظه مشخص
+import html
+import time
+import asyncio
+from aiogram import Router
+from aiogram.types import Message, CallbackQuery
+from aiogram.fsm.context import FSMContext
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..callbacks import CallbackTable, pack
+from ..settings import ICONS, HISTORY_ENABLED
+from ..core import (
+    HistoryQuery, back_btn, get_active_token, get_history_store, handle_for, header, history_source, latest_only,
+    load_zone_records, renderer, user_cache, zone_cb,
+)
+from .records import BatchInterrupted, batch_record_ops, format_ops_interrupted, format_ops_result
+
+router = Router(name="history")
+callbacks = CallbackTable(router)
+
+PER_PAGE = 8
+DIFF_LIMIT = 15
+
+
+def _when(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def _current_zone(uid: int) -> tuple[str | None, str, str | None]:
+    cache = user_cache.get(uid, {})
+    return cache.get("curr_zone_id"), cache.get("curr_zone_name", ""), get_active_token(uid)
+
+
+def format_diff(diff: dict, limit: int = DIFF_LIMIT) -> str:
+    from .. import sync
+
+    lines = [f"➕ {sync.record_line(r)}" for r in diff["added"]]
+    lines += [f"➖ {sync.record_line(r)}" for r in diff["removed"]]
+    for old, new in diff["changed"]:
+        lines.append(f"{ICONS['EDIT']} {sync.record_line(old)}\n     ⤷ {sync.record_line(new)}")
+    if not lines:
+        return "بدون تفاوت."
+    text = "\n".join(lines[:limit])
+    if len(lines) > limit:
+        text += f"\n… و {len(lines) - limit} مورد دیگر"
+    return text
+
+
+# ==================== لیست نسخه‌ها ====================
+@callbacks.on("hist")
+@latest_only
+async def history_list(cb: CallbackQuery, page: str, state: FSMContext):
+    await state.clear()
+    uid = cb.from_user.id
+    zid, zone_name, _ = _current_zone(uid)
+    if not zid:
+        return await cb.answer("ابتدا یک دامنه را انتخاب کنید.", show_alert=True)
+    if not HISTORY_ENABLED:
+        return await cb.answer("تاریخچه خاموش است (HISTORY_ENABLED).", show_alert=True)
+
+    page = max(int(page), 0)
+    versions, total = await asyncio.to_thread(get_history_store().versions, zid, PER_PAGE, page * PER_PAGE)
+
+    text = header(f"تاریخچه {zone_name}", uid)
+    if not total:
+        text += "هنوز نسخه‌ای ثبت نشده است؛ با اولین باز شدن یا تغییر زون، نسخه پایه ثبت می‌شود."
+    else:
+        text += f"{total} نسخه — روی یک نسخه بزنید تا تغییراتش را ببینید یا زون را به آن برگردانید."
+
+    kb = InlineKeyboardBuilder()
+    for v in versions:
+        kb.button(
+            text=f"v{v['version']} · {_when(v['created_at'])} · +{v['added']} −{v['removed']} ~{v['changed']}",
+            callback_data=pack("hver", v["version"]),
+        )
+    nav = []
+    if page > 0:
+        nav.append(("◀️ قبلی", pack("hist", page - 1)))
+    if (page + 1) * PER_PAGE < total:
+        nav.append(("بعدی ▶️", pack("hist", page + 1)))
+    for label, data in nav:
+        kb.button(text=label, callback_data=data)
+    if total:
+        kb.button(text="↔️ مقایسه دو نسخه", callback_data=pack("hask", "diff"))
+        kb.button(text="⏰ بازگردانی به یک زمان", callback_data=pack("hask", "time"))
+    kb.button(text=f"{ICONS['BACK']} بازگشت", callback_data=zone_cb(uid, zid))
+    kb.adjust(*([1] * len(versions)), *([len(nav)] if nav else []), *([2] if total else []), 1)
+
+    await cb.message.edit_text(text, reply_markup=kb.as_markup())
+
+
+# ==================== جزئیات نسخه و مقایسه ====================
+async def render_version(uid: int, version: int):
+    zid, zone_name, _ = _current_zone(uid)
+    store = get_history_store()
+    info = await asyncio.to_thread(store.version_info, zid, version)
+    if info is None:
+        return None
+    diff = await asyncio.to_thread(store.diff, zid, version - 1, version)
+
+    text = (
+        header(f"{zone_name} — نسخه {version}", uid)
+        + f"🕘 {_when(info['created_at'])} | 👤 <code>{html.escape(info['source'])}</code>\n"
+        f"📄 {info['records']} رکورد | +{info['added']} −{info['removed']} ~{info['changed']}\n"
+        "━━━━━━━━━━━━━━━━\n"
+        + (format_diff(diff) if diff is not None else "تغییرات این نسخه دیگر در دسترس نیست (نسخه‌های قبلی حذف شده‌اند).")
+    )
+    kb = InlineKeyboardBuilder()
+    kb.button(text="↔️ مقایسه با آخرین نسخه", callback_data=pack("hdiff", version, 0))
+    kb.button(text="⏪ بازگردانی به این نسخه", callback_data=pack("hrestore", version))
+    kb.button(text=f"{ICONS['BACK']} لیست نسخه‌ها", callback_data=pack("hist", 0))
+    kb.adjust(1)
+    return text, kb.as_markup()
+
+
+@callbacks.on("hver")
+@latest_only
+async def history_version(cb: CallbackQuery, version: str):
+    rendered = await render_version(cb.from_user.id, int(version))
+    if rendered is None:
+        return await cb.answer("این نسخه پیدا نشد.", show_alert=True)
+    await cb.message.edit_text(rendered[0], reply_markup=rendered[1])
+
+
+async def render_diff(uid: int, v1: int, v2: int):
+    # v2 = 0 یعنی آخرین نسخه
+    zid, zone_name, _ = _current_zone(uid)
+    store = get_history_store()
+    if not v2:
+        latest, _ = await asyncio.to_thread(store.versions, zid, 1)
+        v2 = latest[0]["version"] if latest else 0
+    diff = await asyncio.to_thread(store.diff, zid, v1, v2) if v2 else None
+    if diff is None:
+        return None
+    text = (
+        header(f"{zone_name}: نسخه {v1} ⬅️ نسخه {v2}", uid)
+        + f"➕ {len(diff['added'])} | ➖ {len(diff['removed'])} | {ICONS['EDIT']} {len(diff['changed'])}\n"
+        "━━━━━━━━━━━━━━━━\n"
+        + format_diff(diff)
+    )
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"⏪ بازگردانی به نسخه {v1}", callback_data=pack("hrestore", v1))
+    kb.button(text=f"{ICONS['BACK']} لیست نسخه‌ها", callback_data=pack("hist", 0))
+    kb.adjust(1)
+    return text, kb.as_markup()
+
+
+@callbacks.on("hdiff")
+@latest_only
+async def history_diff(cb: CallbackQuery, v1: str, v2: str):
+    rendered = await render_diff(cb.from_user.id, int(v1), int(v2))
+    if rendered is None:
+        return await cb.answer("یکی از نسخه‌ها پیدا نشد.", show_alert=True)
+    await cb.message.edit_text(rendered[0], reply_markup=rendered[1])
+
+
+# --- ورودی متنی: دو شماره نسخه یا یک زمان ---
+@callbacks.on("hask")
+async def history_ask(cb: CallbackQuery, mode: str, state: FSMContext):
+    await state.set_state(HistoryQuery.value)
+    await state.update_data(mode=mode)
+    prompt = (
+        "دو شماره نسخه را بفرستید، مثلاً: <code>12 30</code>"
+        if mode == "diff"
+        else f"زمان را به وقت سرور بفرستید، مثلاً: <code>{_when(time.time() - 3600)}</code>\n"
+        "زون به آخرین نسخه ثبت‌شده تا آن لحظه برگردانده می‌شود (قبل از اعمال، خلاصه تغییرات نمایش داده می‌شود)."
+    )
+    await cb.message.edit_text(prompt, reply_markup=back_btn(pack("hist", 0)))
+
+
+@router.message(HistoryQuery.value)
+async def history_ask_apply(m: Message, state: FSMContext):
+    uid = m.from_user.id
+    mode = (await state.get_data()).get("mode")
+    text = (m.text or "").strip()
+    zid, _, _ = _current_zone(uid)
+
+    if mode == "diff":
+        parts = text.replace(",", " ").split()
+        if len(parts) != 2 or not all(p.isdigit() for p in parts):
+            return await m.answer("دو عدد بفرستید، مثلاً <code>12 30</code>.")
+        rendered = await render_diff(uid, int(parts[0]), int(parts[1]))
+    else:
+        try:
+            ts = time.mktime(time.strptime(text, "%Y-%m-%d %H:%M"))
+        except ValueError:
+            return await m.answer("قالب زمان درست نیست؛ مثلاً <code>2024-05-01 14:30</code>.")
+        version = await asyncio.to_thread(get_history_store().version_at, zid, ts)
+        rendered = await render_version(uid, version) if version else None
+
+    await state.clear()
+    if rendered is None:
+        return await m.answer("نسخه‌ای برای این ورودی پیدا نشد.", reply_markup=back_btn(pack("hist", 0)))
+    await m.answer(rendered[0], reply_markup=rendered[1])
+
+
+# ==================== بازگردانی ====================
+def plan_restore(current: list[dict], target: list[dict]) -> tuple[list[dict], int]:
+    # رکوردها با id و بعد با محتوا (برای رکوردهایی که قبلاً دوباره ساخته شده‌اند) تطبیق داده می‌شوند:
+    # نبودها ساخته، اضافه‌ها حذف و تغییرکرده‌ها PUT می‌شوند.
+    # انواعی که فقط با content قابل ساختن نیستند (SRV، CAA و ...) دست نمی‌خورند.
+    from .. import zonefile
+    from ..snapshots import record_signature
+
+    supported = zonefile.SUPPORTED_TYPES
+    cur = {r["id"]: r for r in current}
+    want = {r["id"]: r for r in target if r["id"] not in cur}
+    spare: dict[tuple, list[str]] = {}
+    for rid, r in cur.items():
+        spare.setdefault(record_signature(r), []).append(rid)
+    for r in target:
+        if r["id"] in cur:
+            spare[record_signature(cur[r["id"]])].remove(r["id"])
+    for rid, r in list(want.items()):
+        twins = spare.get(record_signature(r))
+        if twins:
+            twins.pop()
+            del want[rid]
+    extra = {rid for rids in spare.values() for rid in rids}
+
+    ops, skipped = [], 0
+    for rid in extra:
+        if cur[rid]["type"] in supported:
+            ops.append({"action": "delete", "id": rid})
+        else:
+            skipped += 1
+    for r in target:
+        if r["id"] in cur:
+            if record_signature(cur[r["id"]]) == record_signature(r):
+                continue
+            if r["type"] in supported:
+                ops.append({"action": "update", "id": r["id"], "payload": zonefile.to_payload(r, cur[r["id"]])})
+            else:
+                skipped += 1
+        elif r["id"] in want:
+            if r["type"] in supported:
+                ops.append({"action": "create", "payload": zonefile.to_payload(r)})
+            else:
+                skipped += 1
+    return ops, skipped
+
+
+@callbacks.on("hrestore")
+async def history_restore_ask(cb: CallbackQuery, version: str):
+    uid = cb.from_user.id
+    zid, zone_name, token = _current_zone(uid)
+    if not zid or not token:
+        return await cb.answer("ابتدا یک دامنه را انتخاب کنید.", show_alert=True)
+    version = int(version)
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال مقایسه نسخه {version} با رکوردهای فعلی...")
+    target = await asyncio.to_thread(get_history_store().state, zid, version)
+    if target is None:
+        return await cb.message.edit_text("این نسخه پیدا نشد.", reply_markup=back_btn(pack("hist", 0)))
+    try:
+        # مقایسه با وضعیت واقعی Cloudflare، نه کش
+        current = await load_zone_records(token, zid, force=True)
+    except Exception as e:
+        return await cb.message.edit_text(f"{ICONS['ERROR']} خطا: {e}", reply_markup=back_btn(pack("hver", version)))
+
+    ops, skipped = plan_restore(list(current), target)
+    user_cache.setdefault(uid, {})["restore_plan"] = {"zone_id": zid, "version": version, "ops": ops}
+    counts = {a: sum(1 for op in ops if op["action"] == a) for a in ("create", "update", "delete")}
+
+    text = (
+        header(f"بازگردانی {zone_name} به نسخه {version}", uid)
+        + f"{ICONS['ADD']} ساخت دوباره: {counts['create']}\n"
+        f"{ICONS['EDIT']} برگرداندن مقدار: {counts['update']}\n"
+        f"{ICONS['DELETE']} حذف رکوردهای بعدی: {counts['delete']}"
+    )
+    if skipped:
+        text += f"\n{ICONS['INFO']} انواع پشتیبانی‌نشده (دست نمی‌خورند): {skipped}"
+    kb = InlineKeyboardBuilder()
+    if ops:
+        kb.button(text=f"{ICONS['CONFIRM']} اعمال بازگردانی", callback_data=pack("hrestore_ok", version))
+    else:
+        text += "\n\nزون همین حالا با این نسخه یکسان است."
+    kb.button(text=f"{ICONS['CANCEL']} انصراف", callback_data=pack("hver", version))
+    kb.adjust(1)
+    await cb.message.edit_text(text, reply_markup=kb.as_markup())
+
+
+@callbacks.on("hrestore_ok")
+async def history_restore_apply(cb: CallbackQuery, version: str):
+    uid = cb.from_user.id
+    zid, _, token = _current_zone(uid)
+    plan = user_cache.get(uid, {}).pop("restore_plan", None)
+    if not plan or plan["zone_id"] != zid or plan["version"] != int(version) or not token:
+        return await cb.answer("برنامه بازگردانی پیدا نشد، دوباره امتحان کنید.", show_alert=True)
+
+    ops = plan["ops"]
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال اعمال {len(ops)} تغییر...")
+
+    def progress(done: int, total: int):
+        renderer.progress(cb.message, f"{ICONS['SPINNER']} در حال بازگردانی: {done}/{total}")
+
+    # نسخه‌ای که این تغییرات می‌سازند «بازگردانی» برچسب می‌خورد، نه ویرایش معمولی
+    label = history_source.set(f"restore v{version} by user:{uid}")
+    try:
+        result = await batch_record_ops(uid, token, zid, ops, progress)
+    except BatchInterrupted as e:
+        return await cb.message.edit_text(
+            f"⏪ <b>بازگردانی به نسخه {version}</b>\n" + format_ops_interrupted(e),
+            reply_markup=back_btn(pack("zrefresh", handle_for(uid, zid))),
+        )
+    finally:
+        history_source.reset(label)
+    await cb.message.edit_text(
+        f"⏪ <b>بازگردانی به نسخه {version}</b>\n" + format_ops_result(result),
+        reply_markup=back_btn(zone_cb(uid, zid)),
+    )
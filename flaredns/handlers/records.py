@@ -0,0 +1,981 @@
+# ==================== روتر رکوردها ====================
+# لیست و جستجوی رکوردها، انتخاب گروهی، ورود/خروج فایل، افزودن و ویرایش رکورد
+# zonefile فقط با اولین عملیات گروهی یا ورود/خروج فایل بارگذاری می‌شود؛ dnscheck با اولین بررسی انتشار
+import os
+import html
+import asyncio
+import tempfile
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, FSInputFile
+from aiogram.fsm.context import FSMContext
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..callbacks import CallbackTable, pack
+from ..settings import ICONS, BULK_CONCURRENCY, CF_BATCH_SIZE, DNS_RESOLVERS, PROPAGATION_INTERVAL, PROPAGATION_TIMEOUT
+from ..core import (
+    BulkImport, CloudflareError, EditField, RecordForm, RecordSearch, back_btn, cache_record_remove, cache_record_upsert,
+    cf_cache, cf_call, cf_request, get_active_token, get_cached_record, get_cached_zone, get_proxy_icon, get_resolver_pool,
+    handle_for, header, invalidate_record_views, latest_only, load_zone_records, renderer, resolve_handle,
+    snapshot_zone_records, user_cache, zone_cb,
+)
+
+router = Router(name="records")
+callbacks = CallbackTable(router)
+
+
+# ==================== لیست رکوردهای DNS ====================
+def build_search_index(records: list) -> dict:
+    # ایندکس جستجو یک بار روی رکوردهای کش‌شده ساخته می‌شود و تا تغییر بعدی رکوردها معتبر است
+    by_type: dict[str, list] = {}
+    rows = []
+    for r in records:
+        by_type.setdefault(r["type"], []).append(r)
+        rows.append((f"{r['name']}\n{r['content']}".lower(), r))
+    return {"by_type": by_type, "rows": rows}
+
+
+def get_records_view(user_id: int) -> list:
+    # لیست رکوردهای قابل نمایش (کل رکوردها یا نتیجه فیلتر فعلی)
+    cache = user_cache.setdefault(user_id, {})
+    records = cache.get("records", [])
+    query = cache.get("rec_query")
+    if not query:
+        return records
+
+    view = cache.get("rec_view")
+    if view is None:
+        index = cache.get("rec_index")
+        if index is None:
+            index = cache["rec_index"] = build_search_index(records)
+        if query.upper() in index["by_type"]:
+            view = list(index["by_type"][query.upper()])
+        else:
+            q = query.lower()
+            view = [r for hay, r in index["rows"] if q in hay]
+        cache["rec_view"] = view
+    return view
+
+
+def render_records_page(user_id: int, page: int):
+    cache = user_cache.get(user_id, {})
+    zone_id = cache.get("curr_zone_id")
+    zone_name = cache.get("curr_zone_name", "")
+    records = cache.get("records", [])
+    view = get_records_view(user_id)
+    query = cache.get("rec_query")
+    select_mode = cache.get("rec_select_mode", False)
+    selected = cache.get("rec_selected", set())
+
+    per_page = 10
+    max_page = max(len(view) - 1, 0) // per_page
+    page = min(max(page, 0), max_page)
+    cache["rec_page"] = page
+    start = page * per_page
+    end = start + per_page
+
+    text = header(f"مدیریت {zone_name}", user_id) + f"تعداد رکوردها: {len(records)}\n"
+    if query:
+        text += f"🔍 فیلتر: <code>{html.escape(query)}</code> — {len(view)} نتیجه\n"
+    if select_mode:
+        text += f"☑️ انتخاب‌شده: {len(selected)} — روی رکوردها بزنید تا انتخاب/لغو شوند."
+    else:
+        text += "برای ویرایش روی رکورد کلیک کنید."
+
+    # کیبورد هر صفحه (خارج از حالت انتخاب) تا تغییر بعدی رکوردها کش می‌شود؛
+    # version لیست مشترک، تغییراتی را که کاربر دیگری روی همین زون داده هم پوشش می‌دهد
+    memo = cache.setdefault("rec_markups", {}) if not select_mode else None
+    version = getattr(records, "version", None)
+    if memo is not None:
+        hit = memo.get((page, query))
+        if hit is not None and hit[0] == version:
+            return text, hit[1]
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['ADD']} ثبت رکورد جدید", callback_data="new_rec_type")
+
+    for r in view[start:end]:
+        proxy_icon = get_proxy_icon(r.get("proxied"))
+        type_icon = ICONS.get(r["type"], ICONS["DEFAULT"])
+        clean_name = r["name"].replace(f".{zone_name}", "").replace(zone_name, "@") or "@"
+        val_short = (r["content"][:15] + "..") if len(r["content"]) > 15 else r["content"]
+        label = f"{type_icon} {clean_name} ➜ {val_short} {proxy_icon}"
+        if select_mode:
+            mark = "☑️" if r["id"] in selected else "⬜️"
+            kb.button(text=f"{mark} {label}", callback_data=pack("rtog", handle_for(user_id, r["id"])))
+        else:
+            kb.button(text=label, callback_data=pack("rec", handle_for(user_id, r["id"])))
+    kb.adjust(1)
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀️ قبلی", callback_data=pack("rpage", page - 1)))
+    nav.append(InlineKeyboardButton(text=f"{page+1}/{max_page+1}", callback_data="noop"))
+    if end < len(view):
+        nav.append(InlineKeyboardButton(text="بعدی ▶️", callback_data=pack("rpage", page + 1)))
+    kb.row(*nav)
+
+    if select_mode:
+        kb.row(
+            InlineKeyboardButton(text="☑️ همه این صفحه", callback_data="rsel_page"),
+            InlineKeyboardButton(text=f"{ICONS['CANCEL']} پایان انتخاب", callback_data="rsel_exit"),
+        )
+        if selected:
+            kb.row(
+                InlineKeyboardButton(text=f"{ICONS['PROXIED']} پروکسی روشن", callback_data="rsel_proxy_on"),
+                InlineKeyboardButton(text=f"{ICONS['DNS_ONLY']} پروکسی خاموش", callback_data="rsel_proxy_off"),
+            )
+            kb.row(InlineKeyboardButton(text=f"{ICONS['DELETE']} حذف انتخاب‌شده‌ها", callback_data="rsel_delete"))
+    else:
+        kb.row(InlineKeyboardButton(text="☑️ انتخاب چندتایی", callback_data="rsel_mode"))
+
+    if query:
+        kb.row(InlineKeyboardButton(text=f"{ICONS['CANCEL']} حذف فیلتر", callback_data="rsearch_clear"))
+    else:
+        kb.row(InlineKeyboardButton(text="🔍 جستجو", callback_data="rsearch"))
+    kb.row(
+        InlineKeyboardButton(text="📦 ورود/خروج گروهی", callback_data="bulk_menu"),
+        InlineKeyboardButton(text="🕘 تاریخچه", callback_data=pack("hist", 0)),
+    )
+    refresh = pack("zrefresh", handle_for(user_id, zone_id))
+    kb.row(InlineKeyboardButton(text=f"{ICONS['REFRESH']} رفرش لیست", callback_data=refresh))
+    kb.row(InlineKeyboardButton(text=f"{ICONS['BACK']} لیست دامنه‌ها", callback_data="zones_list"))
+
+    markup = kb.as_markup()
+    if memo is not None:
+        memo[(page, query)] = (version, markup)
+    return text, markup
+
+
+@callbacks.on("zone", "zrefresh")
+@latest_only
+async def list_records(cb: CallbackQuery, handle: str):
+    uid = cb.from_user.id
+    zone_id = resolve_handle(uid, handle)
+    if zone_id is None:
+        return await cb.answer("دامنه پیدا نشد، لیست دامنه‌ها را دوباره باز کنید.", show_alert=True)
+
+    zobj = get_cached_zone(uid, zone_id)
+    zone_name = zobj["name"] if zobj else "Unknown"
+
+    cache = user_cache.setdefault(uid, {})
+    if cache.get("curr_zone_id") != zone_id:
+        cache["rec_query"] = None
+        cache["rec_page"] = 0
+        cache["rec_select_mode"] = False
+        cache["rec_selected"] = set()
+    cache["curr_zone_id"] = zone_id
+    cache["curr_zone_name"] = zone_name
+
+    token = get_active_token(uid)
+    records = None
+    if token and not cb.data.startswith("zrefresh"):
+        records = cf_cache.get(("records", token, zone_id))
+        if records is None:
+            records = await snapshot_zone_records(token, zone_id)
+
+    msg = cb.message
+    if records is None:
+        msg = await cb.message.edit_text(f"{ICONS['SPINNER']} دریافت رکوردهای {zone_name}...")
+
+    try:
+        if records is None:
+            if not token:
+                raise Exception("NO_ACCOUNT_SELECTED")
+            records = await load_zone_records(token, zone_id, force=True)
+        if cache.get("records") is not records:
+            invalidate_record_views(uid)
+        cache["records"] = records
+
+        text, markup = render_records_page(uid, cache.get("rec_page", 0))
+        await msg.edit_text(text, reply_markup=markup)
+    except Exception as e:
+        await msg.edit_text(f"{ICONS['ERROR']} خطا: {e}", reply_markup=back_btn("zones_list"))
+
+
+@callbacks.on("rpage")
+@latest_only
+async def records_pagination(cb: CallbackQuery, page: str):
+    text, markup = render_records_page(cb.from_user.id, int(page))
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+@callbacks.on("rsearch")
+async def records_search_start(cb: CallbackQuery, state: FSMContext):
+    zid = user_cache.get(cb.from_user.id, {}).get("curr_zone_id")
+    await state.set_state(RecordSearch.query)
+    await cb.message.edit_text(
+        "🔍 <b>عبارت جستجو را ارسال کنید:</b>\n"
+        "بخشی از نام یا مقدار رکورد، یا نوع آن (مثلاً <code>CNAME</code>).",
+        reply_markup=back_btn(zone_cb(cb.from_user.id, zid)),
+    )
+
+
+@router.message(RecordSearch.query)
+async def records_search_apply(m: Message, state: FSMContext):
+    await state.clear()
+    cache = user_cache.setdefault(m.from_user.id, {})
+    cache["rec_query"] = m.text.strip() or None
+    cache.pop("rec_view", None)
+    text, markup = render_records_page(m.from_user.id, 0)
+    await m.answer(text, reply_markup=markup)
+
+
+@callbacks.on("rsearch_clear")
+async def records_search_clear(cb: CallbackQuery):
+    cache = user_cache.setdefault(cb.from_user.id, {})
+    cache["rec_query"] = None
+    cache.pop("rec_view", None)
+    text, markup = render_records_page(cb.from_user.id, 0)
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+# --- انتخاب چندتایی رکوردها ---
+@callbacks.on("rsel_mode", "rsel_exit")
+async def records_select_mode(cb: CallbackQuery):
+    cache = user_cache.setdefault(cb.from_user.id, {})
+    cache["rec_select_mode"] = cb.data == "rsel_mode"
+    cache["rec_selected"] = set()
+    text, markup = render_records_page(cb.from_user.id, cache.get("rec_page", 0))
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+@callbacks.on("rtog")
+async def records_select_toggle(cb: CallbackQuery, handle: str):
+    rid = resolve_handle(cb.from_user.id, handle)
+    if rid is None:
+        return await cb.answer("رکورد پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+    cache = user_cache.setdefault(cb.from_user.id, {})
+    selected = cache.setdefault("rec_selected", set())
+    selected.symmetric_difference_update({rid})
+    text, markup = render_records_page(cb.from_user.id, cache.get("rec_page", 0))
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+@callbacks.on("rsel_page")
+async def records_select_page(cb: CallbackQuery):
+    cache = user_cache.setdefault(cb.from_user.id, {})
+    page = cache.get("rec_page", 0)
+    view = get_records_view(cb.from_user.id)
+    cache.setdefault("rec_selected", set()).update(r["id"] for r in view[page * 10:page * 10 + 10])
+    text, markup = render_records_page(cb.from_user.id, page)
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+@callbacks.on("rsel_delete")
+async def records_select_delete_ask(cb: CallbackQuery):
+    count = len(user_cache.get(cb.from_user.id, {}).get("rec_selected", ()))
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['CONFIRM']} بله، حذف کن", callback_data="rsel_delete_ok")
+    kb.button(text=f"{ICONS['CANCEL']} خیر", callback_data="rsel_back")
+    kb.adjust(2)
+    await cb.message.edit_text(
+        f"⚠️ <b>آیا از حذف {count} رکورد انتخاب‌شده مطمئن هستید؟</b>", reply_markup=kb.as_markup()
+    )
+
+
+@callbacks.on("rsel_back")
+async def records_select_back(cb: CallbackQuery):
+    text, markup = render_records_page(cb.from_user.id, user_cache.get(cb.from_user.id, {}).get("rec_page", 0))
+    await cb.message.edit_text(text, reply_markup=markup)
+
+
+@callbacks.on("rsel_proxy_on", "rsel_proxy_off", "rsel_delete_ok")
+async def records_select_apply(cb: CallbackQuery):
+    from .. import zonefile
+
+    uid = cb.from_user.id
+    cache = user_cache.setdefault(uid, {})
+    zid = cache.get("curr_zone_id")
+    token = get_active_token(uid)
+    records = cache.get("records")
+    selected = cache.get("rec_selected", set())
+    if not token or records is None or not selected:
+        return await cb.answer("هیچ رکوردی انتخاب نشده است.", show_alert=True)
+
+    recs = [r for r in map(records.get_by_id, selected) if r is not None]
+    if cb.data == "rsel_delete_ok":
+        ops = [{"action": "delete", "id": r["id"]} for r in recs]
+    else:
+        proxied = cb.data == "rsel_proxy_on"
+        ops = [
+            {"action": "patch", "id": r["id"], "payload": {"proxied": proxied}}
+            for r in recs
+            if r["type"] in zonefile.PROXIABLE_TYPES and bool(r.get("proxied")) != proxied
+        ]
+    if not ops:
+        return await cb.answer("تغییری لازم نیست.", show_alert=False)
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال اعمال {len(ops)} تغییر...")
+
+    def progress(done: int, total: int):
+        renderer.progress(cb.message, f"{ICONS['SPINNER']} در حال اعمال تغییرات: {done}/{total}")
+
+    cache["rec_selected"] = set()
+    cache["rec_select_mode"] = False
+    try:
+        result = await batch_record_ops(uid, token, zid, ops, progress)
+    except BatchInterrupted as e:
+        return await cb.message.edit_text(
+            format_ops_interrupted(e), reply_markup=back_btn(pack("zrefresh", handle_for(uid, zid)))
+        )
+
+    await cb.message.edit_text(format_ops_result(result), reply_markup=back_btn(zone_cb(uid, zid)))
+
+
+# ==================== ورود/خروج گروهی ====================
+async def apply_record_ops(user_id: int, token: str, zone_id: str, ops: list[dict], progress=None) -> dict:
+    # ops: {"action": create/update/patch/delete, "payload": ..., "id": ...}
+    # عملیات هم‌زمان (محدود به BULK_CONCURRENCY) اجرا می‌شوند؛ نرخ درخواست را خود cf_client کنترل می‌کند.
+    sem = asyncio.Semaphore(BULK_CONCURRENCY)
+    result = {"ok": 0, "failed": 0, "errors": []}
+    base = f"/zones/{zone_id}/dns_records"
+
+    async def run(op: dict):
+        async with sem:
+            if op["action"] == "create":
+                j = await cf_call(token, "POST", base, op["payload"])
+                cache_record_upsert(user_id, zone_id, j["result"])
+            elif op["action"] == "update":
+                j = await cf_call(token, "PUT", f"{base}/{op['id']}", op["payload"])
+                cache_record_upsert(user_id, zone_id, j["result"])
+            elif op["action"] == "patch":
+                j = await cf_call(token, "PATCH", f"{base}/{op['id']}", op["payload"])
+                cache_record_upsert(user_id, zone_id, j["result"])
+            else:
+                await cf_call(token, "DELETE", f"{base}/{op['id']}")
+                cache_record_remove(user_id, zone_id, op["id"])
+
+    tasks = [asyncio.create_task(run(op)) for op in ops]
+    for i, fut in enumerate(asyncio.as_completed(tasks), 1):
+        try:
+            await fut
+            result["ok"] += 1
+        except Exception as e:
+            result["failed"] += 1
+            if len(result["errors"]) < 5:
+                result["errors"].append(str(e))
+        if progress and i < len(tasks):
+            progress(i, len(tasks))
+    return result
+
+
+def format_ops_result(result: dict) -> str:
+    text = (
+        f"{ICONS['SUCCESS']} موفق: {result['ok']}\n"
+        f"{ICONS['ERROR']} ناموفق: {result['failed']}"
+    )
+    if result["errors"]:
+        text += "\n\n" + "\n".join(f"• {html.escape(e)}" for e in result["errors"])
+    return text
+
+
+_BATCH_KEYS = {"delete": "deletes", "patch": "patches", "update": "puts", "create": "posts"}
+
+
+class BatchInterrupted(Exception):
+    # بسته‌ای که وضعیتش نامعلوم است؛ result نتیجه بسته‌های قبل از آن است
+    def __init__(self, error: Exception, result: dict):
+        super().__init__(str(error) or type(error).__name__)
+        self.result = result
+
+
+def format_ops_interrupted(e: BatchInterrupted) -> str:
+    return (
+        f"{ICONS['WARNING']} <b>ارتباط با Cloudflare وسط کار قطع شد:</b> {html.escape(str(e))}\n"
+        "معلوم نیست آخرین بسته تغییرات اعمال شده یا نه؛ رکوردها را دوباره بخوانید و پیش از تکرار بررسی کنید.\n\n"
+        + format_ops_result(e.result)
+    )
+
+
+async def batch_record_ops(user_id: int, token: str, zone_id: str, ops: list[dict], progress=None) -> dict:
+    # تغییرات در قالب POST /zones/{id}/dns_records/batch و در بسته‌های CF_BATCH_SIZE تایی ارسال می‌شوند.
+    # Cloudflare هر بسته را به ترتیب deletes → patches → puts → posts و به صورت اتمیک اجرا می‌کند؛
+    # برای حفظ همین ترتیب بین بسته‌ها، عملیات مرتب و بسته‌ها پشت سر هم ارسال می‌شوند.
+    # اگر Cloudflare یک بسته را قطعاً رد کند (پاسخ 4xx: endpoint در دسترس نیست یا یکی از رکوردها نامعتبر است)،
+    # همان بسته با درخواست‌های تکی هم‌زمان اجرا می‌شود تا بقیه تغییرات اعمال و خطاها تک‌تک گزارش شوند.
+    # بعد از timeout، قطع اتصال یا 5xx معلوم نیست بسته اعمال شده یا نه؛ تکرار تکی رکوردها را دوباره می‌سازد،
+    # پس خطا بالا می‌رود (BatchInterrupted همراه با نتیجه بسته‌های قبلی).
+    order = list(_BATCH_KEYS)
+    ops = sorted(ops, key=lambda op: order.index(op["action"]))
+    result = {"ok": 0, "failed": 0, "errors": []}
+    done = 0
+
+    for i in range(0, len(ops), CF_BATCH_SIZE):
+        chunk = ops[i:i + CF_BATCH_SIZE]
+        body: dict[str, list] = {}
+        for op in chunk:
+            item = {"id": op["id"]} if op["action"] != "create" else {}
+            item.update(op.get("payload") or {})
+            body.setdefault(_BATCH_KEYS[op["action"]], []).append(item)
+
+        try:
+            j = await cf_call(token, "POST", f"/zones/{zone_id}/dns_records/batch", body)
+        except CloudflareError as e:
+            if e.status >= 500:
+                raise BatchInterrupted(e, result) from e
+            sub = await apply_record_ops(user_id, token, zone_id, chunk)
+            result["ok"] += sub["ok"]
+            result["failed"] += sub["failed"]
+            result["errors"] = (result["errors"] + sub["errors"])[:5]
+        except Exception as e:
+            raise BatchInterrupted(e, result) from e
+        else:
+            res = j.get("result") or {}
+            for rec in res.get("deletes") or []:
+                cache_record_remove(user_id, zone_id, rec["id"])
+            for key in ("patches", "puts", "posts"):
+                for rec in res.get(key) or []:
+                    cache_record_upsert(user_id, zone_id, rec)
+            result["ok"] += len(chunk)
+
+        done += len(chunk)
+        if progress and done < len(ops):
+            progress(done, len(ops))
+    return result
+
+
+@callbacks.on("bulk_menu")
+async def bulk_menu(cb: CallbackQuery, state: FSMContext):
+    await state.clear()
+    zid = user_cache.get(cb.from_user.id, {}).get("curr_zone_id")
+    kb = InlineKeyboardBuilder()
+    kb.button(text="📤 خروجی BIND", callback_data=pack("bulk_export", "bind"))
+    kb.button(text="📤 خروجی CSV", callback_data=pack("bulk_export", "csv"))
+    kb.button(text="📥 ورود از فایل", callback_data="bulk_import")
+    kb.button(text=f"{ICONS['BACK']} بازگشت", callback_data=zone_cb(cb.from_user.id, zid))
+    kb.adjust(2, 1, 1)
+    await cb.message.edit_text(
+        header("ورود/خروج گروهی", cb.from_user.id)
+        + "خروجی کامل رکوردهای این دامنه را بگیرید یا فایل BIND / CSV را وارد کنید.",
+        reply_markup=kb.as_markup(),
+    )
+
+
+@callbacks.on("bulk_export")
+async def bulk_export(cb: CallbackQuery, fmt: str):
+    from .. import zonefile
+
+    uid = cb.from_user.id
+    cache = user_cache.get(uid, {})
+    zid = cache.get("curr_zone_id")
+    zone_name = cache.get("curr_zone_name", "zone")
+
+    token = get_active_token(uid)
+    if not token or not zid:
+        return await cb.answer("ابتدا یک دامنه را انتخاب کنید.", show_alert=True)
+    await cb.answer(f"{ICONS['SPINNER']} در حال آماده‌سازی فایل...")
+
+    ext = "csv" if fmt == "csv" else "txt"
+    fd, path = tempfile.mkstemp(prefix="flaredns-", suffix=f".{ext}")
+    os.close(fd)
+    try:
+        records = await load_zone_records(token, zid)
+        await asyncio.to_thread(zonefile.export_to_file, list(records), fmt, zone_name, path)
+        await cb.message.answer_document(
+            FSInputFile(path, filename=f"{zone_name}.{ext}"),
+            caption=f"{ICONS['SUCCESS']} {len(records)} رکورد از <b>{zone_name}</b>",
+        )
+    except Exception as e:
+        await cb.message.answer(f"{ICONS['ERROR']} خطا در ساخت خروجی: {e}")
+    finally:
+        os.remove(path)
+
+
+@callbacks.on("bulk_import")
+async def bulk_import_start(cb: CallbackQuery, state: FSMContext):
+    await state.set_state(BulkImport.file)
+    await cb.message.edit_text(
+        "📥 <b>فایل رکوردها را ارسال کنید:</b>\n"
+        "• فایل zone به فرمت BIND (مثلاً خروجی Cloudflare)\n"
+        "• یا فایل <code>.csv</code> با ستون‌های "
+        "<code>type,name,content,ttl,proxied,priority</code>\n\n"
+        "قبل از اعمال، خلاصه تغییرات نمایش داده می‌شود.",
+        reply_markup=back_btn("bulk_menu"),
+    )
+
+
+@router.message(BulkImport.file, F.document)
+async def bulk_import_file(m: Message, state: FSMContext):
+    from .. import zonefile
+
+    uid = m.from_user.id
+    cache = user_cache.setdefault(uid, {})
+    zid = cache.get("curr_zone_id")
+    zone_name = cache.get("curr_zone_name", "")
+    token = get_active_token(uid)
+    if not token or not zid:
+        await state.clear()
+        return await m.answer("ابتدا یک دامنه را انتخاب کنید.", reply_markup=back_btn("zones_list"))
+
+    if m.document.file_size and m.document.file_size > 20 * 1024 * 1024:
+        return await m.answer(f"{ICONS['ERROR']} حجم فایل بیشتر از 20 مگابایت است.")
+
+    await state.clear()
+    msg = await m.answer(f"{ICONS['SPINNER']} در حال بررسی فایل و مقایسه با رکوردهای فعلی...")
+
+    fmt = "csv" if (m.document.file_name or "").lower().endswith(".csv") else "bind"
+    fd, path = tempfile.mkstemp(prefix="flaredns-import-")
+    os.close(fd)
+    try:
+        await m.bot.download(m.document, destination=path)
+        records = await load_zone_records(token, zid, force=True)
+        plan = await asyncio.to_thread(zonefile.plan_from_file, path, fmt, zone_name, list(records))
+    except Exception as e:
+        return await msg.edit_text(f"{ICONS['ERROR']} خطا در خواندن فایل: {e}", reply_markup=back_btn("bulk_menu"))
+    finally:
+        os.remove(path)
+
+    cache["import_plan"] = {"zone_id": zid, "plan": plan}
+
+    kb = InlineKeyboardBuilder()
+    if plan["create"] or plan["update"]:
+        kb.button(text=f"{ICONS['CONFIRM']} اعمال (بدون حذف)", callback_data=pack("bulk_apply", "merge"))
+    if plan["extra"]:
+        kb.button(text=f"{ICONS['DELETE']} اعمال + حذف موارد اضافی", callback_data=pack("bulk_apply", "sync"))
+    kb.button(text=f"{ICONS['CANCEL']} انصراف", callback_data=zone_cb(uid, zid))
+    kb.adjust(1)
+
+    await msg.edit_text(
+        header(f"ورود به {zone_name}", uid)
+        + f"{ICONS['ADD']} رکورد جدید: {len(plan['create'])}\n"
+        f"{ICONS['EDIT']} تغییر: {len(plan['update'])}\n"
+        f"{ICONS['CONFIRM']} بدون تغییر: {plan['unchanged']}\n"
+        f"{ICONS['DELETE']} موجود در Cloudflare ولی نه در فایل: {len(plan['extra'])}\n"
+        f"{ICONS['INFO']} نادیده گرفته شده (SOA، NS ریشه، انواع پشتیبانی‌نشده): {plan['skipped']}",
+        reply_markup=kb.as_markup(),
+    )
+
+
+@router.message(BulkImport.file)
+async def bulk_import_not_file(m: Message):
+    await m.answer("لطفاً فایل را به صورت Document ارسال کنید.", reply_markup=back_btn("bulk_menu"))
+
+
+@callbacks.on("bulk_apply")
+async def bulk_apply(cb: CallbackQuery, mode: str):
+    from .. import zonefile
+
+    uid = cb.from_user.id
+    cache = user_cache.get(uid, {})
+    pending = cache.pop("import_plan", None)
+    zid = cache.get("curr_zone_id")
+    token = get_active_token(uid)
+    if not pending or pending["zone_id"] != zid or not token:
+        return await cb.answer("برنامه ورود پیدا نشد، فایل را دوباره ارسال کنید.", show_alert=True)
+
+    plan = pending["plan"]
+    ops = [{"action": "create", "payload": zonefile.to_payload(d)} for d in plan["create"]]
+    ops += [
+        {"action": "update", "id": cur["id"], "payload": zonefile.to_payload(d, cur)}
+        for cur, d in plan["update"]
+    ]
+    if mode == "sync":
+        ops += [{"action": "delete", "id": r["id"]} for r in plan["extra"]]
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال اعمال {len(ops)} تغییر...")
+
+    def progress(done: int, total: int):
+        renderer.progress(cb.message, f"{ICONS['SPINNER']} در حال اعمال تغییرات: {done}/{total}")
+
+    try:
+        result = await batch_record_ops(uid, token, zid, ops, progress)
+    except BatchInterrupted as e:
+        return await cb.message.edit_text(
+            format_ops_interrupted(e), reply_markup=back_btn(pack("zrefresh", handle_for(uid, zid)))
+        )
+
+    await cb.message.edit_text(format_ops_result(result), reply_markup=back_btn(zone_cb(uid, zid)))
+
+
+# ==================== افزودن رکورد ====================
+@callbacks.on("new_rec_type")
+async def add_step1_type(cb: CallbackQuery, state: FSMContext):
+    await state.set_state(RecordForm.type)
+    kb = InlineKeyboardBuilder()
+    for t in ["A", "AAAA", "CNAME", "TXT", "MX", "NS"]:
+        kb.button(text=f"{ICONS.get(t, ICONS['TYPE'])} {t}", callback_data=pack("settype", t))
+    kb.adjust(3)
+    kb.row(
+        InlineKeyboardButton(
+            text=f"{ICONS['CANCEL']} لغو",
+            callback_data=zone_cb(cb.from_user.id, user_cache[cb.from_user.id]["curr_zone_id"]),
+        )
+    )
+    await cb.message.edit_text("1️⃣ <b>نوع رکورد</b> را انتخاب کنید:", reply_markup=kb.as_markup())
+
+
+@callbacks.on("settype")
+async def add_step2_name(cb: CallbackQuery, rtype: str, state: FSMContext):
+    await state.update_data(type=rtype)
+    await state.set_state(RecordForm.name)
+    await cb.message.edit_text(
+        f"{ICONS['TYPE']} نوع: <b>{rtype}</b>\n\n"
+        "2️⃣ <b>نام رکورد</b> را وارد کنید:\n"
+        "برای ریشه دامنه از <code>@</code> استفاده کنید.",
+        reply_markup=None,
+    )
+
+
+@router.message(RecordForm.name)
+async def add_step3_content(m: Message, state: FSMContext):
+    await state.update_data(name=m.text.strip())
+    await state.set_state(RecordForm.content)
+    await m.answer("3️⃣ <b>مقدار (Target/IP)</b> را وارد کنید:\nمثال: <code>192.168.1.1</code>")
+
+
+@router.message(RecordForm.content)
+async def add_step4_ttl(m: Message, state: FSMContext):
+    await state.update_data(content=m.text.strip())
+    await state.set_state(RecordForm.ttl)
+    await m.answer("4️⃣ مقدار <b>TTL</b> را وارد کنید:\n(عدد 1 برای اتوماتیک)")
+
+
+@router.message(RecordForm.ttl)
+async def add_step5_proxy(m: Message, state: FSMContext):
+    ttl = 1
+    if m.text.isdigit():
+        ttl = int(m.text)
+    await state.update_data(ttl=ttl)
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['PROXIED']} روشن (Proxied)", callback_data=pack("setproxy", "true"))
+    kb.button(text=f"{ICONS['DNS_ONLY']} خاموش (DNS Only)", callback_data=pack("setproxy", "false"))
+    await state.set_state(RecordForm.proxied)
+    await m.answer("5️⃣ وضعیت <b>پروکسی (CDN)</b>:", reply_markup=kb.as_markup())
+
+
+@callbacks.on("setproxy")
+async def add_step6_finish(cb: CallbackQuery, value: str, state: FSMContext):
+    proxied = value == "true"
+    data = await state.get_data()
+    await state.clear()
+
+    zid = user_cache[cb.from_user.id]["curr_zone_id"]
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال ارسال به کلودفلر...")
+
+    payload = {
+        "type": data["type"],
+        "name": data["name"],
+        "content": data["content"],
+        "ttl": data["ttl"],
+        "proxied": proxied,
+    }
+
+    try:
+        created = await cf_request(cb.from_user.id, "POST", f"/zones/{zid}/dns_records", payload)
+        cache_record_upsert(cb.from_user.id, zid, created)
+        kb = InlineKeyboardBuilder()
+        kb.button(text="🌍 بررسی انتشار", callback_data=pack("propagate", handle_for(cb.from_user.id, created["id"])))
+        kb.button(text=f"{ICONS['BACK']} بازگشت به لیست", callback_data=zone_cb(cb.from_user.id, zid))
+        kb.adjust(1)
+        await cb.message.edit_text(
+            f"{ICONS['SUCCESS']} <b>رکورد با موفقیت ساخته شد!</b>",
+            reply_markup=kb.as_markup(),
+        )
+    except Exception as e:
+        await cb.message.edit_text(
+            f"{ICONS['ERROR']} خطا در ساخت رکورد:\n{e}",
+            reply_markup=back_btn(zone_cb(cb.from_user.id, zid)),
+        )
+
+
+# ==================== جزئیات رکورد + ویرایش دکمه‌ای ====================
+@callbacks.on("rec")
+@latest_only
+async def show_record_details(cb: CallbackQuery, handle: str, state: FSMContext):
+    await state.clear()
+
+    uid = cb.from_user.id
+    rec = get_cached_record(uid, resolve_handle(uid, handle))
+    if not rec:
+        return await cb.answer("رکورد در حافظه پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+
+    zid = user_cache[uid]["curr_zone_id"]
+
+    proxy_st = (
+        f"{ICONS['ACTIVE']} فعال (Proxied)"
+        if rec.get("proxied")
+        else f"{ICONS['DNS_ONLY']} غیرفعال (DNS Only)"
+    )
+
+    text = (
+        "<b>📋 جزئیات رکورد</b>\n"
+        "━━━━━━━━━━━━━━━━\n"
+        f"{ICONS['TYPE']} نوع: <b>{rec['type']}</b>\n"
+        f"{ICONS['NAME']} نام: <code>{rec['name']}</code>\n"
+        f"{ICONS['TARGET']} مقدار: <code>{rec['content']}</code>\n"
+        f"🛡 پروکسی: {proxy_st}\n"
+        f"{ICONS['TTL']} TTL: {rec['ttl']}"
+    )
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['EDIT']} تغییر نام", callback_data=pack("editf", "name", handle))
+    kb.button(text=f"{ICONS['EDIT']} تغییر مقدار", callback_data=pack("editf", "content", handle))
+    kb.button(text=f"{ICONS['EDIT']} تغییر TTL", callback_data=pack("editf", "ttl", handle))
+    kb.button(text=f"{ICONS['EDIT']} تغییر پروکسی", callback_data=pack("editproxy", handle))
+    kb.button(text="🌍 بررسی انتشار", callback_data=pack("propagate", handle))
+    kb.button(text=f"{ICONS['DELETE']} حذف رکورد", callback_data=pack("del_ask", handle))
+    kb.button(text=f"{ICONS['BACK']} بازگشت", callback_data=zone_cb(uid, zid))
+    kb.adjust(2, 2, 2, 1)
+
+    await cb.message.edit_text(text, reply_markup=kb.as_markup())
+
+
+# --- ویرایش تک‌فیلدی (نام / مقدار / TTL) ---
+@callbacks.on("editf")
+async def edit_field_start(cb: CallbackQuery, field: str, handle: str, state: FSMContext):
+    uid = cb.from_user.id
+    rid = resolve_handle(uid, handle)
+
+    rec = get_cached_record(uid, rid)
+    if not rec:
+        return await cb.answer("رکورد در حافظه پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+
+    zid = user_cache[uid]["curr_zone_id"]
+
+    await state.set_state(EditField.value)
+    await state.update_data(field=field, rid=rid, zid=zid, old=rec)
+
+    if field == "name":
+        prompt = (
+            f"نام فعلی: <code>{rec['name']}</code>\n"
+            "نام جدید را ارسال کنید:"
+        )
+    elif field == "content":
+        prompt = (
+            f"مقدار فعلی: <code>{rec['content']}</code>\n"
+            "مقدار جدید را ارسال کنید:"
+        )
+    elif field == "ttl":
+        prompt = (
+            f"TTL فعلی: <code>{rec['ttl']}</code>\n"
+            "TTL جدید را به صورت عدد (مثلاً 1 برای اتوماتیک) ارسال کنید:"
+        )
+    else:
+        return await cb.answer("فیلد ناشناخته.", show_alert=True)
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['CANCEL']} انصراف", callback_data=pack("rec", handle))
+    kb.adjust(1)
+
+    await cb.message.edit_text(prompt, reply_markup=kb.as_markup())
+
+
+@router.message(EditField.value)
+async def edit_field_apply(m: Message, state: FSMContext):
+    data = await state.get_data()
+    field = data["field"]
+    rid = data["rid"]
+    zid = data["zid"]
+    old = data["old"]
+    uid = m.from_user.id
+
+    new_val = m.text.strip()
+    if not new_val:
+        return await m.answer("مقدار خالی است، دوباره ارسال کنید.")
+
+    payload = {
+        "type": old["type"],
+        "name": old["name"],
+        "content": old["content"],
+        "ttl": old["ttl"],
+        "proxied": old.get("proxied", False),
+    }
+
+    if field == "name":
+        payload["name"] = new_val
+    elif field == "content":
+        payload["content"] = new_val
+    elif field == "ttl":
+        if not new_val.isdigit():
+            return await m.answer("TTL باید یک عدد باشد. دوباره ارسال کنید.")
+        payload["ttl"] = int(new_val)
+    else:
+        await state.clear()
+        return await m.answer("فیلد ناشناخته.")
+
+    await state.clear()
+    await m.answer(f"{ICONS['SPINNER']} در حال اعمال تغییر...")
+
+    try:
+        updated = await cf_request(uid, "PUT", f"/zones/{zid}/dns_records/{rid}", payload)
+        cache_record_upsert(uid, zid, updated)
+
+        handle = handle_for(uid, rid)
+        kb = InlineKeyboardBuilder()
+        kb.button(text="🌍 بررسی انتشار", callback_data=pack("propagate", handle))
+        kb.button(text=f"{ICONS['BACK']} بازگشت به جزئیات رکورد", callback_data=pack("rec", handle))
+        kb.adjust(1)
+        await m.answer(
+            f"{ICONS['SUCCESS']} تغییر با موفقیت انجام شد.",
+            reply_markup=kb.as_markup()
+        )
+    except Exception as e:
+        await m.answer(f"{ICONS['ERROR']} خطا در ویرایش: {e}")
+
+
+# --- ویرایش فقط پروکسی ---
+@callbacks.on("editproxy")
+async def edit_proxy_menu(cb: CallbackQuery, handle: str):
+    uid = cb.from_user.id
+    rec = get_cached_record(uid, resolve_handle(uid, handle))
+    if not rec:
+        return await cb.answer("رکورد در حافظه پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+
+    current = rec.get("proxied", False)
+    curr_txt = (
+        f"{ICONS['ACTIVE']} فعال (Proxied)" if current else f"{ICONS['DNS_ONLY']} غیرفعال (DNS Only)"
+    )
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['PROXIED']} روشن (Proxied)", callback_data=pack("setproxyrec", "true", handle))
+    kb.button(text=f"{ICONS['DNS_ONLY']} خاموش (DNS Only)", callback_data=pack("setproxyrec", "false", handle))
+    kb.button(text=f"{ICONS['BACK']} بازگشت", callback_data=pack("rec", handle))
+    kb.adjust(2, 1)
+
+    await cb.message.edit_text(
+        f"وضعیت فعلی پروکسی: {curr_txt}\n"
+        "وضعیت جدید را انتخاب کنید:",
+        reply_markup=kb.as_markup()
+    )
+
+
+@callbacks.on("setproxyrec")
+async def edit_proxy_apply(cb: CallbackQuery, val: str, handle: str):
+    proxied = (val == "true")
+    uid = cb.from_user.id
+    rid = resolve_handle(uid, handle)
+
+    rec = get_cached_record(uid, rid)
+    if not rec:
+        return await cb.answer("رکورد در حافظه پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+
+    zid = user_cache[uid]["curr_zone_id"]
+
+    payload = {
+        "type": rec["type"],
+        "name": rec["name"],
+        "content": rec["content"],
+        "ttl": rec["ttl"],
+        "proxied": proxied,
+    }
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال اعمال تغییر پروکسی...")
+
+    try:
+        updated = await cf_request(uid, "PUT", f"/zones/{zid}/dns_records/{rid}", payload)
+        cache_record_upsert(uid, zid, updated)
+
+        await cb.message.edit_text(
+            f"{ICONS['SUCCESS']} پروکسی با موفقیت تغییر کرد.",
+            reply_markup=back_btn(pack("rec", handle))
+        )
+    except Exception as e:
+        await cb.message.edit_text(
+            f"{ICONS['ERROR']} خطا در تغییر پروکسی: {e}",
+            reply_markup=back_btn(pack("rec", handle))
+        )
+
+
+# --- حذف رکورد ---
+@callbacks.on("del_ask")
+async def delete_ask(cb: CallbackQuery, handle: str):
+    kb = InlineKeyboardBuilder()
+    kb.button(text=f"{ICONS['CONFIRM']} بله، حذف کن", callback_data=pack("del_confirm", handle))
+    kb.button(text=f"{ICONS['CANCEL']} خیر", callback_data=pack("rec", handle))
+    kb.adjust(2)
+    await cb.message.edit_text("⚠️ <b>آیا از حذف این رکورد مطمئن هستید؟</b>", reply_markup=kb.as_markup())
+
+
+@callbacks.on("del_confirm")
+async def delete_confirm(cb: CallbackQuery, handle: str):
+    uid = cb.from_user.id
+    rid = resolve_handle(uid, handle)
+    if rid is None:
+        return await cb.answer("رکورد پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+    zid = user_cache[uid]["curr_zone_id"]
+    try:
+        await cf_request(uid, "DELETE", f"/zones/{zid}/dns_records/{rid}")
+        cache_record_remove(uid, zid, rid)
+        await cb.message.edit_text(
+            f"{ICONS['DELETE']} رکورد با موفقیت حذف شد.",
+            reply_markup=back_btn(zone_cb(uid, zid)),
+        )
+    except Exception as e:
+        await cb.message.edit_text(
+            f"{ICONS['ERROR']} خطا: {e}",
+            reply_markup=back_btn(zone_cb(uid, zid)),
+        )
+
+
+# ==================== بررسی انتشار ====================
+# گزارش در یک پیام جدا ساخته و زنده به‌روز می‌شود تا ادمین بتواند در همین حین با منوها کار کند.
+# بررسی در پس‌زمینه اجرا می‌شود (نه داخل هندلر) تا در حالت webhook یک worker چند دقیقه اشغال نماند.
+_propagation_checks: dict[tuple[int, str], asyncio.Task] = {}
+
+
+def format_propagation(rec: dict, results: dict, rounds: int, done: bool | None = None) -> str:
+    # done: None = در حال بررسی، True = همه هم‌گرا شدند، False = timeout
+    live = sum(1 for r in results.values() if r[2])
+    lines = [
+        "<b>🌍 بررسی انتشار رکورد</b>",
+        f"{rec['type']} <code>{html.escape(rec['name'])}</code>",
+        f"مقدار مورد انتظار: <code>{html.escape(rec['content'])}</code>"
+        if not rec.get("proxied") else "پروکسی روشن است؛ فقط resolve شدن نام (IP های کلودفلر) بررسی می‌شود.",
+        "━━━━━━━━━━━━━━━━",
+    ]
+    for label, (status, answers, ok) in results.items():
+        if ok:
+            icon = "✅"
+        elif status in ("ok", "NXDOMAIN", "…"):
+            icon = ICONS["SPINNER"] if done is None else "❌"
+        else:
+            icon = "⚠️"
+        shown = ", ".join(answers[:4]) + (f" (+{len(answers) - 4})" if len(answers) > 4 else "")
+        detail = shown if status == "ok" and answers else ("بدون پاسخ" if status == "ok" else status)
+        lines.append(f"{icon} {html.escape(label)}: <code>{html.escape(detail)}</code>")
+    lines.append("━━━━━━━━━━━━━━━━")
+    lines.append(f"{live}/{len(results)} resolver مقدار جدید را دارند · دور {rounds}")
+    if done is True:
+        lines.append(f"{ICONS['SUCCESS']} رکورد روی همه resolver ها منتشر شده است.")
+    elif done is False:
+        lines.append(f"⌛ پس از {PROPAGATION_TIMEOUT} ثانیه هنوز همه resolver ها هم‌گرا نشده‌اند (کش TTL قبلی).")
+    return "\n".join(lines)
+
+
+async def run_propagation_check(uid: int, handle: str, rec: dict, msg: Message):
+    from .. import dnscheck
+
+    try:
+        results, rounds, converged = await dnscheck.watch(
+            get_resolver_pool(), DNS_RESOLVERS, rec, PROPAGATION_INTERVAL, PROPAGATION_TIMEOUT,
+            lambda results, rounds: renderer.progress(msg, format_propagation(rec, results, rounds)),
+        )
+        kb = InlineKeyboardBuilder()
+        kb.button(text="🔄 بررسی دوباره", callback_data=pack("propagate", handle))
+        kb.button(text=f"{ICONS['BACK']} جزئیات رکورد", callback_data=pack("rec", handle))
+        kb.adjust(2)
+        await msg.edit_text(format_propagation(rec, results, rounds, converged), reply_markup=kb.as_markup())
+    except Exception as e:
+        await msg.edit_text(f"{ICONS['ERROR']} خطا در بررسی انتشار: {e}", reply_markup=back_btn(pack("rec", handle)))
+    finally:
+        _propagation_checks.pop((uid, rec["id"]), None)
+
+
+@callbacks.on("propagate")
+async def propagation_check(cb: CallbackQuery, handle: str):
+    uid = cb.from_user.id
+    rec = get_cached_record(uid, resolve_handle(uid, handle))
+    if not rec:
+        return await cb.answer("رکورد در حافظه پیدا نشد، لیست را رفرش کنید.", show_alert=True)
+    if not DNS_RESOLVERS:
+        return await cb.answer("هیچ resolver ی در DNS_RESOLVERS تنظیم نشده است.", show_alert=True)
+
+    key = (uid, rec["id"])
+    if key in _propagation_checks:
+        return await cb.answer("بررسی انتشار این رکورد در جریان است.", show_alert=False)
+
+    await cb.answer()
+    msg = await cb.message.answer(f"{ICONS['SPINNER']} در حال پرسیدن از {len(DNS_RESOLVERS)} resolver...")
+    _propagation_checks[key] = asyncio.create_task(run_propagation_check(uid, handle, dict(rec), msg))
@@ -0,0 +1,161 @@
+# ==================== روتر آمار ====================
+# آمار کلی همه اکانت‌ها (تعداد کل دامنه‌ها، فعال و در انتظار) و /perf برای متریک‌های عملکرد
+import html
+import time
+import asyncio
+from aiogram import Router
+from aiogram.types import Message, CallbackQuery
+from aiogram.filters import Command
+
+from ..callbacks import CallbackTable
+from ..settings import ICONS, METRICS_HOST, METRICS_PORT, STATS_ACCOUNT_TIMEOUT, STATS_CONCURRENCY, STATS_EDIT_INTERVAL
+from ..core import (
+    TokenUnavailable, back_btn, cf_cache, cf_client, header, is_admin, latest_only, perf, renderer, visible_accounts,
+)
+
+router = Router(name="stats")
+callbacks = CallbackTable(router)
+
+
+# ==================== آمار پیشرفته ====================
+async def fetch_account_stats(name: str, token: str, sem: asyncio.Semaphore) -> tuple[str, str, dict | None]:
+    # خروجی: (نام، وضعیت، آمار) — وضعیت یکی از ok / invalid / timeout / error
+    # فقط total_count از result_info لازم است، پس به جای گرفتن همه صفحات، دو درخواست کوچک کافی است
+    async with sem:
+        try:
+            res_all, res_active = await asyncio.wait_for(
+                asyncio.gather(
+                    cf_client.request(token, "GET", "/zones?per_page=5"),
+                    cf_client.request(token, "GET", "/zones?status=active&per_page=5"),
+                ),
+                timeout=STATS_ACCOUNT_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            return name, "timeout", None
+        except TokenUnavailable:
+            # breaker توکن باز است؛ بدون درخواست به Cloudflare
+            return name, "invalid", None
+        except Exception:
+            return name, "error", None
+
+    if not res_all.get("success") or not res_active.get("success"):
+        return name, "invalid", None
+
+    count = (res_all.get("result_info") or {}).get("total_count", len(res_all["result"]))
+    active_z = (res_active.get("result_info") or {}).get("total_count", len(res_active["result"]))
+    return name, "ok", {"count": count, "active": active_z, "pending": count - active_z}
+
+
+def render_stats_report(user_id: int, names: list[str], results: dict, done: bool) -> str:
+    report = ""
+    total_zones = 0
+    total_active = 0
+    total_pending = 0
+
+    for name in names:
+        if name not in results:
+            report += f"🔹 <b>{name}:</b> {ICONS['SPINNER']} در حال دریافت...\n\n"
+            continue
+        status, st = results[name]
+        if status == "ok":
+            total_zones += st["count"]
+            total_active += st["active"]
+            total_pending += st["pending"]
+            report += (
+                f"🔹 <b>{name}:</b>\n"
+                f"   ├ کل دامنه‌ها: {st['count']}\n"
+                f"   ├ {ICONS['ACTIVE']} فعال: {st['active']}\n"
+                f"   └ {ICONS['PENDING']} در انتظار: {st['pending']}\n\n"
+            )
+        elif status == "invalid":
+            report += f"🔹 <b>{name}:</b> {ICONS['ERROR']} توکن منقضی/نامعتبر\n\n"
+        elif status == "timeout":
+            report += f"🔹 <b>{name}:</b> {ICONS['ERROR']} پاسخی دریافت نشد (timeout)\n\n"
+        else:
+            report += f"🔹 <b>{name}:</b> {ICONS['ERROR']} خطا در اتصال\n\n"
+
+    progress = "" if done else f"{ICONS['SPINNER']} دریافت شده: {len(results)}/{len(names)}\n"
+    return (
+        header("گزارش جامع", user_id)
+        + f"📈 <b>خلاصه وضعیت:</b>\n"
+        f"👥 تعداد اکانت‌ها: {len(names)}\n"
+        f"🌍 مجموع دامنه‌ها: {total_zones}\n"
+        f"{ICONS['ACTIVE']} مجموع فعال: {total_active}\n"
+        f"{ICONS['WARNING']} مجموع در انتظار: {total_pending}\n"
+        + progress
+        + "━━━━━━━━━━━━━━━━\n"
+        + report
+    )
+
+
+@callbacks.on("global_stats")
+@latest_only
+async def global_stats(cb: CallbackQuery):
+    accounts = visible_accounts(cb.from_user.id)
+    if not accounts:
+        return await cb.answer("هیچ اکانتی وجود ندارد.", show_alert=True)
+
+    await cb.message.edit_text(f"{ICONS['SPINNER']} در حال دریافت اطلاعات...")
+
+    names = list(accounts.keys())
+    results: dict[str, tuple[str, dict | None]] = {}
+    sem = asyncio.Semaphore(STATS_CONCURRENCY)
+    tasks = [asyncio.create_task(fetch_account_stats(n, t, sem)) for n, t in accounts.items()]
+
+    # نتایج به محض رسیدن در پیام نمایش داده می‌شوند، ولی حداکثر هر STATS_EDIT_INTERVAL ثانیه یک ویرایش
+    try:
+        for fut in asyncio.as_completed(tasks):
+            name, status, st = await fut
+            results[name] = (status, st)
+            if len(results) < len(names):
+                renderer.progress(
+                    cb.message, render_stats_report(cb.from_user.id, names, results, done=False),
+                    interval=STATS_EDIT_INTERVAL,
+                )
+    finally:
+        # اگر کاربر در این فاصله جای دیگری رفته باشد (latest_only)، بقیه درخواست‌ها لازم نیست
+        for t in tasks:
+            t.cancel()
+
+    txt = render_stats_report(cb.from_user.id, names, results, done=True)
+    await cb.message.edit_text(txt, reply_markup=back_btn())
+
+
+def _perf_lines(name: str, n: int = 6) -> list[str]:
+    lines = []
+    for labels, h in perf.top(name, n):
+        lines.append(
+            f"<code>{html.escape(' '.join(labels))}</code>\n"
+            f"     {h.count}× | avg {h.sum / h.count * 1000:.0f}ms | "
+            f"p50 {h.quantile(0.5) * 1000:.0f}ms | p99 {h.quantile(0.99) * 1000:.0f}ms"
+        )
+    return lines or ["—"]
+
+
+@router.message(Command("perf"))
+async def cmd_perf(m: Message):
+    if not is_admin(m.from_user.id):
+        return
+    if not perf.enabled:
+        await m.answer("📉 متریک‌ها غیرفعال است (<code>METRICS_ENABLED = False</code>).")
+        return
+
+    errors = sum(perf.series("flaredns_cf_errors_total").values())
+    retries = sum(perf.series("flaredns_cf_retries_total").values())
+    snap = perf.series("flaredns_snapshot_reads_total")
+    uptime = int(time.time() - perf.started)
+    text = (
+        "📈 <b>عملکرد ربات</b>\n"
+        f"⏱ uptime: {uptime // 3600}h {uptime % 3600 // 60}m\n"
+        "━━━━━━━━━━━━━━━━\n"
+        "<b>☁️ Cloudflare API</b> (پرهزینه‌ترین‌ها)\n" + "\n".join(_perf_lines("flaredns_cf_request_seconds")) + "\n"
+        f"❌ خطا: {errors:g} | 🔁 تلاش مجدد: {retries:g}\n\n"
+        "<b>🤖 هندلرها</b>\n" + "\n".join(_perf_lines("flaredns_handler_seconds")) + "\n\n"
+        "<b>✈️ Telegram API</b>\n" + "\n".join(_perf_lines("flaredns_telegram_request_seconds", 4)) + "\n\n"
+        f"🗃 کش: {cf_cache.hit_ratio():.0%} hit ({cf_cache.hits}/{cf_cache.hits + cf_cache.misses}) | "
+        f"{len(cf_cache._data)} آیتم\n"
+        f"💾 اسنپ‌شات: {snap.get(('hit',), 0):g} hit / {snap.get(('miss',), 0):g} miss"
+    )
+    if METRICS_PORT:
+        text += f"\n\n🔗 <code>http://{METRICS_HOST}:{METRICS_PORT}/metrics</code>"
+    await m.answer(text)
@@ -0,0 +1,119 @@
+# ==================== روتر دامنه‌ها ====================
+# لیست صفحه‌بندی‌شده دامنه‌های اکانت فعال؛ از اسنپ‌شات، کش یا بارگذاری صفحه به صفحه از Cloudflare
+from aiogram import Router
+from aiogram.types import CallbackQuery, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..callbacks import CallbackTable, pack
+from ..settings import ICONS, CF_ZONES_PER_PAGE
+from ..core import (
+    CFPages, IndexedList, TokenUnavailable, back_btn, cf_cache, get_active_token, header, latest_only, snapshot_zones,
+    user_cache, zone_cb, zones_loading,
+)
+
+router = Router(name="zones")
+callbacks = CallbackTable(router)
+
+
+# ==================== لیست دامنه‌ها ====================
+@callbacks.on("zones_list", "zones_refresh")
+@latest_only
+async def list_zones_start(cb: CallbackQuery):
+    token = get_active_token(cb.from_user.id)
+    try:
+        if not token:
+            raise Exception("NO_ACCOUNT_SELECTED")
+
+        if cb.data != "zones_refresh":
+            zones = cf_cache.get(("zones", token))
+            if zones is None:
+                zones = await snapshot_zones(user_cache.get(cb.from_user.id, {}).get("active_acc"), token)
+            if zones is not None:
+                user_cache.setdefault(cb.from_user.id, {})["zones"] = zones
+                return await render_zones_page(cb, 0)
+
+        # تا رسیدن صفحه آخر، لیست فقط در zones_loading است تا کاربر صفحه‌های رسیده را ورق بزند؛
+        # سشن و cf_cache فقط لیست کامل را می‌گیرند و اگر بارگذاری لغو شود یا خطا بدهد، چیزی از آن باقی نمی‌ماند.
+        uid = cb.from_user.id
+        zones = IndexedList()
+        user_cache.setdefault(uid, {})["zone_page"] = 0
+        pages = CFPages(token, "/zones", CF_ZONES_PER_PAGE)
+        try:
+            async for chunk in pages:
+                zones.extend(chunk)
+                zones_loading[uid] = (zones, pages.total_count)
+                # صفحه اول را بلافاصله نشان بده؛ بقیه صفحات در پس‌زمینه به همین لیست اضافه می‌شوند
+                if len(zones) == len(chunk) and pages.total_pages > 1:
+                    await render_zones_page(cb, 0)
+        finally:
+            if zones_loading.get(uid, (None,))[0] is zones:
+                del zones_loading[uid]
+        user_cache[uid]["zones"] = zones
+        cf_cache.set(("zones", token), zones)
+        # کاربر ممکن است در این فاصله صفحه را عوض کرده باشد
+        await render_zones_page(cb, user_cache[uid].get("zone_page", 0))
+    except Exception as e:
+        if "NO_ACCOUNT_SELECTED" in str(e):
+            await cb.message.edit_text(
+                "⚠️ هنوز اکانتی انتخاب نکرده‌اید.\nلطفاً یک اکانت را انتخاب کنید:",
+                reply_markup=back_btn("acc_manage"),
+            )
+        elif isinstance(e, TokenUnavailable):
+            await cb.message.edit_text(f"{ICONS['ERROR']} {e}", reply_markup=back_btn("acc_manage"))
+        else:
+            await cb.message.edit_text(f"{ICONS['ERROR']} خطا: {e}", reply_markup=back_btn())
+
+
+async def render_zones_page(cb: CallbackQuery, page: int):
+    loading = zones_loading.get(cb.from_user.id)
+    zones = loading[0] if loading else user_cache.get(cb.from_user.id, {}).get("zones", [])
+    if not zones:
+        return await cb.message.edit_text(
+            header("دامنه‌ها", cb.from_user.id) + "❌ هیچ دامنه‌ای در این اکانت یافت نشد.",
+            reply_markup=back_btn(),
+        )
+
+    per_page = 6
+    max_page = (len(zones) - 1) // per_page
+    page = min(page, max_page)
+    user_cache[cb.from_user.id]["zone_page"] = page
+    start = page * per_page
+    end = start + per_page
+    slice_z = zones[start:end]
+
+    kb = InlineKeyboardBuilder()
+    for z in slice_z:
+        status_icon = "🟢" if z["status"] == "active" else "🟠"
+        kb.button(text=f"{status_icon} {z['name']}", callback_data=zone_cb(cb.from_user.id, z["id"]))
+    kb.adjust(1)
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀️ قبلی", callback_data=pack("zpage", page - 1)))
+    nav.append(InlineKeyboardButton(text=f"{page+1}/{max_page+1}", callback_data="noop"))
+    if end < len(zones):
+        nav.append(InlineKeyboardButton(text="بعدی ▶️", callback_data=pack("zpage", page + 1)))
+    if nav:
+        kb.row(*nav)
+
+    kb.row(
+        InlineKeyboardButton(text=f"{ICONS['REFRESH']} رفرش", callback_data="zones_refresh"),
+        InlineKeyboardButton(text=f"{ICONS['BACK']} منوی اصلی", callback_data="home"),
+    )
+
+    text = header("انتخاب دامنه", cb.from_user.id) + "دامنه مورد نظر را انتخاب کنید:"
+    if loading:
+        text += f"\n{ICONS['SPINNER']} دریافت شده: {len(zones)}/{loading[1]} دامنه"
+    await cb.message.edit_text(text, reply_markup=kb.as_markup())
+
+
+# ورق زدن latest_only ندارد تا بارگذاری صفحه‌های بعدی دامنه‌ها را لغو نکند
+@callbacks.on("zpage")
+async def zone_pagination(cb: CallbackQuery, page: str):
+    await render_zones_page(cb, int(page))
+
+
+@callbacks.on("noop")
+async def noop(cb: CallbackQuery):
+    # دکمه شماره صفحه
+    await cb.answer()
@@ -0,0 +1,62 @@
+# ==================== سلامت توکن‌ها ====================
+# همه توکن‌های accounts.json هم‌زمان با /user/tokens/verify بررسی می‌شوند و نتیجه در core.token_health می‌نشیند؛
+# توکن مرده breaker خودش را باز می‌کند تا هندلرها به جای انتظار برای خطا فوراً پیام بدهند.
+# worker فقط وقتی TOKEN_CHECK_INTERVAL > 0 باشد بالا می‌آید؛ دکمه «بررسی توکن‌ها» هم از همین ماژول استفاده می‌کند.
+import html
+import asyncio
+from aiogram import Bot
+
+from .settings import ICONS, TOKEN_CHECK_CONCURRENCY, TOKEN_CHECK_INTERVAL, TOKEN_CHECK_NOTIFY
+from .core import DEAD_TOKEN_STATUSES, account_audience, load_accounts, token_health, verify_token
+
+# بررسی‌های هم‌زمان (worker و دکمه چند کاربر) یک دور مشترک دارند
+_round: asyncio.Task | None = None
+
+
+async def check_tokens(tokens) -> dict[str, dict]:
+    sem = asyncio.Semaphore(TOKEN_CHECK_CONCURRENCY)
+
+    async def check(token: str) -> tuple[str, dict]:
+        async with sem:
+            return token, await verify_token(token)
+
+    return dict(await asyncio.gather(*(check(t) for t in set(tokens))))
+
+
+async def _check_accounts(bot: Bot | None):
+    accounts = dict(load_accounts())
+    before = {name: token_health.get(token)["status"] for name, token in accounts.items()}
+    results = await check_tokens(accounts.values())
+    if bot is None or not TOKEN_CHECK_NOTIFY:
+        return
+    for name, token in accounts.items():
+        status = results[token]["status"]
+        if status not in DEAD_TOKEN_STATUSES or before[name] in DEAD_TOKEN_STATUSES:
+            continue
+        text = (
+            f"{ICONS['ERROR']} <b>توکن اکانت <code>{html.escape(name)}</code> از کار افتاده است</b> ({status})\n"
+            "درخواست‌های این اکانت تا اضافه شدن توکن تازه انجام نمی‌شوند."
+        )
+        for uid in account_audience(name):
+            try:
+                await bot.send_message(uid, text)
+            except Exception as e:
+                print(f"⚠️ token health notification to {uid} failed: {e}")
+
+
+async def check_accounts(bot: Bot | None = None):
+    global _round
+    if _round is None or _round.done():
+        _round = asyncio.create_task(_check_accounts(bot))
+    await asyncio.shield(_round)
+
+
+async def health_worker(bot: Bot):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        try:
+            await check_accounts(bot)
+        except Exception as e:
+            print(f"⚠️ token health check failed: {e}")
+        await asyncio.sleep(max(TOKEN_CHECK_INTERVAL - (loop.time() - started), 1))
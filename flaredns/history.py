@@ -0,0 +1,261 @@
+# ==================== تاریخچه نسخه‌دار زون‌ها ====================
+# هر تغییر مجموعه رکوردهای یک زون یک نسخه است. نسخه‌ها به صورت delta نسبت به نسخه قبلی
+# ({"u": رکوردهای جدید/تغییرکرده، "d": id های حذف‌شده}) و هر HISTORY_FULL_EVERY نسخه یک بار به صورت کامل
+# ذخیره می‌شوند؛ همه با zlib فشرده و فقط با فیلدهای لازم برای بازگردانی (بدون modified_on و ...).
+# وضعیت هر نسخه = نزدیک‌ترین نسخه کامل قبلی + delta های بعد از آن.
+# متدها همگام (sync) هستند و از داخل ربات با asyncio.to_thread صدا زده می‌شوند.
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .snapshots import record_signature
+
+KEEP_FIELDS = ("id", "type", "name", "content", "ttl", "proxied", "priority", "comment")
+HEAD_CACHE = 64
+
+
+def _slim(r: dict) -> dict:
+    return {f: r[f] for f in KEEP_FIELDS if r.get(f) is not None}
+
+
+def _pack(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode(), 9)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+def diff_states(old: dict[str, dict], new: dict[str, dict]) -> dict:
+    # هم‌شکل خروجی SnapshotStore.apply_records. رکوردی که با id تازه ولی همان محتوا دوباره ساخته شده
+    # (مثلاً با بازگردانی) تغییر حساب نمی‌شود.
+    added = [r for rid, r in new.items() if rid not in old]
+    removed = [r for rid, r in old.items() if rid not in new]
+    if added and removed:
+        gone: dict[tuple, list[dict]] = {}
+        for r in removed:
+            gone.setdefault(record_signature(r), []).append(r)
+        kept = []
+        for r in added:
+            twins = gone.get(record_signature(r))
+            if twins:
+                twins.pop()
+            else:
+                kept.append(r)
+        added = kept
+        removed = [r for twins in gone.values() for r in twins]
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": [
+            (old[rid], r) for rid, r in new.items()
+            if rid in old and record_signature(old[rid]) != record_signature(r)
+        ],
+    }
+
+
+class HistoryStore:
+    def __init__(self, path: str, full_every: int = 32, max_versions: int = 500):
+        self.path = path
+        self.full_every = full_every
+        self.max_versions = max_versions
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        # zone_id ➜ (آخرین نسخه، وضعیت آن، نسخه‌های بعد از آخرین نسخه کامل)
+        self._heads: OrderedDict[str, tuple[int, dict[str, dict], int]] = OrderedDict()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS versions (
+                    zone_id    TEXT NOT NULL,
+                    version    INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    source     TEXT NOT NULL,
+                    full       INTEGER NOT NULL,
+                    records    INTEGER NOT NULL,
+                    added      INTEGER NOT NULL,
+                    removed    INTEGER NOT NULL,
+                    changed    INTEGER NOT NULL,
+                    data       BLOB NOT NULL,
+                    PRIMARY KEY (zone_id, version)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS versions_time ON versions (zone_id, created_at);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._heads.clear()
+
+    # --- بازسازی وضعیت ---
+    def _state_at(self, db: sqlite3.Connection, zone_id: str, version: int) -> tuple[dict[str, dict], int] | None:
+        # خروجی: (وضعیت، تعداد delta های بعد از نسخه کامل) یا None اگر نسخه‌ای نباشد
+        row = db.execute(
+            "SELECT version FROM versions WHERE zone_id = ? AND full = 1 AND version <= ? ORDER BY version DESC LIMIT 1",
+            (zone_id, version),
+        ).fetchone()
+        if row is None:
+            return None
+        state: dict[str, dict] = {}
+        chain = -1
+        for full, blob in db.execute(
+            "SELECT full, data FROM versions WHERE zone_id = ? AND version BETWEEN ? AND ? ORDER BY version",
+            (zone_id, row[0], version),
+        ):
+            data = _unpack(blob)
+            if full:
+                state = {r["id"]: r for r in data["r"]}
+            else:
+                for rid in data["d"]:
+                    state.pop(rid, None)
+                for r in data["u"]:
+                    state[r["id"]] = r
+            chain += 1
+        return state, chain
+
+    def _head(self, db: sqlite3.Connection, zone_id: str) -> tuple[int, dict[str, dict], int] | None:
+        head = self._heads.get(zone_id)
+        if head is not None:
+            self._heads.move_to_end(zone_id)
+            return head
+        row = db.execute("SELECT MAX(version) FROM versions WHERE zone_id = ?", (zone_id,)).fetchone()
+        if row[0] is None:
+            return None
+        state, chain = self._state_at(db, zone_id, row[0])
+        return self._remember(zone_id, (row[0], state, chain))
+
+    def _remember(self, zone_id: str, head: tuple) -> tuple:
+        self._heads[zone_id] = head
+        self._heads.move_to_end(zone_id)
+        while len(self._heads) > HEAD_CACHE:
+            self._heads.popitem(last=False)
+        return head
+
+    # --- ثبت نسخه ---
+    def _commit(self, db: sqlite3.Connection, zone_id: str, head, new: dict[str, dict], source: str) -> int | None:
+        old = head[1] if head else {}
+        diff = diff_states(old, new)
+        if head is not None and not (diff["added"] or diff["removed"] or diff["changed"]):
+            return None
+        version = head[0] + 1 if head else 1
+        chain = head[2] + 1 if head else 0
+        if head is None or chain >= self.full_every:
+            data, chain = {"r": list(new.values())}, 0
+        else:
+            data = {"u": diff["added"] + [n for _, n in diff["changed"]], "d": [r["id"] for r in diff["removed"]]}
+        with db:
+            db.execute(
+                "INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (zone_id, version, time.time(), source, 1 if chain == 0 else 0, len(new),
+                 len(diff["added"]), len(diff["removed"]), len(diff["changed"]), _pack(data)),
+            )
+        self._remember(zone_id, (version, new, chain))
+        # حذف نسخه‌های قدیمی دسته‌ای انجام می‌شود، نه با هر نسخه جدید
+        oldest = db.execute("SELECT MIN(version) FROM versions WHERE zone_id = ?", (zone_id,)).fetchone()[0]
+        if version - oldest + 1 > self.max_versions + self.full_every:
+            self._prune(db, zone_id, version - self.max_versions + 1)
+        return version
+
+    def record(self, zone_id: str, records: list[dict], source: str) -> int | None:
+        # مجموعه کامل رکوردهای زون؛ فقط اگر با آخرین نسخه فرق داشته باشد نسخه جدید ثبت می‌شود
+        new = {r["id"]: _slim(r) for r in records}
+        with self._lock:
+            db = self._db()
+            return self._commit(db, zone_id, self._head(db, zone_id), new, source)
+
+    def record_changes(self, zone_id: str, upserts: list[dict], deletes: list[str], source: str,
+                       records: list[dict] | None = None) -> int | None:
+        # تغییرات تکی روی آخرین نسخه؛ اگر زون هنوز نسخه‌ای ندارد، records (وضعیت کامل فعلی) پایه می‌شود
+        with self._lock:
+            db = self._db()
+            head = self._head(db, zone_id)
+            if head is None:
+                if records is None:
+                    return None
+                new = {r["id"]: _slim(r) for r in records}
+            else:
+                new = dict(head[1])
+                for rid in deletes:
+                    new.pop(rid, None)
+                for r in upserts:
+                    new[r["id"]] = _slim(r)
+            return self._commit(db, zone_id, head, new, source)
+
+    def _prune(self, db: sqlite3.Connection, zone_id: str, keep_from: int):
+        # قدیمی‌ترین نسخه باقی‌مانده به نسخه کامل تبدیل می‌شود تا زنجیره delta بدون نسخه‌های حذف‌شده کار کند
+        state, chain = self._state_at(db, zone_id, keep_from)
+        with db:
+            if chain:
+                db.execute(
+                    "UPDATE versions SET full = 1, data = ? WHERE zone_id = ? AND version = ?",
+                    (_pack({"r": list(state.values())}), zone_id, keep_from),
+                )
+            db.execute("DELETE FROM versions WHERE zone_id = ? AND version < ?", (zone_id, keep_from))
+
+    # --- خواندن ---
+    def versions(self, zone_id: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        # جدیدترین‌ها اول؛ خروجی: (نسخه‌ها، تعداد کل)
+        with self._lock:
+            db = self._db()
+            total = db.execute("SELECT COUNT(*) FROM versions WHERE zone_id = ?", (zone_id,)).fetchone()[0]
+            rows = db.execute(
+                "SELECT version, created_at, source, records, added, removed, changed FROM versions "
+                "WHERE zone_id = ? ORDER BY version DESC LIMIT ? OFFSET ?",
+                (zone_id, limit, offset),
+            ).fetchall()
+        keys = ("version", "created_at", "source", "records", "added", "removed", "changed")
+        return [dict(zip(keys, row)) for row in rows], total
+
+    def version_info(self, zone_id: str, version: int) -> dict | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT version, created_at, source, records, added, removed, changed FROM versions "
+                "WHERE zone_id = ? AND version = ?",
+                (zone_id, version),
+            ).fetchone()
+        keys = ("version", "created_at", "source", "records", "added", "removed", "changed")
+        return dict(zip(keys, row)) if row else None
+
+    def version_at(self, zone_id: str, ts: float) -> int | None:
+        # آخرین نسخه‌ای که تا لحظه ts ثبت شده بود
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MAX(version) FROM versions WHERE zone_id = ? AND created_at <= ?", (zone_id, ts)
+            ).fetchone()
+        return row[0]
+
+    def state(self, zone_id: str, version: int) -> list[dict] | None:
+        with self._lock:
+            found = self._state_at(self._db(), zone_id, version)
+        return list(found[0].values()) if found else None
+
+    def diff(self, zone_id: str, v1: int, v2: int) -> dict | None:
+        # تغییرات از v1 تا v2 (v1 = 0 یعنی زون خالی)
+        with self._lock:
+            db = self._db()
+            old = self._state_at(db, zone_id, v1) if v1 else ({}, 0)
+            new = self._state_at(db, zone_id, v2)
+        if old is None or new is None:
+            return None
+        return diff_states(old[0], new[0])
+
+    def summary(self) -> tuple[int, int, int]:
+        # تعداد زون‌ها، تعداد نسخه‌ها و حجم فشرده داده‌ها (بایت)
+        with self._lock:
+            row = self._db().execute(
+                "SELECT COUNT(DISTINCT zone_id), COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM versions"
+            ).fetchone()
+        return row
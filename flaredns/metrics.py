@@ -0,0 +1,151 @@
+# ==================== متریک‌ها (سبک Prometheus) ====================
+# شمارنده‌ها و هیستوگرام‌های ساده در حافظه، خروجی متنی Prometheus روی /metrics و خلاصه برای /perf.
+# وقتی enabled خاموش باشد همه متدها بلافاصله برمی‌گردند.
+import bisect
+import re
+import time
+from typing import Callable
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ID_SEGMENT = re.compile(r"^(?=.*\d)[0-9A-Za-z]{16,}$")
+
+
+def endpoint_template(endpoint: str) -> str:
+    # /zones/<id>/dns_records/<id>?page=2 ➜ /zones/:id/dns_records/:id
+    path = endpoint.split("?", 1)[0]
+    return "/".join(":id" if _ID_SEGMENT.match(seg) else seg for seg in path.split("/"))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def callback_prefix(data: str | None) -> str:
+    # zone:<handle> ➜ zone ، editf:ttl:<handle> ➜ editf ، home ➜ home
+    if not data:
+        return "-"
+    return data.partition(":")[0][:32]
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # تخمین با درون‌یابی خطی داخل باکت؛ برای /perf کافی است
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._help: dict[str, str] = {}
+        self._hist: dict[str, dict[tuple, Histogram]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._labels: dict[str, tuple[str, ...]] = {}
+        self._gauges: dict[str, Callable[[], dict[tuple, float]]] = {}
+        self.started = time.time()
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...]):
+        self._help[name] = help
+        self._labels[name] = labels
+        self._hist[name] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...]):
+        self._help[name] = help
+        self._labels[name] = labels
+        self._counters[name] = {}
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...], fn: Callable[[], dict[tuple, float]]):
+        # مقدار gauge هنگام خروجی گرفتن از fn خوانده می‌شود
+        self._help[name] = help
+        self._labels[name] = labels
+        self._gauges[name] = fn
+
+    def observe(self, name: str, labels: tuple, value: float):
+        if not self.enabled:
+            return
+        series = self._hist[name]
+        h = series.get(labels)
+        if h is None:
+            h = series[labels] = Histogram()
+        h.observe(value)
+
+    def inc(self, name: str, labels: tuple, amount: float = 1):
+        if not self.enabled:
+            return
+        series = self._counters[name]
+        series[labels] = series.get(labels, 0) + amount
+
+    def series(self, name: str) -> dict:
+        return self._hist.get(name) or self._counters.get(name) or {}
+
+    # --- خروجی ---
+    def _fmt_labels(self, name: str, values: tuple, le: str | None = None) -> str:
+        pairs = list(zip(self._labels[name], values))
+        if le is not None:
+            pairs.append(("le", le))
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> str:
+        out: list[str] = []
+        for name, series in self._counters.items():
+            out += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} counter"]
+            for labels, value in series.items():
+                out.append(f"{name}{self._fmt_labels(name, labels)} {value:g}")
+        for name, fn in self._gauges.items():
+            out += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} gauge"]
+            for labels, value in fn().items():
+                out.append(f"{name}{self._fmt_labels(name, labels)} {value:g}")
+        for name, series in self._hist.items():
+            out += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} histogram"]
+            for labels, h in series.items():
+                cumulative = 0
+                for bound, c in zip(BUCKETS, h.counts):
+                    cumulative += c
+                    out.append(f"{name}_bucket{self._fmt_labels(name, labels, f'{bound:g}')} {cumulative}")
+                out.append(f"{name}_bucket{self._fmt_labels(name, labels, '+Inf')} {h.count}")
+                out.append(f"{name}_sum{self._fmt_labels(name, labels)} {h.sum:.6f}")
+                out.append(f"{name}_count{self._fmt_labels(name, labels)} {h.count}")
+        return "\n".join(out) + "\n"
+
+    def top(self, name: str, n: int = 8) -> list[tuple[tuple, Histogram]]:
+        # پرهزینه‌ترین سری‌ها بر اساس مجموع زمان
+        return sorted(self._hist.get(name, {}).items(), key=lambda kv: kv[1].sum, reverse=True)[:n]
+
+    # --- سرور /metrics ---
+    async def serve(self, host: str, port: int):
+        # aiohttp.web فقط وقتی METRICS_PORT تنظیم شده باشد بارگذاری می‌شود
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
@@ -0,0 +1,143 @@
+# ==================== لایه رندر پیام‌ها ====================
+# یک middleware روی session ربات که همه درخواست‌های تلگرام از آن عبور می‌کنند:
+# - ویرایشی که متن و کیبوردش با آخرین محتوای همان پیام یکی است اصلاً ارسال نمی‌شود
+# - درخواست‌های هر چت پشت سر هم (صف FIFO) ارسال می‌شوند
+# - خطای flood-wait (TelegramRetryAfter) با صبر و ارسال دوباره جذب می‌شود و به هندلر نمی‌رسد
+# progress() هم به‌روزرسانی‌های پیاپی یک پیام را جمع می‌کند و حداکثر هر interval ثانیه یک ویرایش می‌فرستد.
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+from aiogram.types import Message
+
+
+# callback در حال پردازش (callbacks.CallbackTable): پیامش، و اینکه جواب داده شده یا پیامش واقعاً ویرایش شده است.
+# اگر هیچ‌کدام نشده باشد (مثلاً ویرایش تکراری رد شده) CallbackTable خودش جواب می‌دهد تا چرخش دکمه نماند.
+callback_state: ContextVar[dict | None] = ContextVar("callback_state", default=None)
+
+
+def _digest(text: str | None, markup) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update((text or "").encode("utf-8"))
+    if markup is not None:
+        h.update(markup.model_dump_json(exclude_none=True).encode("utf-8"))
+    return h.digest()
+
+
+class MessageRenderer:
+    def __init__(self, interval: float, flood_wait_max: float, max_entries: int = 2048):
+        self.interval = interval
+        self.flood_wait_max = flood_wait_max
+        self.max_entries = max_entries
+        # (chat_id, message_id) ➜ (digest آخرین محتوای ارسال‌شده، آخرین Message برگشتی)
+        self._last: OrderedDict[tuple, tuple[bytes, Message]] = OrderedDict()
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._edited_at: dict[tuple, float] = {}
+        self._pending: dict[tuple, tuple] = {}
+        self._tasks: dict[tuple, asyncio.Task] = {}
+        self.skipped = 0
+        self.coalesced = 0
+        self.flood_waits = 0
+
+    def _remember(self, key: tuple, digest: bytes, message: Message):
+        self._last[key] = (digest, message)
+        self._last.move_to_end(key)
+        while len(self._last) > self.max_entries:
+            old, _ = self._last.popitem(last=False)
+            self._edited_at.pop(old, None)
+
+    def _drop_progress(self, key: tuple):
+        # ویرایش نهایی جایگزین هر progress معلق همان پیام می‌شود
+        task = self._tasks.get(key)
+        if task is not None and task is not asyncio.current_task():
+            self._pending.pop(key, None)
+            self._tasks.pop(key, None)
+            task.cancel()
+
+    async def _send(self, make_request, bot, method):
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if e.retry_after > self.flood_wait_max:
+                    raise
+                self.flood_waits += 1
+                await asyncio.sleep(e.retry_after)
+
+    async def middleware(self, make_request, bot, method):
+        pending = callback_state.get()
+        if pending is not None and isinstance(method, AnswerCallbackQuery):
+            pending["answered"] = True
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await self._send(make_request, bot, method)
+
+        key = digest = None
+        if isinstance(method, EditMessageText) and method.message_id is not None:
+            key = (chat_id, method.message_id)
+            self._drop_progress(key)
+            digest = _digest(method.text, method.reply_markup)
+            last = self._last.get(key)
+            if last is not None and last[0] == digest:
+                self.skipped += 1
+                return last[1]
+        elif isinstance(method, SendMessage):
+            digest = _digest(method.text, method.reply_markup)
+
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        try:
+            async with lock:
+                result = await self._send(make_request, bot, method)
+        except TelegramBadRequest as e:
+            if key is None or "message is not modified" not in str(e):
+                raise
+            self.skipped += 1
+            last = self._last.get(key)
+            return last[1] if last is not None else True
+
+        if pending is not None and key is not None and key == pending["message"]:
+            pending["edited"] = True
+        if digest is not None and isinstance(result, Message):
+            key = (chat_id, result.message_id)
+            self._remember(key, digest, result)
+            self._edited_at[key] = asyncio.get_running_loop().time()
+        return result
+
+    # --- پیام‌های پیشرفت ---
+    def progress(self, message: Message, text: str, reply_markup=None, interval: float | None = None):
+        # فقط آخرین متن نگه داشته می‌شود؛ ارسال در پس‌زمینه و بدون منتظر ماندن هندلر انجام می‌شود
+        key = (message.chat.id, message.message_id)
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (message, text, reply_markup)
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = asyncio.create_task(
+                self._flush(key, self.interval if interval is None else interval)
+            )
+
+    async def _flush(self, key: tuple, interval: float):
+        loop = asyncio.get_running_loop()
+        try:
+            # تا وقتی در حین صبر یا ارسال، متن تازه‌ای رسیده باشد ادامه می‌دهد
+            while key in self._pending:
+                delay = self._edited_at.get(key, 0.0) + interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                item = self._pending.pop(key, None)
+                if item is None:
+                    return
+                message, text, markup = item
+                try:
+                    await message.edit_text(text, reply_markup=markup)
+                except TelegramBadRequest:
+                    pass
+                self._edited_at[key] = loop.time()
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
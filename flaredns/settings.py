@@ -0,0 +1,79 @@
+# ==================== تنظیمات ====================
+import config
+from config import BOT_TOKEN, ADMIN_ID, API_URL, ACCOUNTS_FILE, ICONS
+
+# تنظیمات اختیاری؛ config.py ساخته‌شده توسط install.sh این مقادیر را ندارد
+CF_POOL_LIMIT = getattr(config, "CF_POOL_LIMIT", 100)
+CF_POOL_LIMIT_PER_HOST = getattr(config, "CF_POOL_LIMIT_PER_HOST", 20)
+CF_DNS_CACHE_TTL = getattr(config, "CF_DNS_CACHE_TTL", 300)
+CF_KEEPALIVE_TIMEOUT = getattr(config, "CF_KEEPALIVE_TIMEOUT", 60)
+CF_REQUEST_TIMEOUT = getattr(config, "CF_REQUEST_TIMEOUT", 25)
+CF_RATE_LIMIT = getattr(config, "CF_RATE_LIMIT", 4.0)
+CF_RATE_BURST = getattr(config, "CF_RATE_BURST", 20)
+CF_MAX_INFLIGHT = getattr(config, "CF_MAX_INFLIGHT", 32)
+CF_MAX_RETRIES = getattr(config, "CF_MAX_RETRIES", 4)
+CF_BACKOFF_BASE = getattr(config, "CF_BACKOFF_BASE", 0.5)
+CF_BACKOFF_MAX = getattr(config, "CF_BACKOFF_MAX", 30)
+CF_PAGE_CONCURRENCY = getattr(config, "CF_PAGE_CONCURRENCY", 4)
+CF_ZONES_PER_PAGE = getattr(config, "CF_ZONES_PER_PAGE", 50)
+CF_RECORDS_PER_PAGE = getattr(config, "CF_RECORDS_PER_PAGE", 500)
+CACHE_TTL = getattr(config, "CACHE_TTL", 120)
+CACHE_MAX_ENTRIES = getattr(config, "CACHE_MAX_ENTRIES", 256)
+CF_BATCH_SIZE = getattr(config, "CF_BATCH_SIZE", 200)
+BULK_CONCURRENCY = getattr(config, "BULK_CONCURRENCY", 8)
+PROGRESS_EDIT_INTERVAL = getattr(config, "PROGRESS_EDIT_INTERVAL", 1.5)
+FLOOD_WAIT_MAX = getattr(config, "FLOOD_WAIT_MAX", 60)
+USERS = getattr(config, "USERS", {})
+ACCOUNT_ACCESS = getattr(config, "ACCOUNT_ACCESS", {})
+STORAGE_BACKEND = getattr(config, "STORAGE_BACKEND", "sqlite")
+STORAGE_PATH = getattr(config, "STORAGE_PATH", "flaredns.db")
+STORAGE_FLUSH_INTERVAL = getattr(config, "STORAGE_FLUSH_INTERVAL", 5)
+BOT_MODE = getattr(config, "BOT_MODE", "polling")
+TELEGRAM_API_URL = getattr(config, "TELEGRAM_API_URL", None)
+WEBHOOK_URL = getattr(config, "WEBHOOK_URL", "")
+WEBHOOK_PATH = getattr(config, "WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = getattr(config, "WEBHOOK_SECRET", "")
+WEBHOOK_HOST = getattr(config, "WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = getattr(config, "WEBHOOK_PORT", 8080)
+WEBHOOK_WORKERS = getattr(config, "WEBHOOK_WORKERS", 8)
+WEBHOOK_QUEUE_SIZE = getattr(config, "WEBHOOK_QUEUE_SIZE", 1000)
+SYNC_ENABLED = getattr(config, "SYNC_ENABLED", True)
+SYNC_INTERVAL = getattr(config, "SYNC_INTERVAL", 600)
+SYNC_CONCURRENCY = getattr(config, "SYNC_CONCURRENCY", 4)
+SYNC_MAX_ZONES_PER_CYCLE = getattr(config, "SYNC_MAX_ZONES_PER_CYCLE", 200)
+SYNC_NOTIFY = getattr(config, "SYNC_NOTIFY", True)
+SNAPSHOT_PATH = getattr(config, "SNAPSHOT_PATH", "snapshots.db")
+SNAPSHOT_MAX_AGE = getattr(config, "SNAPSHOT_MAX_AGE", SYNC_INTERVAL * 2)
+FIND_LIMIT = getattr(config, "FIND_LIMIT", 25)
+HISTORY_ENABLED = getattr(config, "HISTORY_ENABLED", True)
+HISTORY_PATH = getattr(config, "HISTORY_PATH", "history.db")
+HISTORY_FULL_EVERY = getattr(config, "HISTORY_FULL_EVERY", 32)
+HISTORY_MAX_VERSIONS = getattr(config, "HISTORY_MAX_VERSIONS", 500)
+HISTORY_GROUP_WINDOW = getattr(config, "HISTORY_GROUP_WINDOW", 2.0)
+DNS_RESOLVERS = getattr(config, "DNS_RESOLVERS", {
+    "Cloudflare": "1.1.1.1", "Google": "8.8.8.8", "Quad9": "9.9.9.9", "OpenDNS": "208.67.222.222",
+})
+DNS_QUERY_TIMEOUT = getattr(config, "DNS_QUERY_TIMEOUT", 2.0)
+PROPAGATION_INTERVAL = getattr(config, "PROPAGATION_INTERVAL", 5)
+PROPAGATION_TIMEOUT = getattr(config, "PROPAGATION_TIMEOUT", 180)
+DDNS_HOST = getattr(config, "DDNS_HOST", "0.0.0.0")
+DDNS_PORT = getattr(config, "DDNS_PORT", 0)
+DDNS_CLIENTS = getattr(config, "DDNS_CLIENTS", {})
+DDNS_COALESCE = getattr(config, "DDNS_COALESCE", 2.0)
+DDNS_INDEX_TTL = getattr(config, "DDNS_INDEX_TTL", 300)
+DDNS_TRUST_FORWARDED = getattr(config, "DDNS_TRUST_FORWARDED", False)
+TOKEN_CHECK_INTERVAL = getattr(config, "TOKEN_CHECK_INTERVAL", 900)
+TOKEN_CHECK_CONCURRENCY = getattr(config, "TOKEN_CHECK_CONCURRENCY", 8)
+TOKEN_CHECK_TIMEOUT = getattr(config, "TOKEN_CHECK_TIMEOUT", 10)
+TOKEN_CHECK_NOTIFY = getattr(config, "TOKEN_CHECK_NOTIFY", True)
+TOKEN_EXPIRY_WARNING = getattr(config, "TOKEN_EXPIRY_WARNING", 7 * 86400)
+TOKEN_BREAKER_THRESHOLD = getattr(config, "TOKEN_BREAKER_THRESHOLD", 3)
+TOKEN_BREAKER_COOLDOWN = getattr(config, "TOKEN_BREAKER_COOLDOWN", 300)
+STATS_CONCURRENCY = getattr(config, "STATS_CONCURRENCY", 8)
+STATS_ACCOUNT_TIMEOUT = getattr(config, "STATS_ACCOUNT_TIMEOUT", 15)
+STATS_EDIT_INTERVAL = getattr(config, "STATS_EDIT_INTERVAL", 1.5)
+METRICS_ENABLED = getattr(config, "METRICS_ENABLED", True)
+METRICS_HOST = getattr(config, "METRICS_HOST", "127.0.0.1")
+METRICS_PORT = getattr(config, "METRICS_PORT", 9108)
+DROP_PENDING_UPDATES = getattr(config, "DROP_PENDING_UPDATES", False)
+COLD_START_TARGET = getattr(config, "COLD_START_TARGET", 5.0)
@@ -0,0 +1,352 @@
+# ==================== اسنپ‌شات محلی زون‌ها و رکوردها ====================
+# آخرین وضعیت همگام‌شده هر زون و رکوردهایش در یک دیتابیس SQLite نگه داشته می‌شود.
+# متدها همگام (sync) هستند و از داخل ربات با asyncio.to_thread صدا زده می‌شوند.
+import json
+import sqlite3
+import threading
+import time
+
+# فیلدهایی که برای تشخیص تغییر رکورد مقایسه می‌شوند (modified_on و ... نادیده گرفته می‌شوند)
+COMPARE_FIELDS = ("type", "name", "content", "ttl", "proxied", "priority")
+SCHEMA_VERSION = 2
+COUNT_CAP = 10000
+FIND_KEYS = ("name", "content", "type", "proxied", "zone", "account")
+
+
+def record_signature(r: dict) -> tuple:
+    return tuple(r.get(f) for f in COMPARE_FIELDS)
+
+
+class SnapshotStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                # همه جدول‌ها فقط کش هستند؛ با تغییر ساختار دور ریخته شده و در sync بعدی دوباره پر می‌شوند.
+                # تا نسخه ۱ هر زون فقط یک اکانت داشت (zones.account)
+                with conn:
+                    conn.execute("DROP TABLE IF EXISTS records")
+                    if version < 2:
+                        conn.execute("DROP TABLE IF EXISTS zones")
+                        conn.execute("DROP TABLE IF EXISTS accounts")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # یک زون می‌تواند در چند اکانت دیده شود (مثلاً دو توکن روی یک اکانت Cloudflare)؛
+            # مالکیت در account_zones است و زون و رکوردهایش یک‌بار ذخیره می‌شوند.
+            # name و content با حروف کوچک ذخیره می‌شوند؛ rname نام برعکس‌شده برای جستجوی پسوندی (*.example.com) است
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS zones (
+                    zone_id   TEXT PRIMARY KEY,
+                    name      TEXT NOT NULL,
+                    status    TEXT,
+                    data      TEXT NOT NULL,
+                    synced_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS account_zones (
+                    account   TEXT NOT NULL,
+                    zone_id   TEXT NOT NULL,
+                    PRIMARY KEY (account, zone_id)
+                );
+                CREATE TABLE IF NOT EXISTS accounts (
+                    account   TEXT PRIMARY KEY,
+                    synced_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS records (
+                    record_id TEXT NOT NULL,
+                    zone_id   TEXT NOT NULL,
+                    type      TEXT NOT NULL,
+                    name      TEXT NOT NULL,
+                    rname     TEXT NOT NULL,
+                    content   TEXT NOT NULL,
+                    proxied   INTEGER NOT NULL DEFAULT 0,
+                    data      TEXT NOT NULL,
+                    PRIMARY KEY (zone_id, record_id)
+                );
+                CREATE INDEX IF NOT EXISTS records_name ON records (name);
+                CREATE INDEX IF NOT EXISTS records_rname ON records (rname);
+                CREATE INDEX IF NOT EXISTS records_content ON records (content);
+                CREATE INDEX IF NOT EXISTS records_type ON records (type, name);
+                CREATE INDEX IF NOT EXISTS records_proxied ON records (proxied, name);
+                CREATE INDEX IF NOT EXISTS account_zones_zone ON account_zones (zone_id);
+                CREATE INDEX IF NOT EXISTS zones_name ON zones (name);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _record_row(zone_id: str, r: dict) -> tuple:
+        name = r["name"].lower()
+        return (
+            r["id"],
+            zone_id,
+            r["type"],
+            name,
+            name[::-1],
+            str(r["content"]).lower(),
+            1 if r.get("proxied") else 0,
+            json.dumps(r, ensure_ascii=False, separators=(",", ":")),
+        )
+
+    # --- زون‌ها ---
+    def zones_for(self, account: str) -> tuple[list[dict], float | None]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT synced_at FROM accounts WHERE account = ?", (account,)).fetchone()
+            rows = db.execute(
+                "SELECT z.data FROM account_zones a JOIN zones z ON z.zone_id = a.zone_id "
+                "WHERE a.account = ? ORDER BY a.rowid",
+                (account,),
+            ).fetchall()
+        return [json.loads(d) for (d,) in rows], (row[0] if row else None)
+
+    def zone_sync_times(self, account: str) -> dict[str, float | None]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT z.zone_id, z.synced_at FROM account_zones a JOIN zones z ON z.zone_id = a.zone_id "
+                "WHERE a.account = ?",
+                (account,),
+            ).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _drop_orphans(db: sqlite3.Connection, zone_ids):
+        # زون‌هایی که دیگر در هیچ اکانتی نیستند همراه رکوردهایشان حذف می‌شوند
+        orphans = [
+            (zid,) for zid in zone_ids
+            if db.execute("SELECT 1 FROM account_zones WHERE zone_id = ?", (zid,)).fetchone() is None
+        ]
+        db.executemany("DELETE FROM records WHERE zone_id = ?", orphans)
+        db.executemany("DELETE FROM zones WHERE zone_id = ?", orphans)
+
+    def replace_zones(self, account: str, zones: list[dict]) -> list[str]:
+        # لیست زون‌های یک اکانت را جایگزین می‌کند؛ زمان sync رکوردهای زون‌های موجود حفظ می‌شود.
+        # خروجی: id زون‌هایی که حذف شده‌اند.
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            with db:
+                existing = {
+                    zid for (zid,) in db.execute("SELECT zone_id FROM account_zones WHERE account = ?", (account,))
+                }
+                new_ids = {z["id"] for z in zones}
+                removed = sorted(existing - new_ids)
+                db.executemany(
+                    "DELETE FROM account_zones WHERE account = ? AND zone_id = ?", [(account, zid) for zid in removed]
+                )
+                self._drop_orphans(db, removed)
+                db.executemany(
+                    "INSERT INTO zones (zone_id, name, status, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(zone_id) DO UPDATE SET name = excluded.name, "
+                    "status = excluded.status, data = excluded.data",
+                    [
+                        (z["id"], z["name"], z.get("status"),
+                         json.dumps(z, ensure_ascii=False, separators=(",", ":")))
+                        for z in zones
+                    ],
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO account_zones (account, zone_id) VALUES (?, ?)",
+                    [(account, z["id"]) for z in zones],
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO accounts (account, synced_at) VALUES (?, ?)", (account, now)
+                )
+        return removed
+
+    def prune_accounts(self, keep: set[str]):
+        with self._lock:
+            db = self._db()
+            with db:
+                stale = [a for (a,) in db.execute("SELECT account FROM accounts") if a not in keep]
+                for account in stale:
+                    zone_ids = [
+                        zid for (zid,) in db.execute("SELECT zone_id FROM account_zones WHERE account = ?", (account,))
+                    ]
+                    db.execute("DELETE FROM account_zones WHERE account = ?", (account,))
+                    self._drop_orphans(db, zone_ids)
+                    db.execute("DELETE FROM accounts WHERE account = ?", (account,))
+
+    # --- رکوردها ---
+    def records_for(self, zone_id: str) -> tuple[list[dict], float | None]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT synced_at FROM zones WHERE zone_id = ?", (zone_id,)).fetchone()
+            rows = db.execute(
+                "SELECT data FROM records WHERE zone_id = ? ORDER BY rowid", (zone_id,)
+            ).fetchall()
+        return [json.loads(d) for (d,) in rows], (row[0] if row and row[0] else None)
+
+    def apply_records(self, zone_id: str, records: list[dict]) -> dict:
+        # رکوردهای تازه را با اسنپ‌شات مقایسه می‌کند و فقط تفاوت‌ها را می‌نویسد.
+        # خروجی: {"first": اولین sync این زون؟, "added": [...], "removed": [...], "changed": [(old, new)]}
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT synced_at FROM zones WHERE zone_id = ?", (zone_id,)).fetchone()
+            first = not row or not row[0]
+            old = {
+                rid: json.loads(d)
+                for rid, d in db.execute("SELECT record_id, data FROM records WHERE zone_id = ?", (zone_id,))
+            }
+            new = {r["id"]: r for r in records}
+
+            added = [r for rid, r in new.items() if rid not in old]
+            removed = [r for rid, r in old.items() if rid not in new]
+            changed = [
+                (old[rid], r) for rid, r in new.items()
+                if rid in old and record_signature(old[rid]) != record_signature(r)
+            ]
+
+            with db:
+                if removed:
+                    db.executemany(
+                        "DELETE FROM records WHERE zone_id = ? AND record_id = ?",
+                        [(zone_id, r["id"]) for r in removed],
+                    )
+                if added or changed:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO records "
+                        "(record_id, zone_id, type, name, rname, content, proxied, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [self._record_row(zone_id, r) for r in added + [n for _, n in changed]],
+                    )
+                db.execute("UPDATE zones SET synced_at = ? WHERE zone_id = ?", (now, zone_id))
+        return {"first": first, "added": added, "removed": removed, "changed": changed}
+
+    def apply_changes(self, zone_id: str, upserts: list[dict], deletes: list[str]):
+        # تغییرات خود ربات مستقیماً در اسنپ‌شات نوشته می‌شوند تا به عنوان تغییر خارجی گزارش نشوند؛
+        # همه تغییرات یک عملیات در یک تراکنش
+        with self._lock:
+            db = self._db()
+            with db:
+                if deletes:
+                    db.executemany(
+                        "DELETE FROM records WHERE zone_id = ? AND record_id = ?", [(zone_id, rid) for rid in deletes]
+                    )
+                if upserts:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO records "
+                        "(record_id, zone_id, type, name, rname, content, proxied, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [self._record_row(zone_id, r) for r in upserts],
+                    )
+
+    # --- جستجو (/find) ---
+    def search(self, query: dict, limit: int) -> tuple[list[tuple[str, str, dict]], int]:
+        # خروجی: ([(account, zone_name, record), ...], تعداد کل نتایج تا سقف COUNT_CAP)
+        where, args = build_where(query)
+        sql_from = "FROM records r JOIN zones z ON z.zone_id = r.zone_id"
+        # اکانت‌های هر زون (فقط آن‌هایی که کاربر اجازه دیدنشان را دارد) با کاما کنار هم نمایش داده می‌شوند
+        owners = "SELECT GROUP_CONCAT(a.account, ', ') FROM account_zones a WHERE a.zone_id = r.zone_id"
+        owner_args: list = []
+        if "accounts" in query:
+            owners += f" AND a.account IN ({_marks(query['accounts'])})"
+            owner_args = list(query["accounts"])
+        if where:
+            sql_from += " WHERE " + " AND ".join(where)
+        with self._lock:
+            db = self._db()
+            # شمارش تا COUNT_CAP متوقف می‌شود تا عبارت‌های خیلی کلی (مثل type:A) هم سریع بمانند
+            total = db.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 {sql_from} LIMIT {COUNT_CAP})", args
+            ).fetchone()[0]
+            rows = db.execute(
+                f"SELECT ({owners}), z.name, r.data {sql_from} ORDER BY r.name, r.type LIMIT ?",
+                [*owner_args, *args, limit],
+            ).fetchall()
+        return [(account, zone, json.loads(d)) for account, zone, d in rows], total
+
+    def optimize(self):
+        # آمار ایندکس‌ها را به‌روز می‌کند تا SQLite برای هر فیلتر ایندکس درست را انتخاب کند
+        with self._lock:
+            self._db().execute("PRAGMA optimize")
+
+    def summary(self) -> tuple[int, int, float | None]:
+        # تعداد زون‌ها، تعداد رکوردها و زمان قدیمی‌ترین sync
+        with self._lock:
+            db = self._db()
+            zones, oldest = db.execute(
+                "SELECT COUNT(*), MIN(synced_at) FROM zones WHERE synced_at IS NOT NULL"
+            ).fetchone()
+            records = db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        return zones, records, oldest
+
+
+# --- عبارت جستجو ---
+def parse_query(text: str) -> dict:
+    # «1.2.3.4»، «*.example.com»، «api*»، «type:A proxied:yes zone:example.com»
+    # کلمات بدون کلید در نام یا مقدار رکورد جستجو می‌شوند.
+    query: dict = {"terms": []}
+    for word in text.split():
+        key, sep, value = word.partition(":")
+        key = key.lower()
+        if sep and value and key in FIND_KEYS:
+            query[key] = value
+        else:
+            query["terms"].append(word)
+    return query
+
+
+def _match(columns: tuple[str, ...], value: str, args: list) -> str:
+    # «*suffix» روی نام برعکس‌شده، «prefix*» به صورت بازه و بقیه برابری دقیق؛ هر سه از ایندکس استفاده می‌کنند
+    value = value.lower().rstrip(".")
+    if value.startswith("*") and "name" in columns:
+        suffix = value.lstrip("*")[::-1]
+        args += [suffix, suffix + "\uffff"]
+        return "(r.rname >= ? AND r.rname < ?)"
+    if value.endswith("*"):
+        prefix = value.rstrip("*")
+        parts = []
+        for col in columns:
+            args += [prefix, prefix + "\uffff"]
+            parts.append(f"(r.{col} >= ? AND r.{col} < ?)")
+        return "(" + " OR ".join(parts) + ")"
+    args += [value] * len(columns)
+    return "(" + " OR ".join(f"r.{col} = ?" for col in columns) + ")"
+
+
+def _marks(values) -> str:
+    return ",".join("?" * len(values)) or "NULL"
+
+
+def build_where(query: dict) -> tuple[list[str], list]:
+    where: list[str] = []
+    args: list = []
+    for term in query.get("terms", []):
+        where.append(_match(("name", "content"), term, args))
+    if query.get("name"):
+        where.append(_match(("name",), query["name"], args))
+    if query.get("content"):
+        where.append(_match(("content",), query["content"], args))
+    if query.get("type"):
+        where.append("r.type = ?")
+        args.append(query["type"].upper())
+    if query.get("proxied"):
+        where.append("r.proxied = ?")
+        args.append(1 if query["proxied"].lower() in ("1", "yes", "true", "on") else 0)
+    # فیلتر زون/اکانت به صورت زیرکوئری تا رکوردها از کلید اصلی (zone_id, record_id) خوانده شوند
+    if query.get("zone"):
+        where.append("r.zone_id IN (SELECT zone_id FROM zones WHERE name = ?)")
+        args.append(query["zone"].lower().rstrip("."))
+    if query.get("account"):
+        where.append("r.zone_id IN (SELECT zone_id FROM account_zones WHERE account = ?)")
+        args.append(query["account"])
+    if "accounts" in query:
+        # محدود به اکانت‌هایی که کاربر اجازه دیدنشان را دارد
+        accounts = list(query["accounts"])
+        where.append(f"r.zone_id IN (SELECT zone_id FROM account_zones WHERE account IN ({_marks(accounts)}))")
+        args += accounts
+    return where, args
@@ -0,0 +1,341 @@
+# ==================== ذخیره‌سازی پایدار (FSM + سشن کاربران) ====================
+# backendها یک key/value ساده‌اند (SQLite، فایل یا حافظه). مقدارها به صورت JSON فشرده (zlib) ذخیره می‌شوند.
+# خواندن تنبل است (اولین دسترسی به هر کاربر/کلید) و نوشتن‌ها جمع شده و هر چند ثانیه یک‌جا flush می‌شوند.
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+
+def dumps(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def loads(raw: bytes) -> Any:
+    return json.loads(zlib.decompress(raw).decode("utf-8"))
+
+
+# --- backendها ---
+class MemoryBackend:
+    def __init__(self):
+        self._data: dict[str, bytes] = {}
+
+    def get(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    def write_many(self, items: Mapping[str, bytes | None]):
+        # مقدار None یعنی حذف کلید
+        for key, value in items.items():
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = value
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        return self._conn
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._db().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def write_many(self, items: Mapping[str, bytes | None]):
+        upserts = [(k, v) for k, v in items.items() if v is not None]
+        deletes = [(k,) for k, v in items.items() if v is None]
+        with self._lock:
+            db = self._db()
+            with db:
+                if upserts:
+                    db.executemany("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", upserts)
+                if deletes:
+                    db.executemany("DELETE FROM kv WHERE key = ?", deletes)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class FileBackend:
+    # هر کلید یک فایل جدا در یک پوشه؛ نوشتن اتمیک (فایل موقت + rename)
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".bin")
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write_many(self, items: Mapping[str, bytes | None]):
+        os.makedirs(self.directory, exist_ok=True)
+        for key, value in items.items():
+            path = self._path(key)
+            if value is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp, path)
+
+    def close(self):
+        pass
+
+
+def make_backend(kind: str, path: str):
+    if kind == "sqlite":
+        return SQLiteBackend(path)
+    if kind == "file":
+        return FileBackend(path)
+    if kind == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+# --- نوشتن دسته‌ای ---
+class PersistentStore:
+    # نوشتن‌های معلق را جمع می‌کند و هر flush_interval ثانیه یک‌جا در backend می‌نویسد.
+    # collectorها (مثل SessionStore) هنگام flush تغییرات خودشان را اضافه می‌کنند: روی event loop فقط یک کپی سبک
+    # برمی‌دارند، سریال‌سازی و فشرده‌سازی را در thread انجام می‌دهند و وضعیت خودشان را دوباره روی loop به‌روز می‌کنند.
+    def __init__(self, backend, flush_interval: float):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self._pending: dict[str, bytes | None] = {}
+        self._collectors: list[Callable[[], Awaitable[dict[str, bytes | None]]]] = []
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    def get(self, key: str) -> Any | None:
+        raw = self.backend.get(key)
+        return loads(raw) if raw is not None else None
+
+    def put(self, key: str, value: Any | None):
+        self._pending[key] = dumps(value) if value is not None else None
+
+    def add_collector(self, collector: Callable[[], Awaitable[dict[str, bytes | None]]]):
+        self._collectors.append(collector)
+
+    async def flush(self):
+        async with self._flush_lock:
+            for collector in self._collectors:
+                self._pending.update(await collector())
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            await asyncio.to_thread(self.backend.write_many, batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ storage flush failed: {e}")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        self.backend.close()
+
+
+# --- FSM ---
+class PersistentFSMStorage(BaseStorage):
+    def __init__(self, store: PersistentStore):
+        self.store = store
+        self._records: dict[str, dict] = {}
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        parts = [
+            "fsm",
+            str(key.bot_id),
+            str(key.chat_id),
+            str(key.user_id),
+            str(key.thread_id or ""),
+            str(getattr(key, "business_connection_id", None) or ""),
+            key.destiny,
+        ]
+        return ":".join(parts)
+
+    def _load(self, key: StorageKey) -> tuple[str, dict]:
+        k = self._key(key)
+        rec = self._records.get(k)
+        if rec is None:
+            rec = self.store.get(k) or {"state": None, "data": {}}
+            self._records[k] = rec
+        return k, rec
+
+    def _save(self, k: str, rec: dict):
+        if rec["state"] is None and not rec["data"]:
+            self.store.put(k, None)
+        else:
+            self.store.put(k, rec)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k, rec = self._load(key)
+        rec["state"] = state.state if isinstance(state, State) else state
+        self._save(k, rec)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return self._load(key)[1]["state"]
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        k, rec = self._load(key)
+        rec["data"] = dict(data)
+        self._save(k, rec)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return dict(self._load(key)[1]["data"])
+
+    async def close(self) -> None:
+        await self.store.flush()
+
+
+# --- سشن کاربران (user_cache) ---
+class SessionStore(dict):
+    # dict[user_id, dict] که هر کاربر را در اولین دسترسی از backend بار می‌کند.
+    # سشن‌هایی که از آخرین flush دست خورده‌اند دوباره سریال می‌شوند و فقط اگر واقعاً تغییر کرده باشند نوشته می‌شوند.
+    # لیست‌های بزرگ (lists، مثل زون‌ها و رکوردهای کش‌شده) کلید جدا دارند و فقط وقتی خود لیست یا version آن
+    # عوض شود دوباره نوشته می‌شوند، به همراه زمان نوشتن: {"saved_at": ..., "items": [...]}.
+    def __init__(self, store: PersistentStore, encode: Callable[[dict], dict], decode: Callable[[int, dict], dict],
+                 lists: tuple[str, ...] = ()):
+        super().__init__()
+        self.store = store
+        self._encode = encode
+        self._decode = decode
+        self.lists = lists
+        self._touched: set[int] = set()
+        self._digests: dict[int, bytes] = {}
+        self._stamps: dict[tuple[int, str], tuple | None] = {}
+        self._missing: set[int] = set()
+        store.add_collector(self._collect)
+
+    @staticmethod
+    def _key(user_id: int, name: str = "") -> str:
+        return f"session:{user_id}:{name}" if name else f"session:{user_id}"
+
+    @staticmethod
+    def _stamp(value) -> tuple | None:
+        return None if value is None else (id(value), getattr(value, "version", None), len(value))
+
+    def _load(self, user_id: int):
+        if dict.__contains__(self, user_id) or user_id in self._missing:
+            return
+        raw = self.store.backend.get(self._key(user_id))
+        if raw is None:
+            self._missing.add(user_id)
+            return
+        data = loads(raw)
+        for name in self.lists:
+            stored = self.store.backend.get(self._key(user_id, name))
+            if stored is not None:
+                data[name] = loads(stored)
+        session = self._decode(user_id, data)
+        dict.__setitem__(self, user_id, session)
+        self._digests[user_id] = hashlib.sha1(raw).digest()
+        for name in self.lists:
+            self._stamps[(user_id, name)] = self._stamp(session.get(name))
+
+    def __getitem__(self, user_id: int) -> dict:
+        self._load(user_id)
+        self._touched.add(user_id)
+        return dict.__getitem__(self, user_id)
+
+    def __setitem__(self, user_id: int, value: dict):
+        self._touched.add(user_id)
+        dict.__setitem__(self, user_id, value)
+
+    def __contains__(self, user_id) -> bool:
+        self._load(user_id)
+        return dict.__contains__(self, user_id)
+
+    def get(self, user_id: int, default=None):
+        self._load(user_id)
+        if dict.__contains__(self, user_id):
+            self._touched.add(user_id)
+        return dict.get(self, user_id, default)
+
+    def setdefault(self, user_id: int, default=None):
+        self._load(user_id)
+        self._touched.add(user_id)
+        return dict.setdefault(self, user_id, {} if default is None else default)
+
+    async def _collect(self) -> dict[str, bytes | None]:
+        # روی event loop: کپی یک‌سطحی سشن‌های دست‌خورده و لیست‌هایی که عوض شده‌اند
+        sessions: dict[int, dict] = {}
+        lists: dict[tuple[int, str], list | None] = {}
+        touched, self._touched = self._touched, set()
+        for user_id in touched:
+            if not dict.__contains__(self, user_id):
+                continue
+            session = dict.__getitem__(self, user_id)
+            sessions[user_id] = {
+                k: v.copy() if isinstance(v, (dict, list, set)) else v for k, v in self._encode(session).items()
+            }
+            for name in self.lists:
+                value = session.get(name)
+                stamp = self._stamp(value)
+                if self._stamps.get((user_id, name), None) != stamp:
+                    self._stamps[(user_id, name)] = stamp
+                    lists[(user_id, name)] = None if value is None else list(value)
+        if not sessions:
+            return {}
+        digests = {user_id: self._digests.get(user_id) for user_id in sessions}
+        out, changed = await asyncio.to_thread(self._serialize, sessions, lists, digests)
+        # وضعیت SessionStore فقط روی event loop عوض می‌شود (_load هم همین‌ها را می‌نویسد)
+        self._digests.update(changed)
+        self._missing.difference_update(changed)
+        return out
+
+    @classmethod
+    def _serialize(cls, sessions: dict[int, dict], lists: dict[tuple[int, str], list | None],
+                   digests: dict[int, bytes | None]) -> tuple[dict[str, bytes | None], dict[int, bytes]]:
+        # در thread: خروجی (نوشتن‌ها، digest تازه سشن‌هایی که واقعاً عوض شده‌اند)
+        out: dict[str, bytes | None] = {}
+        changed: dict[int, bytes] = {}
+        for user_id, data in sessions.items():
+            raw = dumps(data)
+            digest = hashlib.sha1(raw).digest()
+            if digests[user_id] != digest:
+                changed[user_id] = digest
+                out[cls._key(user_id)] = raw
+        for (user_id, name), items in lists.items():
+            out[cls._key(user_id, name)] = None if items is None else dumps({"saved_at": time.time(), "items": items})
+        return out, changed
@@ -0,0 +1,104 @@
+# ==================== همگام‌سازی پس‌زمینه ====================
+# فقط وقتی SYNC_ENABLED روشن است (یا /find ایندکس خالی را ببیند) بارگذاری می‌شود
+import html
+import asyncio
+from aiogram import Bot
+
+from . import zonefile
+from .settings import (
+    ICONS, CF_RECORDS_PER_PAGE, CF_ZONES_PER_PAGE, SYNC_CONCURRENCY, SYNC_INTERVAL, SYNC_MAX_ZONES_PER_CYCLE,
+    SYNC_NOTIFY,
+)
+from .core import (
+    IndexedList, account_audience, cf_cache, cf_fetch_all, get_proxy_icon, get_snapshot_store, history_record,
+    load_accounts, snapshot_pending, zone_generation,
+)
+
+
+def record_line(r: dict) -> str:
+    proxy = f" {get_proxy_icon(r.get('proxied'))}" if r.get("type") in zonefile.PROXIABLE_TYPES else ""
+    return f"{r['type']} <code>{html.escape(r['name'])}</code> ➜ <code>{html.escape(str(r['content']))}</code>{proxy}"
+
+
+def format_zone_diff(account: str, zone_name: str, diff: dict, limit: int = 15) -> str:
+    lines = [f"➕ {record_line(r)}" for r in diff["added"]]
+    lines += [f"➖ {record_line(r)}" for r in diff["removed"]]
+    for old, new in diff["changed"]:
+        lines.append(f"{ICONS['EDIT']} {record_line(old)}\n     ⤷ {record_line(new)}")
+    extra = len(lines) - limit
+    text = (
+        "🔔 <b>تغییر رکوردها خارج از ربات</b>\n"
+        f"🌐 دامنه: <code>{html.escape(zone_name)}</code> | 👤 اکانت: <code>{html.escape(account)}</code>\n"
+        "━━━━━━━━━━━━━━━━\n"
+        + "\n".join(lines[:limit])
+    )
+    if extra > 0:
+        text += f"\n… و {extra} مورد دیگر"
+    return text
+
+
+async def sync_zone(token: str, zone: dict, sem: asyncio.Semaphore) -> dict | None:
+    async with sem:
+        zid = zone["id"]
+        gen = zone_generation.get(zid, 0)
+        records = await cf_fetch_all(token, f"/zones/{zid}/dns_records", CF_RECORDS_PER_PAGE)
+        if zone_generation.get(zid, 0) != gen or zid in snapshot_pending:
+            # ربات در همین فاصله رکوردی از این زون را تغییر داده (یا هنوز در اسنپ‌شات ننوشته)؛ دور بعد دوباره بررسی می‌شود
+            return None
+        diff = await asyncio.to_thread(get_snapshot_store().apply_records, zid, records)
+        if diff["first"] or diff["added"] or diff["removed"] or diff["changed"]:
+            await history_record(zid, records, "sync")
+        if diff["added"] or diff["removed"] or diff["changed"]:
+            key = ("records", token, zid)
+            if key in cf_cache:
+                cf_cache.set(key, IndexedList(records))
+        return diff
+
+
+async def sync_account(bot: Bot, name: str, token: str, sem: asyncio.Semaphore):
+    zones = await cf_fetch_all(token, "/zones", CF_ZONES_PER_PAGE)
+    await asyncio.to_thread(get_snapshot_store().replace_zones, name, zones)
+
+    # هر دور فقط زون‌هایی که زودتر از همه sync شده‌اند (یا هرگز نشده‌اند) گرفته می‌شوند
+    times = await asyncio.to_thread(get_snapshot_store().zone_sync_times, name)
+    due = sorted(zones, key=lambda z: times.get(z["id"]) or 0)[:SYNC_MAX_ZONES_PER_CYCLE]
+
+    results = await asyncio.gather(*(sync_zone(token, z, sem) for z in due), return_exceptions=True)
+    for zone, diff in zip(due, results):
+        if isinstance(diff, Exception):
+            print(f"⚠️ sync {name}/{zone['name']} failed: {diff}")
+            continue
+        if not diff or diff["first"] or not (diff["added"] or diff["removed"] or diff["changed"]):
+            continue
+        if SYNC_NOTIFY:
+            text = format_zone_diff(name, zone["name"], diff)
+            for uid in account_audience(name):
+                try:
+                    await bot.send_message(uid, text)
+                except Exception as e:
+                    print(f"⚠️ sync notification to {uid} failed: {e}")
+
+
+async def sync_all(bot: Bot):
+    accounts = dict(load_accounts())
+    await asyncio.to_thread(get_snapshot_store().prune_accounts, set(accounts))
+    sem = asyncio.Semaphore(SYNC_CONCURRENCY)
+    results = await asyncio.gather(
+        *(sync_account(bot, name, token, sem) for name, token in accounts.items()),
+        return_exceptions=True,
+    )
+    for name, res in zip(accounts, results):
+        if isinstance(res, Exception):
+            print(f"⚠️ sync {name} failed: {res}")
+    await asyncio.to_thread(get_snapshot_store().optimize)
+
+
+async def sync_worker(bot: Bot):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        try:
+            await sync_all(bot)
+        except Exception as e:
+            print(f"⚠️ sync failed: {e}")
+        await asyncio.sleep(max(SYNC_INTERVAL - (loop.time() - started), 1))
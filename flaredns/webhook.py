@@ -0,0 +1,90 @@
+# ==================== حالت Webhook ====================
+# یک سرور aiohttp که آپدیت‌های تلگرام را می‌گیرد، هدر secret token را بررسی می‌کند
+# و آپدیت‌ها را در یک صف محدود برای تعدادی worker ثابت قرار می‌دهد.
+import asyncio
+import hmac
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str,
+        secret: str,
+        workers: int,
+        queue_size: int,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+        self.queue: asyncio.Queue[Update] = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+        self._runner: web.AppRunner | None = None
+        self.processed = 0
+        self.failed = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret:
+            got = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(got, self.secret):
+                return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception:
+            return web.Response(status=400)
+        # اگر صف پر باشد، پاسخ تا خالی شدن جا صبر می‌کند و تلگرام خودش سرعت ارسال را کم می‌کند
+        await self.queue.put(update)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "mode": "webhook",
+            "queue": self.queue.qsize(),
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+        })
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ update {update.update_id} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self, host: str, port: int):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        # آپدیت‌هایی که قبلاً دریافت شده‌اند هنوز پردازش می‌شوند
+        await self.queue.join()
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
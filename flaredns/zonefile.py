@@ -0,0 +1,351 @@
+# ==================== ورود/خروج گروهی رکوردها (BIND / CSV) ====================
+# این ماژول به aiogram وابسته نیست: فقط پارس، خروجی گرفتن و مقایسه مجموعه رکوردها.
+# همه توابع روی iterator کار می‌کنند تا فایل‌های بزرگ خط به خط پردازش شوند.
+import csv
+import ipaddress
+from typing import Iterable, Iterator, TextIO
+
+SUPPORTED_TYPES = ("A", "AAAA", "CNAME", "TXT", "MX", "NS")
+PROXIABLE_TYPES = ("A", "AAAA", "CNAME")
+HOSTNAME_TYPES = ("CNAME", "NS", "MX")
+DNS_CLASSES = ("IN", "CH", "HS")
+CSV_FIELDS = ("type", "name", "content", "ttl", "proxied", "priority")
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+# --- کمکی‌ها ---
+def fqdn(name: str, origin: str) -> str:
+    name = name.strip().lower()
+    origin = origin.strip().lower().rstrip(".")
+    if name in ("", "@"):
+        return origin
+    if name.endswith("."):
+        return name.rstrip(".")
+    if name == origin or name.endswith("." + origin):
+        return name
+    return f"{name}.{origin}"
+
+
+def parse_ttl(value: str) -> int | None:
+    value = value.strip().lower()
+    if value.isdigit():
+        return int(value)
+    total = 0
+    num = ""
+    for ch in value:
+        if ch.isdigit():
+            num += ch
+        elif ch in _TTL_UNITS and num:
+            total += int(num) * _TTL_UNITS[ch]
+            num = ""
+        else:
+            return None
+    if num:
+        return None
+    return total or None
+
+
+def parse_bool(value: str | None) -> bool | None:
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "on", "proxied"):
+        return True
+    if value in ("0", "false", "no", "off", "dns_only", "dns only"):
+        return False
+    return None
+
+
+def normalize_content(rtype: str, content: str) -> str:
+    c = content.strip()
+    if rtype in ("A", "AAAA"):
+        try:
+            return ipaddress.ip_address(c).compressed
+        except ValueError:
+            return c
+    if rtype in HOSTNAME_TYPES:
+        return c.rstrip(".").lower()
+    if rtype == "TXT" and len(c) >= 2 and c.startswith('"') and c.endswith('"'):
+        # "a" "b" → ab (همان قاعده‌ای که DNS برای چند رشته TXT دارد)
+        return "".join(part for part in c[1:-1].split('" "'))
+    return c
+
+
+def record_key(r: dict) -> tuple[str, str]:
+    return r["type"].upper(), r["name"].lower().rstrip(".")
+
+
+# --- BIND ---
+def _tokenize(line: str) -> tuple[list[str], str]:
+    # خروجی: (توکن‌ها، کامنت). رشته‌های داخل "" یک توکن هستند و کوتیشن‌ها حفظ می‌شوند.
+    tokens: list[str] = []
+    cur = ""
+    in_quote = False
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if in_quote:
+            cur += ch
+            if ch == "\\" and i + 1 < len(line):
+                cur += line[i + 1]
+                i += 1
+            elif ch == '"':
+                in_quote = False
+        elif ch == '"':
+            cur += ch
+            in_quote = True
+        elif ch == ";":
+            if cur:
+                tokens.append(cur)
+            return tokens, line[i + 1:].strip()
+        elif ch in "()":
+            if cur:
+                tokens.append(cur)
+                cur = ""
+            tokens.append(ch)
+        elif ch.isspace():
+            if cur:
+                tokens.append(cur)
+                cur = ""
+        else:
+            cur += ch
+        i += 1
+    if cur:
+        tokens.append(cur)
+    return tokens, ""
+
+
+def _bind_entries(lines: Iterable[str]) -> Iterator[tuple[bool, list[str], str]]:
+    # خطوط را به رکوردهای منطقی تبدیل می‌کند (پرانتزهای چندخطی مثل SOA)
+    # خروجی: (owner حذف شده؟، توکن‌ها، کامنت‌ها)
+    depth = 0
+    tokens: list[str] = []
+    comments: list[str] = []
+    blank_owner = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if depth == 0:
+            blank_owner = line[:1] in (" ", "\t")
+        toks, comment = _tokenize(line)
+        for t in toks:
+            if t == "(":
+                depth += 1
+            elif t == ")":
+                depth = max(depth - 1, 0)
+            else:
+                tokens.append(t)
+        if comment:
+            comments.append(comment)
+        if depth == 0 and tokens:
+            yield blank_owner, tokens, " ".join(comments)
+            tokens = []
+            comments = []
+        elif depth == 0:
+            comments = []
+    if tokens:
+        yield blank_owner, tokens, " ".join(comments)
+
+
+def parse_bind(lines: Iterable[str], origin: str) -> Iterator[dict]:
+    origin = origin.rstrip(".").lower()
+    default_ttl: int | None = None
+    last_owner = origin
+
+    for blank_owner, tokens, comment in _bind_entries(lines):
+        first = tokens[0]
+        if first.upper() == "$ORIGIN" and len(tokens) > 1:
+            origin = fqdn(tokens[1], origin)
+            continue
+        if first.upper() == "$TTL" and len(tokens) > 1:
+            default_ttl = parse_ttl(tokens[1])
+            continue
+        if first.startswith("$"):
+            continue
+
+        if blank_owner:
+            owner = last_owner
+        else:
+            owner = fqdn(tokens.pop(0), origin)
+            last_owner = owner
+
+        ttl = default_ttl
+        # TTL و کلاس هر کدام اختیاری‌اند و ترتیبشان آزاد است
+        for _ in range(2):
+            if tokens and tokens[0].upper() in DNS_CLASSES:
+                tokens.pop(0)
+            elif tokens and parse_ttl(tokens[0]) is not None:
+                ttl = parse_ttl(tokens.pop(0))
+        if len(tokens) < 2:
+            continue
+
+        rtype = tokens[0].upper()
+        rdata = tokens[1:]
+        rec = {"type": rtype, "name": owner, "ttl": ttl, "proxied": None}
+
+        if rtype == "MX" and len(rdata) >= 2 and rdata[0].isdigit():
+            rec["priority"] = int(rdata[0])
+            rec["content"] = fqdn(rdata[1], origin)
+        elif rtype in ("CNAME", "NS"):
+            rec["content"] = fqdn(rdata[0], origin)
+        elif rtype == "TXT":
+            rec["content"] = normalize_content("TXT", " ".join(rdata))
+        else:
+            rec["content"] = " ".join(rdata)
+
+        # خروجی BIND خود Cloudflare وضعیت پروکسی را در کامنت نگه می‌دارد
+        if "cf-proxied:true" in comment:
+            rec["proxied"] = True
+        elif "cf-proxied:false" in comment:
+            rec["proxied"] = False
+        yield rec
+
+
+def write_bind(records: Iterable[dict], origin: str, f: TextIO):
+    origin = origin.rstrip(".")
+    f.write(f"$ORIGIN {origin}.\n")
+    f.write(";; Exported by FlareDNS bot\n")
+    for r in records:
+        rtype = r["type"]
+        content = r["content"]
+        if rtype in HOSTNAME_TYPES:
+            content = content.rstrip(".") + "."
+        elif rtype == "TXT" and not content.startswith('"'):
+            content = '"' + content.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        if rtype == "MX":
+            content = f"{r.get('priority', 0)} {content}"
+        line = f"{r['name']}.\t{r.get('ttl', 1)}\tIN\t{rtype}\t{content}"
+        if rtype in PROXIABLE_TYPES:
+            line += f" ; cf_tags=cf-proxied:{'true' if r.get('proxied') else 'false'}"
+        f.write(line + "\n")
+
+
+# --- CSV ---
+def parse_csv(lines: Iterable[str], origin: str) -> Iterator[dict]:
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [(h or "").strip().lower() for h in reader.fieldnames]
+    for row in reader:
+        rtype = (row.get("type") or "").strip().upper()
+        name = row.get("name") or ""
+        content = row.get("content") or ""
+        if not rtype or not content.strip():
+            continue
+        rec = {
+            "type": rtype,
+            "name": fqdn(name, origin),
+            "content": content.strip(),
+            "ttl": parse_ttl(row.get("ttl") or "") if (row.get("ttl") or "").strip() else None,
+            "proxied": parse_bool(row.get("proxied")),
+        }
+        if rtype in HOSTNAME_TYPES:
+            rec["content"] = fqdn(rec["content"], origin)
+        priority = (row.get("priority") or "").strip()
+        if priority.isdigit():
+            rec["priority"] = int(priority)
+        yield rec
+
+
+def write_csv(records: Iterable[dict], f: TextIO):
+    w = csv.writer(f)
+    w.writerow(CSV_FIELDS)
+    for r in records:
+        w.writerow([
+            r["type"],
+            r["name"],
+            r["content"],
+            r.get("ttl", 1),
+            "true" if r.get("proxied") else "false",
+            r.get("priority", "") if r["type"] == "MX" else "",
+        ])
+
+
+# --- مقایسه و برنامه تغییرات ---
+def _needs_update(cur: dict, new: dict) -> bool:
+    if new.get("ttl") is not None and new["ttl"] != cur.get("ttl"):
+        return True
+    if (
+        new.get("proxied") is not None
+        and cur["type"] in PROXIABLE_TYPES
+        and new["proxied"] != bool(cur.get("proxied"))
+    ):
+        return True
+    if cur["type"] == "MX" and new.get("priority") is not None and new["priority"] != cur.get("priority"):
+        return True
+    return False
+
+
+def to_payload(new: dict, cur: dict | None = None) -> dict:
+    # مقادیری که در فایل مشخص نشده‌اند (None) از رکورد فعلی برداشته می‌شوند
+    cur = cur or {}
+    payload = {
+        "type": new["type"],
+        "name": new["name"],
+        "content": new["content"],
+        "ttl": new["ttl"] if new.get("ttl") is not None else cur.get("ttl", 1),
+    }
+    if new["type"] in PROXIABLE_TYPES:
+        proxied = new.get("proxied")
+        payload["proxied"] = proxied if proxied is not None else bool(cur.get("proxied", False))
+    if new["type"] == "MX":
+        payload["priority"] = new.get("priority", cur.get("priority", 10))
+    return payload
+
+
+def diff_records(current: Iterable[dict], desired: Iterable[dict], origin: str) -> dict:
+    # خروجی: create (لیست رکورد جدید)، update (لیست (فعلی، جدید))، extra (رکوردهایی که در فایل نیستند)
+    origin = origin.rstrip(".").lower()
+    current = list(current)
+    by_key: dict[tuple[str, str], dict[str, dict]] = {}
+    for r in current:
+        by_key.setdefault(record_key(r), {})[normalize_content(r["type"], r["content"])] = r
+
+    plan = {"create": [], "update": [], "extra": [], "unchanged": 0, "skipped": 0}
+    matched: set[str] = set()
+    pending: list[dict] = []
+
+    for d in desired:
+        if d["type"] not in SUPPORTED_TYPES or (d["type"] == "NS" and d["name"] == origin):
+            # SOA، NS ریشه و انواع پشتیبانی‌نشده را Cloudflare خودش مدیریت می‌کند
+            plan["skipped"] += 1
+            continue
+        cur = by_key.get(record_key(d), {}).get(normalize_content(d["type"], d["content"]))
+        if cur is not None and cur["id"] not in matched:
+            matched.add(cur["id"])
+            if _needs_update(cur, d):
+                plan["update"].append((cur, d))
+            else:
+                plan["unchanged"] += 1
+        else:
+            pending.append(d)
+
+    # رکوردهای باقی‌مانده: اگر رکورد هم‌نام و هم‌نوعی بی‌جفت مانده، تغییر مقدار حساب می‌شود
+    for d in pending:
+        cur = next(
+            (r for r in by_key.get(record_key(d), {}).values() if r["id"] not in matched),
+            None,
+        )
+        if cur is not None:
+            matched.add(cur["id"])
+            plan["update"].append((cur, d))
+        else:
+            plan["create"].append(d)
+
+    plan["extra"] = [r for r in current if r["id"] not in matched and r["type"] in SUPPORTED_TYPES]
+    return plan
+
+
+def plan_from_file(path: str, fmt: str, origin: str, current: Iterable[dict]) -> dict:
+    # فایل خط به خط خوانده می‌شود؛ fmt یکی از "bind" یا "csv"
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        desired = parse_csv(f, origin) if fmt == "csv" else parse_bind(f, origin)
+        return diff_records(current, desired, origin)
+
+
+def export_to_file(records: Iterable[dict], fmt: str, origin: str, path: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            write_csv(records, f)
+        else:
+            write_bind(records, origin, f)